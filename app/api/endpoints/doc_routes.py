@@ -6,6 +6,7 @@ Content & Word Agent 的 MCP 工具绑定入口。
 import logging
 from fastapi import APIRouter, HTTPException
 
+from app.core.executor import run_cpu_bound, run_io_bound
 from app.schemas.base import ApiResponse
 from app.schemas.payload_docx import (
     RenderMarkdownRequest,
@@ -37,13 +38,13 @@ async def doc01_render_markdown(req: RenderMarkdownRequest):
     """Markdown → Docx 全自动排版渲染。"""
     try:
         # 1. 调用 service 渲染
-        docx_bytes = render_markdown_to_docx(req.markdown_content)
+        docx_bytes = await run_cpu_bound(render_markdown_to_docx, req.markdown_content)
 
         # 2. 上传到 COS
         cos = get_cos_service()
         filename = req.filename or "未命名文档"
         cos_key = cos.generate_cos_key("documents", filename, "docx")
-        file_url = cos.upload_bytes(docx_bytes.getvalue(), cos_key)
+        file_url = await run_io_bound(cos.upload_bytes, docx_bytes, cos_key)
         actual_filename = cos_key.rsplit("/", 1)[-1]
 
         return ApiResponse(
@@ -76,15 +77,15 @@ async def doc02_fill_template(req: FillTemplateRequest):
         cos = get_cos_service()
 
         # 1. 下载模板文件
-        template_bytes = cos.download_to_bytes(str(req.template_url))
+        template_bytes = await run_io_bound(cos.download_to_bytes, str(req.template_url))
 
         # 2. 调用 service 替换占位符
-        output = fill_docx_template(template_bytes, req.variables)
+        output = await run_cpu_bound(fill_docx_template, template_bytes, req.variables)
 
         # 3. 上传结果
         filename = req.filename or "模板填充文档"
         cos_key = cos.generate_cos_key("documents", filename, "docx")
-        file_url = cos.upload_bytes(output.getvalue(), cos_key)
+        file_url = await run_io_bound(cos.upload_bytes, output, cos_key)
         actual_filename = cos_key.rsplit("/", 1)[-1]
 
         return ApiResponse(
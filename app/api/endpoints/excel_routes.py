@@ -6,21 +6,31 @@ Data & Excel Agent 的 MCP 工具绑定入口。
 import logging
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from app.api.endpoints.task_routes import accept_task
+from app.core.executor import run_cpu_bound, run_io_bound
 from app.schemas.base import ApiResponse
 from app.schemas.payload_excel import (
     CreateExcelRequest, CreateExcelResult,
     AppendRowsRequest, AppendRowsResult,
     GenerateComplexExcelRequest,
-    ExtractExcelRangeRequest, ExtractExcelRangeResult,
+    ExtractExcelRangeRequest, ExtractExcelRangeResult, ExtractFormat,
+    ExtractExcelRangesRequest, ExtractExcelRangesResult,
+    ExcelQueryRequest, ExcelQueryResult,
 )
 from app.services.excel_handler import (
     create_excel_from_array,
-    append_rows_to_excel,
+    append_rows_batch,
     generate_complex_excel,
     extract_excel_range,
+    stream_excel_range,
+    query_excel_range,
+    extract_excel_ranges,
 )
+from app.services.append_combiner import combined_append
+from app.services.excel_cache import cached_excel_read
 from app.services.cos_storage import get_cos_service
 
 logger = logging.getLogger(__name__)
@@ -42,7 +52,8 @@ async def exc01_create_excel(req: CreateExcelRequest):
     """接收二维数组数据，生成 Excel 并上传至 COS，返回下载链接。"""
     try:
         # 1. 调用 service 生成 Excel
-        excel_bytes = create_excel_from_array(
+        excel_bytes = await run_cpu_bound(
+            create_excel_from_array,
             title=req.title,
             data=req.data,
             sheet_name=req.sheet_name or "Sheet1",
@@ -53,7 +64,7 @@ async def exc01_create_excel(req: CreateExcelRequest):
         cos = get_cos_service()
         filename = req.filename or "未命名表格"
         cos_key = cos.generate_cos_key("excel_documents", filename, "xlsx")
-        file_url = cos.upload_bytes(excel_bytes.getvalue(), cos_key)
+        file_url = await run_io_bound(cos.upload_bytes, excel_bytes, cos_key)
 
         actual_filename = cos_key.rsplit("/", 1)[-1]
 
@@ -83,19 +94,9 @@ async def exc01_create_excel(req: CreateExcelRequest):
     description="向已存在的云端 Excel 文件的指定 Sheet 追加新行（不覆盖原内容）。",
 )
 async def exc02_append_rows(req: AppendRowsRequest):
-    """下载已有 Excel，追加数据行后重新上传。"""
+    """下载已有 Excel，追加数据行后重新上传。同一源文件的并发追加合并为一次读-改-写。"""
     try:
-        # 1. 调用 service 追加行
-        updated_bytes = append_rows_to_excel(
-            source_excel_url=str(req.source_excel_url),
-            rows=req.rows,
-            sheet_name=req.sheet_name,
-        )
-
-        # 2. 上传更新后的文件
-        cos = get_cos_service()
-        cos_key = cos.generate_cos_key("excel_documents", "appended", "xlsx")
-        file_url = cos.upload_bytes(updated_bytes.getvalue(), cos_key)
+        result = await combined_append(str(req.source_excel_url), req.sheet_name, req.rows, _append_and_upload)
 
         return ApiResponse(
             code=200,
@@ -103,7 +104,8 @@ async def exc02_append_rows(req: AppendRowsRequest):
             data=AppendRowsResult(
                 success=True,
                 rows_appended=len(req.rows),
-                file_url=file_url,
+                file_url=result["file_url"],
+                batch_size=result["batch_size"],
             ),
         )
     except ValueError as e:
@@ -113,43 +115,62 @@ async def exc02_append_rows(req: AppendRowsRequest):
         raise HTTPException(status_code=500, detail=f"追加行失败: {str(e)}")
 
 
+async def _append_and_upload(source_url: str, appends: list[tuple[str, list]]) -> str:
+    """一次读-改-写：追加一批行并上传，返回新文件 URL"""
+    # 1. 调用 service 追加行
+    updated_bytes = await run_cpu_bound(append_rows_batch, source_excel_url=source_url, appends=appends)
+
+    # 2. 上传更新后的文件
+    cos = get_cos_service()
+    cos_key = cos.generate_cos_key("excel_documents", "appended", "xlsx")
+    return await run_io_bound(cos.upload_bytes, updated_bytes, cos_key)
+
+
 # =====================================================
 #  EXC-03: generate_complex_excel
 # =====================================================
 
+async def _generate_complex(req: GenerateComplexExcelRequest) -> dict:
+    """EXC-03 渲染 + 上传，返回 CreateExcelResult 对应的 dict"""
+    # 1. 转换为 service 需要的 dict 格式
+    sheets_data = [s.model_dump() for s in req.sheets]
+
+    # 2. 调用 service 生成
+    excel_bytes = await run_cpu_bound(
+        generate_complex_excel,
+        title=req.title,
+        sheets_def=sheets_data,
+        style=req.style.model_dump() if req.style else None,
+    )
+
+    # 3. 上传
+    cos = get_cos_service()
+    filename = req.filename or req.title
+    cos_key = cos.generate_cos_key("excel_documents", filename, "xlsx")
+    file_url = await run_io_bound(cos.upload_bytes, excel_bytes, cos_key)
+    return {"file_url": file_url, "filename": cos_key.rsplit("/", 1)[-1]}
+
+
 @router.post(
     "/generate_complex",
     response_model=ApiResponse[CreateExcelResult],
     summary="[EXC-03] 多维报表与公式生成",
-    description="生成包含多 Sheet、合并单元格、预埋计算公式的行业级报表。",
+    description="生成包含多 Sheet、合并单元格、预埋计算公式的行业级报表。"
+                "大型报表可加 ?async=true 以 202 + task_id 方式后台执行。",
 )
-async def exc03_generate_complex(req: GenerateComplexExcelRequest):
+async def exc03_generate_complex(
+    req: GenerateComplexExcelRequest,
+    async_mode: bool = Query(default=False, alias="async", description="是否以后台任务方式执行"),
+):
     """根据多 Sheet 结构化定义生成复杂 Excel 报表。"""
+    if async_mode:
+        return accept_task("EXC-03", lambda: _generate_complex(req))
     try:
-        # 1. 转换为 service 需要的 dict 格式
-        sheets_data = [s.model_dump() for s in req.sheets]
-
-        # 2. 调用 service 生成
-        excel_bytes = generate_complex_excel(
-            title=req.title,
-            sheets_def=sheets_data,
-            style=req.style.model_dump() if req.style else None,
-        )
-
-        # 3. 上传
-        cos = get_cos_service()
-        filename = req.filename or req.title
-        cos_key = cos.generate_cos_key("excel_documents", filename, "xlsx")
-        file_url = cos.upload_bytes(excel_bytes.getvalue(), cos_key)
-        actual_filename = cos_key.rsplit("/", 1)[-1]
-
+        result = await _generate_complex(req)
         return ApiResponse(
             code=200,
             message="复杂 Excel 报表生成成功",
-            data=CreateExcelResult(
-                file_url=file_url,
-                filename=actual_filename,
-            ),
+            data=CreateExcelResult(**result),
         )
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -166,25 +187,106 @@ async def exc03_generate_complex(req: GenerateComplexExcelRequest):
     "/extract_range",
     response_model=ApiResponse[ExtractExcelRangeResult],
     summary="[EXC-04] 命名区域精准解析",
-    description="从大型 Excel 文件中精准提取局部数据区域，返回结构化 JSON。",
+    description="从大型 Excel 文件中精准提取局部数据区域，返回结构化 JSON。"
+                "支持 offset / limit / cursor 分页，以及按列 JSON、流式 CSV / NDJSON 格式。",
 )
 async def exc04_extract_range(req: ExtractExcelRangeRequest):
     """从远程 Excel 精准读取指定区域数据。"""
+    query = dict(
+        source_excel_url=str(req.source_excel_url),
+        sheet_name=req.sheet_name,
+        cell_range=req.cell_range,
+        keyword=req.keyword,
+        offset=req.offset,
+        limit=req.limit,
+        cursor=req.cursor,
+    )
+    try:
+        if req.output_format in (ExtractFormat.CSV, ExtractFormat.NDJSON):
+            # 生成器无法跨进程传递，流式格式在线程池中打开文件并定位表头，数据行随响应体逐块解析
+            body, next_cursor = await run_io_bound(
+                stream_excel_range, output_format=req.output_format.value, **query,
+            )
+            media_type = (
+                "text/csv; charset=utf-8" if req.output_format == ExtractFormat.CSV
+                else "application/x-ndjson"
+            )
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            return StreamingResponse(body, media_type=media_type, headers=headers)
+
+        result = await cached_excel_read(extract_excel_range, orient=req.output_format.value, **query)
+
+        return ApiResponse(
+            code=200,
+            message="数据提取成功",
+            data=ExtractExcelRangeResult(**result),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.exception("EXC-04 extract_excel_range 失败")
+        raise HTTPException(status_code=500, detail=f"数据提取失败: {str(e)}")
+
+
+@router.post(
+    "/query_range",
+    response_model=ApiResponse[ExcelQueryResult],
+    summary="[EXC-04] 查询下推（过滤 / 投影 / 聚合）",
+    description="在服务端对 Excel 数据区域执行列投影、行过滤与分组聚合（sum/count/avg/min/max），"
+                "一次流式遍历完成，只返回结果。",
+)
+async def exc04_query_range(req: ExcelQueryRequest):
+    """在服务端计算查询结果，避免 Agent 拉取整表后自行筛选汇总。"""
     try:
-        result = extract_excel_range(
+        result = await cached_excel_read(
+            query_excel_range,
             source_excel_url=str(req.source_excel_url),
             sheet_name=req.sheet_name,
             cell_range=req.cell_range,
             keyword=req.keyword,
+            select=req.select,
+            where=[cond.model_dump(mode="json") for cond in req.where or []],
+            group_by=req.group_by,
+            aggregates=[agg.model_dump(mode="json") for agg in req.aggregates or []],
+            limit=req.limit,
+        )
+
+        return ApiResponse(
+            code=200,
+            message="查询成功",
+            data=ExcelQueryResult(**result),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.exception("EXC-04 query_excel_range 失败")
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+
+@router.post(
+    "/extract_ranges",
+    response_model=ApiResponse[ExtractExcelRangesResult],
+    summary="[EXC-04] 多区域提取",
+    description="一次请求从同一工作簿提取多个区域（单元格区间 / 关键字区域 / 定义名称），"
+                "文件只下载解析一次，同一 Sheet 上的区域在一次顺序扫描中读取，结果按 key 返回。",
+)
+async def exc04_extract_ranges(req: ExtractExcelRangesRequest):
+    """批量读取多个区域，避免 Agent 为每个区域单独调用一次。"""
+    try:
+        result = await cached_excel_read(
+            extract_excel_ranges,
+            source_excel_url=str(req.source_excel_url),
+            ranges=[spec.model_dump() for spec in req.ranges],
+            sheet_name=req.sheet_name,
         )
 
         return ApiResponse(
             code=200,
             message="数据提取成功",
-            data=ExtractExcelRangeResult(**result),
+            data=ExtractExcelRangesResult(**result),
         )
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        logger.exception("EXC-04 extract_excel_range 失败")
+        logger.exception("EXC-04 extract_excel_ranges 失败")
         raise HTTPException(status_code=500, detail=f"数据提取失败: {str(e)}")
@@ -0,0 +1,115 @@
+"""
+本地存储文件下载端点。
+local 存储后端产出的 file_url 指向本路由；支持 HEAD、条件请求 (If-None-Match) 与单段 Range 请求，
+便于大文件断点续传和按需读取。
+"""
+
+import os
+import re
+from email.utils import formatdate
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.services.storage_backend import get_storage_backend, guess_content_type
+
+router = APIRouter(prefix="/files", tags=["Files - 本地存储下载"])
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 256 * 1024
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    解析单段 Range 头，返回 [start, end] 闭区间。
+    多段或无法识别的 Range 返回 None（按完整响应处理）；不可满足时抛 ValueError。
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: 最后 N 个字节
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.api_route(
+    "/{file_key:path}",
+    methods=["GET", "HEAD"],
+    summary="下载本地存储中的文件",
+    description="local 存储后端产物的下载地址。支持 Range: bytes=start-end 断点续传与 ETag 条件请求。",
+)
+async def download_local_file(file_key: str, request: Request):
+    """读取本地存储文件，按需返回 200 / 206 / 304 / 416。"""
+    backend = get_storage_backend("local")
+    try:
+        path = backend.resolve_path(file_key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="文件不存在")
+
+    st = os.stat(path)
+    size = st.st_size
+    etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+    }
+    media_type = guess_content_type(file_key)
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        start, length, status = 0, size, 200
+    else:
+        start, end = byte_range
+        length, status = end - start + 1, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        _iter_file(path, start, length),
+        status_code=status,
+        headers=headers,
+        media_type=media_type,
+    )
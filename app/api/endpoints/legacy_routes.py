@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException, Request
 
 import mistune
 
+from app.core.executor import run_cpu_bound, run_io_bound
 from app.services.doc_builder import render_markdown_to_docx
 from app.services.excel_handler import create_excel_from_array
 from app.services.pdf_manipulator import convert_docx_to_pdf
@@ -63,10 +64,10 @@ async def legacy_generate_doc(request: Request):
     if not content or content.strip() == "" or content == "None":
         raise HTTPException(status_code=400, detail="内容不能为空")
     try:
-        docx_bytes = render_markdown_to_docx(content)
+        docx_bytes = await run_cpu_bound(render_markdown_to_docx, content)
         cos = get_cos_service()
         cos_key = cos.generate_cos_key("documents", filename_input, "docx")
-        file_url = cos.upload_bytes(docx_bytes.getvalue(), cos_key)
+        file_url = await run_io_bound(cos.upload_bytes, docx_bytes, cos_key)
         return {"message": "生成成功", "file_url": file_url}
     except Exception as e:
         logger.exception("legacy generate-doc 失败")
@@ -85,14 +86,15 @@ async def legacy_generate_excel(request: Request):
     headers, rows = _parse_markdown_table(content.replace("\\n", "\n"))
     if not headers and not rows:
         raise HTTPException(status_code=400, detail="未找到表格内容")
-    excel_bytes = create_excel_from_array(
+    excel_bytes = await run_cpu_bound(
+        create_excel_from_array,
         title=filename_input,
         data=[headers] + rows,
         sheet_name="Sheet1",
     )
     cos = get_cos_service()
     cos_key = cos.generate_cos_key("excel_documents", filename_input, "xlsx")
-    file_url = cos.upload_bytes(excel_bytes.getvalue(), cos_key)
+    file_url = await run_io_bound(cos.upload_bytes, excel_bytes, cos_key)
     return {"message": "Excel文件生成成功", "file_url": file_url, "filename": cos_key.rsplit("/", 1)[-1]}
 
 
@@ -107,7 +109,8 @@ async def legacy_generate_pdf(request: Request):
         raise HTTPException(status_code=400, detail="缺少 docx_url 或 file_url 参数")
     filename = str(data.get("filename") or "转换文档").strip()
     try:
-        result = convert_docx_to_pdf(
+        result = await run_io_bound(
+            convert_docx_to_pdf,
             source_docx_url=docx_url,
             filename=filename,
         )
@@ -6,8 +6,10 @@ PDF-X 系列 API 端点（同步模式）。
 """
 
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
+from app.api.endpoints.task_routes import accept_task
+from app.core.executor import run_cpu_bound, run_io_bound
 from app.schemas.base import ApiResponse
 from app.schemas.payload_pdf import (
     ConvertDocxToPdfRequest, ConvertDocxToPdfResult,
@@ -33,15 +35,25 @@ router = APIRouter(prefix="/pdf", tags=["PDF - Compliance & PDF Agent"])
     "/convert_from_docx",
     response_model=ApiResponse[ConvertDocxToPdfResult],
     summary="[PDF-01] Word 文档转 PDF",
-    description="使用 LibreOffice headless 将 .docx 文件高保真转换为 PDF。",
+    description="使用 LibreOffice headless 将 .docx 文件高保真转换为 PDF。"
+                "大型文档可加 ?async=true 以 202 + task_id 方式后台执行。",
 )
-async def pdf01_convert_from_docx(req: ConvertDocxToPdfRequest):
+async def pdf01_convert_from_docx(
+    req: ConvertDocxToPdfRequest,
+    async_mode: bool = Query(default=False, alias="async", description="是否以后台任务方式执行"),
+):
     """Word (.docx) → PDF 高保真转换。"""
-    try:
-        result = convert_docx_to_pdf(
+    def work():
+        return run_io_bound(
+            convert_docx_to_pdf,
             source_docx_url=str(req.source_docx_url),
             filename=req.filename,
         )
+
+    if async_mode:
+        return accept_task("PDF-01", work)
+    try:
+        result = await work()
         return ApiResponse(
             code=200,
             message="Word 转 PDF 成功",
@@ -70,7 +82,8 @@ async def pdf01_convert_from_docx(req: ConvertDocxToPdfRequest):
 async def pdf02_add_watermark(req: AddWatermarkRequest):
     """同步处理 PDF 水印/盖章。"""
     try:
-        result = add_watermark_and_sign(
+        result = await run_cpu_bound(
+            add_watermark_and_sign,
             source_pdf_url=str(req.source_pdf_url),
             watermark=req.watermark.model_dump() if req.watermark else None,
             stamp=req.stamp.model_dump() if req.stamp else None,
@@ -100,7 +113,8 @@ async def pdf02_add_watermark(req: AddWatermarkRequest):
 async def pdf03_merge_split(req: MergeSplitRequest):
     """同步处理 PDF 合并/拆分。"""
     try:
-        result = merge_and_split_pdf(
+        result = await run_cpu_bound(
+            merge_and_split_pdf,
             source_pdf_urls=[str(u) for u in req.source_pdf_urls],
             page_ranges=[pr.model_dump() for pr in req.page_ranges] if req.page_ranges else None,
             output_filename=req.output_filename,
@@ -0,0 +1,69 @@
+"""
+通用任务轮询端点（模式 B）。
+长耗时接口以 ?async=true 调用时立即返回 202 + task_id，Agent 通过本路由轮询结果。
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+
+from app.core.config import get_settings
+from app.schemas.base import ApiResponse
+from app.schemas.payload_task import TaskSubmittedResult, TaskStatusResult
+from app.services.task_queue import get_task_queue
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/tasks", tags=["Tasks - 异步任务轮询"])
+
+
+def accept_task(kind: str, work: Callable[[], Awaitable[dict[str, Any]]]) -> JSONResponse:
+    """
+    将渲染工作登记为后台任务，返回 202 Accepted 响应。
+
+    Args:
+        kind: 任务类别，如 "PDF-01"
+        work: 无参协程工厂，返回与同步接口 data 字段一致的结果 dict
+    """
+    record = get_task_queue().submit(kind, work)
+    status_url = f"/api/{get_settings().api_version}/tasks/{record.task_id}"
+    logger.info(f"{kind} 任务已提交: {record.task_id}")
+    return JSONResponse(
+        status_code=202,
+        content={
+            "code": 202,
+            "message": "任务已提交后台执行，请轮询 status_url 获取结果",
+            "data": TaskSubmittedResult(task_id=record.task_id, status_url=status_url).model_dump(),
+        },
+    )
+
+
+@router.get(
+    "/{task_id}",
+    response_model=ApiResponse[TaskStatusResult],
+    summary="查询后台任务状态",
+    description="查询以 async=true 提交的渲染任务状态。succeeded 时返回结果，failed 时返回失败原因。",
+)
+async def get_task_status(task_id: str):
+    record = get_task_queue().get(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在或已过期: {task_id}")
+
+    return ApiResponse(
+        code=200,
+        message="success",
+        data=TaskStatusResult(
+            task_id=record.task_id,
+            kind=record.kind,
+            status=record.status.value,
+            result=record.result,
+            result_url=(record.result or {}).get("file_url"),
+            error=record.error,
+            error_code=record.error_code,
+            created_at=datetime.fromtimestamp(record.created_at).isoformat(),
+            updated_at=datetime.fromtimestamp(record.updated_at).isoformat(),
+        ),
+    )
@@ -5,11 +5,15 @@ VIS-X 系列 API 端点（同步模式）。
 - VIS-02: 数据 → 统计图表 (bar/line/pie 等)
 - VIS-03: QR Code / Barcode 生成
 - VIS-04: 词云生成
+
+所有 VIS 端点都是请求参数的纯函数，结果经 render_cache 缓存，相同请求直接返回已上传的文件。
 """
 
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
+from app.api.endpoints.task_routes import accept_task
+from app.core.executor import run_cpu_bound, run_io_bound
 from app.schemas.base import ApiResponse
 from app.schemas.payload_vis import (
     RenderMermaidRequest,
@@ -18,6 +22,7 @@ from app.schemas.payload_vis import (
     GenerateBarcodeRequest,
     GenerateWordCloudRequest,
 )
+from app.services.render_cache import cached_render, get_render_cache
 from app.services.vis_renderer import (
     render_mermaid_to_image,
     render_chart_from_data,
@@ -43,13 +48,14 @@ router = APIRouter(prefix="/vis", tags=["Visualization - 素材工厂"])
 async def vis01_render_mermaid(req: RenderMermaidRequest):
     """Mermaid 代码 → 可视化图片。"""
     try:
-        result = render_mermaid_to_image(
+        result = await cached_render("VIS-01", req, lambda: run_io_bound(
+            render_mermaid_to_image,
             code=req.code,
             output_format=req.output_format.value,
             theme=req.theme or "default",
             width=req.width or 1200,
             height=req.height or 800,
-        )
+        ))
         return ApiResponse(code=200, message="Mermaid 图片渲染成功", data=result)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -65,12 +71,17 @@ async def vis01_render_mermaid(req: RenderMermaidRequest):
 @router.post(
     "/render_chart",
     summary="[VIS-02] 结构化数据生成统计图表",
-    description="根据数据和图表类型生成统计图表图片 (bar/line/pie/scatter/radar 等)。",
+    description="根据数据和图表类型生成统计图表图片 (bar/line/pie/scatter/radar 等)。"
+                "可加 ?async=true 以 202 + task_id 方式后台执行。",
 )
-async def vis02_render_chart(req: RenderChartRequest):
+async def vis02_render_chart(
+    req: RenderChartRequest,
+    async_mode: bool = Query(default=False, alias="async", description="是否以后台任务方式执行"),
+):
     """结构化数据 → 统计图表图片。"""
-    try:
-        result = render_chart_from_data(
+    def work():
+        return cached_render("VIS-02", req, lambda: run_cpu_bound(
+            render_chart_from_data,
             chart_type=req.chart_type.value,
             categories=req.categories,
             series=req.series,
@@ -79,7 +90,12 @@ async def vis02_render_chart(req: RenderChartRequest):
             width=req.width or 900,
             height=req.height or 600,
             custom_options=req.custom_options,
-        )
+        ))
+
+    if async_mode:
+        return accept_task("VIS-02", work)
+    try:
+        result = await work()
         return ApiResponse(code=200, message="图表生成成功", data=result)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -100,11 +116,12 @@ async def vis02_render_chart(req: RenderChartRequest):
 async def vis03a_generate_qrcode(req: GenerateQRCodeRequest):
     """文本/URL → QR Code 图片。"""
     try:
-        result = generate_qrcode(
+        result = await cached_render("VIS-03a", req, lambda: run_cpu_bound(
+            generate_qrcode,
             content=req.content,
             size=req.size,
             error_correction=req.error_correction.value,
-        )
+        ))
         return ApiResponse(code=200, message="QR 码生成成功", data=result)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -125,10 +142,11 @@ async def vis03a_generate_qrcode(req: GenerateQRCodeRequest):
 async def vis03b_generate_barcode(req: GenerateBarcodeRequest):
     """编码文本 → 条形码图片。"""
     try:
-        result = generate_barcode(
+        result = await cached_render("VIS-03b", req, lambda: run_cpu_bound(
+            generate_barcode,
             content=req.content,
             barcode_type=req.barcode_type.value,
-        )
+        ))
         return ApiResponse(code=200, message="条形码生成成功", data=result)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
@@ -149,7 +167,8 @@ async def vis03b_generate_barcode(req: GenerateBarcodeRequest):
 async def vis04_generate_wordcloud(req: GenerateWordCloudRequest):
     """文本 → 词云图片。"""
     try:
-        result = generate_wordcloud(
+        result = await cached_render("VIS-04", req, lambda: run_cpu_bound(
+            generate_wordcloud,
             text=req.text,
             width=req.width,
             height=req.height,
@@ -157,10 +176,27 @@ async def vis04_generate_wordcloud(req: GenerateWordCloudRequest):
             background_color=req.background_color,
             colormap=req.colormap,
             use_jieba=req.use_jieba,
-        )
+        ))
         return ApiResponse(code=200, message="词云生成成功", data=result)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.exception("VIS-04 generate_wordcloud 失败")
         raise HTTPException(status_code=500, detail=f"词云生成失败: {str(e)}")
+
+
+# =====================================================
+#  渲染缓存统计
+# =====================================================
+
+@router.get(
+    "/cache/stats",
+    summary="VIS 渲染缓存命中统计",
+    description="返回渲染结果缓存的命中/未命中/失效/淘汰计数及内存、磁盘占用。",
+)
+async def vis_cache_stats():
+    """渲染缓存统计信息。"""
+    cache = get_render_cache()
+    if cache is None:
+        return ApiResponse(code=200, message="渲染缓存未启用", data={"enabled": False})
+    return ApiResponse(code=200, message="success", data={"enabled": True, **cache.stats()})
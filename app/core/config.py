@@ -3,6 +3,8 @@ SGA-Office 全局配置管理
 使用 Pydantic BaseSettings 从环境变量统一加载所有敏感凭证与运行参数。
 """
 
+import os
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from functools import lru_cache
@@ -20,6 +22,14 @@ class Settings(BaseSettings):
     cos_region: str = Field(default="ap-guangzhou", description="COS 区域")
     cos_bucket_name: str = Field(default="", description="COS 存储桶名称")
 
+    # ========== 存储后端 ==========
+    storage_backend: str = Field(default="cos", description="默认存储后端: cos / local（可被请求头 X-Storage-Backend 覆盖）")
+    local_storage_root: str = Field(default="/tmp/sga-office/files", description="local 后端的存储根目录（生产环境挂载共享卷）")
+    local_storage_public_url: str = Field(
+        default="http://127.0.0.1:8000/api/v1/files",
+        description="local 后端文件的对外访问前缀（指向本服务的 /api/v1/files 路由）",
+    )
+
     # ========== 服务运行参数 ==========
     api_host: str = Field(default="0.0.0.0", description="API 监听地址")
     api_port: int = Field(default=8000, description="API 监听端口")
@@ -28,8 +38,101 @@ class Settings(BaseSettings):
     api_version: str = Field(default="v1", description="API 版本号")
 
     # ========== 文件处理参数 ==========
-    max_upload_size_mb: int = Field(default=50, description="最大上传文件体积(MB)")
+    max_upload_size_mb: int = Field(default=50, description="最大上传/下载文件体积(MB)，超过时拒绝处理")
+    download_spool_threshold_mb: int = Field(default=8, description="下载内容超过此体积(MB)时由内存转存到临时文件")
     temp_dir: str = Field(default="/tmp/sga-office", description="临时文件目录")
+    excel_streaming_row_threshold: int = Field(
+        default=20000,
+        description="EXC-01/EXC-03 数据总行数超过此值时改用 write-only 流式写入，内存占用不随行数增长",
+    )
+    excel_query_max_rows: int = Field(
+        default=10000,
+        description="EXC-04 查询下推单次最多返回的结果行数，超出时截断并标记 truncated",
+    )
+    excel_append_combine_enabled: bool = Field(
+        default=True,
+        description="EXC-02 是否按源 URL 合并并发追加（一次读-改-写，后续追加基于上一次的结果文件）",
+    )
+    excel_append_batch_window_ms: int = Field(
+        default=50,
+        description="EXC-02 合并窗口(毫秒)：首个追加到达后等待此时长，收集同一源文件的其他追加",
+    )
+    excel_parse_cache_mb: int = Field(
+        default=128,
+        description="EXC-04 解析结果缓存（列式存储）的内存上限(MB)，同一文件再次提取时不重新解析。"
+                    "缓存只在 API 进程中（CPU 进程池不持有），总占用约为 uvicorn worker 数 × 此值。0 表示关闭",
+    )
+
+    docx_image_prefetch_workers: int = Field(
+        default=8,
+        description="DOC-01 渲染前预取图片的线程数（进程内所有并发渲染共用）。0 表示不预取，渲染时逐张下载",
+    )
+    docx_image_prefetch_timeout_seconds: float = Field(
+        default=60,
+        description="DOC-01 单篇文档图片预取的总时限(秒)，超时未完成的图片以下载失败占位",
+    )
+    docx_image_dpi: int = Field(
+        default=150,
+        description="DOC-01 图片按显示尺寸下采样的目标打印 DPI，源图更小时不放大。0 表示保留源分辨率",
+    )
+    docx_image_cache_mb: int = Field(
+        default=64,
+        description="DOC-01 图片转码结果缓存（进程内，按源内容摘要与目标尺寸）的内存上限(MB)。0 表示关闭",
+    )
+
+    # ========== 并发执行池 ==========
+    io_pool_workers: int = Field(
+        default=32,
+        description="I/O 密集型任务线程池大小（下载、上传、等待子进程）",
+    )
+    cpu_pool_workers: int = Field(
+        default_factory=lambda: min(4, os.cpu_count() or 1),
+        description="CPU 密集型任务进程池大小（文档/表格/图表渲染）。0 表示退化为在 I/O 线程池中执行",
+    )
+
+    # ========== 出站 HTTP ==========
+    http_connect_timeout: float = Field(default=10, description="出站请求连接超时(秒)")
+    http_read_timeout: float = Field(default=60, description="出站请求读取超时(秒)")
+    http_pool_connections: int = Field(default=16, description="缓存连接池的主机数")
+    http_pool_maxsize: int = Field(default=16, description="单主机最大并发连接数")
+    http_max_retries: int = Field(default=2, description="GET/HEAD 请求在连接错误或 502/503/504 时的重试次数")
+
+    # ========== VIS 渲染结果缓存 ==========
+    render_cache_enabled: bool = Field(default=True, description="是否缓存 VIS 系列渲染结果（相同请求直接返回已上传的 file_url）")
+    render_cache_memory_entries: int = Field(default=1024, description="内存 LRU 层最多保留的条目数")
+    render_cache_disk_mb: int = Field(default=64, description="磁盘层总体积上限(MB)，超出时淘汰最久未访问的条目")
+    render_cache_verify_seconds: int = Field(default=300, description="命中后距上次确认存储对象存在超过此秒数时重新校验")
+
+    # ========== 上传 ==========
+    upload_multipart_threshold_mb: int = Field(default=16, description="产物超过此体积(MB)时使用分片上传")
+    upload_part_size_mb: int = Field(default=8, description="分片大小(MB)")
+    upload_part_concurrency: int = Field(default=4, description="单个文件并发上传的分片数")
+    upload_part_retries: int = Field(default=3, description="单个分片失败后的重试次数")
+
+    # ========== 源文件缓存 ==========
+    source_cache_enabled: bool = Field(default=True, description="是否在本地缓存下载的源文件（模板、图章、源表格、图片）")
+    source_cache_mb: int = Field(default=512, description="源文件缓存磁盘总体积上限(MB)")
+    source_cache_ttl_seconds: int = Field(default=300, description="服务端未提供 ETag/Last-Modified 时缓存的有效期(秒)")
+
+    # ========== 异步任务 (模式 B) ==========
+    task_backend: str = Field(default="memory", description="任务状态存储后端: memory / sqlite")
+    task_sqlite_path: str = Field(
+        default="/tmp/sga-office/tasks.sqlite3",
+        description="sqlite 后端的数据库文件路径（多 worker 需指向同一文件）",
+    )
+    task_max_concurrency: int = Field(default=4, description="单进程内同时执行的后台任务上限")
+    task_result_ttl_seconds: int = Field(default=3600, description="已结束任务的结果保留时长(秒)")
+
+    # ========== LibreOffice 转换池 (PDF-01) ==========
+    soffice_binary: str = Field(default="soffice", description="LibreOffice 可执行文件")
+    soffice_pool_size: int = Field(default=2, description="常驻 headless 实例数量")
+    soffice_max_conversions: int = Field(default=50, description="单个实例完成多少次转换后回收重启")
+    soffice_convert_timeout: int = Field(default=120, description="单次转换超时(秒)")
+    soffice_startup_timeout: int = Field(default=30, description="实例启动就绪超时(秒)")
+    soffice_uno_python: str = Field(
+        default="/usr/bin/python3",
+        description="装有 python3-uno 的解释器，运行驱动常驻实例的 UNO 辅助进程（应用自身的解释器无法 import uno）",
+    )
 
     @property
     def cos_base_url(self) -> str:
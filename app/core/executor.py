@@ -0,0 +1,118 @@
+"""
+阻塞任务调度层。
+service 层全部是同步实现（openpyxl / python-docx / matplotlib / soffice / requests），
+路由层通过本模块把它们派发到独立的执行池，事件循环只负责收发请求：
+
+- run_io_bound:  网络下载、COS 上传、等待 soffice 子进程等 I/O 密集型调用 → 线程池
+- run_cpu_bound: Excel/Docx 渲染、图表绘制、PDF 处理等 CPU 密集型调用 → 进程池
+
+两个池的大小由 Settings.io_pool_workers / cpu_pool_workers 控制。
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+from app.core.config import get_settings
+from app.core.request_context import call_with_context, snapshot
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_io_executor: ThreadPoolExecutor | None = None
+_cpu_executor: ProcessPoolExecutor | None = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """获取 I/O 线程池单例（惰性创建）"""
+    global _io_executor
+    if _io_executor is None:
+        with _lock:
+            if _io_executor is None:
+                workers = max(1, get_settings().io_pool_workers)
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="sga-io",
+                )
+                logger.info(f"I/O 线程池已创建: {workers} workers")
+    return _io_executor
+
+
+def get_cpu_executor() -> Executor:
+    """
+    获取 CPU 进程池单例（惰性创建）。
+    cpu_pool_workers <= 0 时返回 I/O 线程池，便于测试与单核部署。
+    """
+    global _cpu_executor
+    workers = get_settings().cpu_pool_workers
+    if workers <= 0:
+        return get_io_executor()
+    if _cpu_executor is None:
+        with _lock:
+            if _cpu_executor is None:
+                # spawn: 避免在已有线程的进程中 fork 导致锁状态被复制
+                _cpu_executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"CPU 进程池已创建: {workers} workers")
+    return _cpu_executor
+
+
+async def run_io_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在 I/O 线程池中执行阻塞调用。
+    会复制当前的 contextvars 上下文，保证请求级状态在线程中可见。
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_io_executor(), call)
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在 CPU 进程池中执行计算密集型调用。
+    func 及其参数、返回值必须可被 pickle（模块级函数、dict、BytesIO 等）。
+    请求级上下文（见 app.core.request_context）会随调用一起传入子进程。
+    """
+    executor = get_cpu_executor()
+    if isinstance(executor, ThreadPoolExecutor):
+        return await run_io_bound(func, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    try:
+        call = functools.partial(call_with_context, snapshot(), func, *args, **kwargs)
+        return await loop.run_in_executor(executor, call)
+    except BrokenProcessPool:
+        # 子进程异常退出（如 OOM 被杀）后进程池不可再用，重置以便下次重建
+        _reset_cpu_executor(executor)
+        raise RuntimeError("渲染进程异常退出，请稍后重试。")
+
+
+def _reset_cpu_executor(broken: Executor) -> None:
+    global _cpu_executor
+    with _lock:
+        if _cpu_executor is broken:
+            _cpu_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executors() -> None:
+    """关闭所有执行池（应用退出时调用）"""
+    global _io_executor, _cpu_executor
+    with _lock:
+        if _cpu_executor is not None:
+            _cpu_executor.shutdown(wait=True, cancel_futures=True)
+            _cpu_executor = None
+        if _io_executor is not None:
+            _io_executor.shutdown(wait=True, cancel_futures=True)
+            _io_executor = None
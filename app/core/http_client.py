@@ -0,0 +1,216 @@
+"""
+共享出站 HTTP 客户端。
+所有下载（COS 源文件、Markdown 图片、mermaid.ink 渲染等）统一走同一个 requests.Session，
+复用 keep-alive 连接，避免每次请求重新进行 TCP + TLS 握手。
+
+- 每个主机一个连接池，单主机连接数上限为 http_pool_maxsize（超出时排队等待）
+- 连接/读取超时、幂等请求的自动重试均由 Settings 配置
+- async_http_get 供协程调用，内部派发到 I/O 线程池
+- stream_download / download_spooled 分块流式下载，并按 max_upload_size_mb 限制体积
+"""
+
+import os
+import tempfile
+import threading
+from typing import Any, BinaryIO, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.config import get_settings
+
+DEFAULT_HEADERS = {"User-Agent": "SGA-Office/1.0 (Agent-First File Processor)"}
+
+Timeout = Union[float, tuple[float, float]]
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class DownloadTooLargeError(ValueError):
+    """远程文件超过允许的最大体积"""
+
+
+_session: requests.Session | None = None
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    settings = get_settings()
+    retry = Retry(
+        total=settings.http_max_retries,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.http_pool_connections,
+        pool_maxsize=settings.http_pool_maxsize,
+        max_retries=retry,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """获取进程级共享 Session（惰性创建，线程安全）"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def default_timeout() -> tuple[float, float]:
+    """(连接超时, 读取超时)"""
+    settings = get_settings()
+    return settings.http_connect_timeout, settings.http_read_timeout
+
+
+def _request_timeout(timeout: Optional[Timeout]) -> tuple[float, float]:
+    """单个数值视为读取超时，连接超时取其与默认值中的较小者"""
+    if timeout is None:
+        return default_timeout()
+    if not isinstance(timeout, tuple):
+        return min(get_settings().http_connect_timeout, timeout), timeout
+    return timeout
+
+
+def http_get(
+    url: str,
+    timeout: Optional[Timeout] = None,
+    headers: Optional[dict[str, str]] = None,
+    stream: bool = False,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    通过共享 Session 发起 GET 请求。
+
+    Args:
+        url:     目标 URL
+        timeout: 读取超时秒数或 (连接, 读取) 元组，默认取 Settings
+        headers: 额外请求头（与默认 User-Agent 合并）
+        stream:  是否流式读取响应体（调用方负责关闭 Response）
+    """
+    return get_http_session().get(
+        str(url),
+        timeout=_request_timeout(timeout),
+        headers=headers,
+        stream=stream,
+        **kwargs,
+    )
+
+
+def http_head(url: str, timeout: Optional[Timeout] = None, **kwargs: Any) -> requests.Response:
+    """通过共享 Session 发起 HEAD 请求（跟随重定向），超时参数同 http_get"""
+    return get_http_session().head(str(url), timeout=_request_timeout(timeout), allow_redirects=True, **kwargs)
+
+
+def _max_download_bytes() -> int:
+    return get_settings().max_upload_size_mb * 1024 * 1024
+
+
+def write_response_body(
+    response: requests.Response,
+    dest: BinaryIO,
+    max_bytes: Optional[int] = None,
+) -> int:
+    """
+    将 stream=True 的响应体分块写入 dest，返回写入的字节数。
+
+    先用 Content-Length 提前拒绝超限文件；服务端未声明长度时按累计字节数中止。
+
+    Raises:
+        DownloadTooLargeError: 文件超过 max_bytes (默认取 max_upload_size_mb)
+    """
+    limit = _max_download_bytes() if max_bytes is None else max_bytes
+    too_large = f"远程文件超过大小限制（{limit // (1024 * 1024)} MB）: {response.url}"
+
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise DownloadTooLargeError(too_large)
+
+    written = 0
+    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+        written += len(chunk)
+        if written > limit:
+            raise DownloadTooLargeError(too_large)
+        dest.write(chunk)
+    return written
+
+
+def stream_download(
+    url: str,
+    dest: BinaryIO,
+    max_bytes: Optional[int] = None,
+    timeout: Optional[Timeout] = None,
+) -> int:
+    """
+    将远程文件分块写入 dest，返回写入的字节数。
+
+    Raises:
+        DownloadTooLargeError: 文件超过 max_bytes (默认取 max_upload_size_mb)
+        requests.HTTPError:    非 2xx 响应
+    """
+    with http_get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        return write_response_body(response, dest, max_bytes)
+
+
+def spool_response(response: requests.Response, max_bytes: Optional[int] = None) -> BinaryIO:
+    """
+    把 stream=True 的响应体写入 SpooledTemporaryFile：小文件留在内存，
+    超过 download_spool_threshold_mb 自动落盘。返回已回到开头的文件对象，调用方负责 close()。
+    """
+    settings = get_settings()
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=settings.download_spool_threshold_mb * 1024 * 1024,
+        dir=settings.temp_dir if _ensure_dir(settings.temp_dir) else None,
+    )
+    try:
+        write_response_body(response, spool, max_bytes)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def download_spooled(
+    url: str,
+    max_bytes: Optional[int] = None,
+    timeout: Optional[Timeout] = None,
+) -> BinaryIO:
+    """流式下载到 SpooledTemporaryFile（见 spool_response），调用方负责 close()"""
+    with http_get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        return spool_response(response, max_bytes)
+
+
+def _ensure_dir(path: str) -> bool:
+    try:
+        os.makedirs(path, exist_ok=True)
+        return True
+    except OSError:
+        return False
+
+
+async def async_http_get(url: str, **kwargs: Any) -> requests.Response:
+    """http_get 的协程版本，在 I/O 线程池中执行"""
+    from app.core.executor import run_io_bound
+    return await run_io_bound(http_get, url, **kwargs)
+
+
+def close_http_session() -> None:
+    """关闭共享 Session（应用退出时调用）"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
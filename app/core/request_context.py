@@ -0,0 +1,30 @@
+"""
+请求级上下文。
+
+路由中间件把按请求生效的选项（如 X-Storage-Backend）写入 contextvars：
+- I/O 线程池由 run_io_bound 复制上下文，天然可见；
+- CPU 进程池无法继承 contextvars，run_cpu_bound 会先 snapshot()，
+  再在子进程中通过 call_with_context() 恢复。
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 本次请求选择的存储后端名称，None 表示使用部署默认值 (Settings.storage_backend)
+storage_backend_var: ContextVar[Optional[str]] = ContextVar("storage_backend", default=None)
+
+
+def snapshot() -> dict[str, Any]:
+    """导出当前请求上下文（可 pickle）"""
+    return {"storage_backend": storage_backend_var.get()}
+
+
+def call_with_context(context: dict[str, Any], func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在子进程中恢复请求上下文后执行 func"""
+    token = storage_backend_var.set(context.get("storage_backend"))
+    try:
+        return func(*args, **kwargs)
+    finally:
+        storage_backend_var.reset(token)
@@ -15,7 +15,14 @@ from fastapi.responses import JSONResponse
 from app.core.error_hints import build_agent_hint, ErrorType
 
 from app.core.config import get_settings
-from app.api.endpoints import excel_routes, doc_routes, vis_routes, pdf_routes, legacy_routes
+from app.core.executor import get_io_executor, shutdown_executors
+from app.core.http_client import close_http_session
+from app.core.request_context import storage_backend_var
+from app.services.storage_backend import STORAGE_BACKENDS
+from app.services.soffice_pool import get_soffice_pool, shutdown_soffice_pool
+from app.api.endpoints import (
+    excel_routes, doc_routes, vis_routes, pdf_routes, task_routes, file_routes, legacy_routes,
+)
 
 # ---------- 日志配置 ----------
 logging.basicConfig(
@@ -33,9 +40,17 @@ async def lifespan(app: FastAPI):
     logger.info(f"🚀 {settings.app_name} 启动中...")
     logger.info(f"   COS Region : {settings.cos_region}")
     logger.info(f"   COS Bucket : {settings.cos_bucket_name}")
+    logger.info(f"   Storage    : {settings.storage_backend}")
     logger.info(f"   API Version: {settings.api_version}")
+    logger.info(f"   I/O Pool   : {settings.io_pool_workers} threads")
+    logger.info(f"   CPU Pool   : {settings.cpu_pool_workers} processes")
+    # 后台预热 LibreOffice 实例，不阻塞启动
+    get_io_executor().submit(get_soffice_pool().warm_up)
     yield
     logger.info("🛑 SGA-Office 正在关闭...")
+    shutdown_soffice_pool()
+    shutdown_executors()
+    close_http_session()
 
 
 # ---------- FastAPI 实例 ----------
@@ -51,7 +66,12 @@ app = FastAPI(
         "- **VIS** (VIS-01~04): Mermaid 流程图、统计图表、QR/条形码、词云\n"
         "- **PDF** (PDF-01~03): Word→PDF、水印/盖章、合并/拆分\n\n"
         "## 响应格式\n"
-        "所有接口统一同步返回 `{code, message, data}` 结构体。"
+        "所有接口统一返回 `{code, message, data}` 结构体。\n"
+        "PDF-01 / EXC-03 / VIS-02 支持 `?async=true`：立即返回 202 与 `task_id`，"
+        "再轮询 `/tasks/{task_id}` 获取结果。\n\n"
+        "## 存储后端\n"
+        "请求头 `X-Storage-Backend: cos | local` 可按请求选择产物存储位置，"
+        "local 后端的文件经 `/files/{key}` 下载（支持 Range）。"
     ),
     version=settings.api_version,
     lifespan=lifespan,
@@ -67,6 +87,31 @@ app.add_middleware(
 )
 
 
+# ---------- 按请求选择存储后端 ----------
+@app.middleware("http")
+async def storage_backend_middleware(request: Request, call_next):
+    """读取 X-Storage-Backend 请求头，写入请求上下文供 service 层使用"""
+    backend = request.headers.get("x-storage-backend")
+    if backend is None:
+        return await call_next(request)
+
+    backend = backend.strip().lower()
+    if backend not in STORAGE_BACKENDS:
+        return JSONResponse(
+            status_code=422,
+            content={
+                "code": 422,
+                "message": f"X-Storage-Backend 取值无效: {backend}（可选: {', '.join(STORAGE_BACKENDS)}）",
+                "data": None,
+            },
+        )
+    token = storage_backend_var.set(backend)
+    try:
+        return await call_next(request)
+    finally:
+        storage_backend_var.reset(token)
+
+
 # ---------- 全局异常处理 ----------
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -114,6 +159,8 @@ app.include_router(doc_routes.router, prefix=API_PREFIX)
 app.include_router(excel_routes.router, prefix=API_PREFIX)
 app.include_router(vis_routes.router, prefix=API_PREFIX)
 app.include_router(pdf_routes.router, prefix=API_PREFIX)
+app.include_router(task_routes.router, prefix=API_PREFIX)
+app.include_router(file_routes.router, prefix=API_PREFIX)
 app.include_router(legacy_routes.router)
 
 
@@ -140,5 +187,6 @@ async def health_check():
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "service": settings.app_name,
+            "soffice_mode": get_soffice_pool().mode,
         },
     }
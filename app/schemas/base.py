@@ -1,6 +1,6 @@
 """
 SGA-Office 统一 API 响应结构定义。
-所有端点均为同步即时响应 (code=200)。
+端点默认同步即时响应 (code=200)；长耗时接口可选异步任务模式 (code=202，见 payload_task)。
 """
 
 from typing import Any, Optional, Generic, TypeVar
@@ -3,6 +3,7 @@ EXC-X 系列接口的请求/响应 Schema 定义。
 面向 Data & Excel Agent 的 MCP 工具契约。
 """
 
+from enum import Enum
 from typing import Optional, Any, Union
 from pydantic import BaseModel, Field, HttpUrl, field_validator
 
@@ -154,6 +155,7 @@ class AppendRowsResult(BaseModel):
     success: bool = Field(..., description="操作是否成功")
     rows_appended: int = Field(..., description="实际追加的行数")
     file_url: str = Field(..., description="更新后的文件云端下载链接")
+    batch_size: int = Field(default=1, description="与本次追加合并为同一次读-改-写的请求数")
 
 
 # ========== EXC-03: 多维报表与公式生成 (Complex Excel) ==========
@@ -236,6 +238,14 @@ class GenerateComplexExcelRequest(BaseModel):
 
 # ========== EXC-04: 命名区域精准解析 (Selective Read) ==========
 
+class ExtractFormat(str, Enum):
+    """EXC-04 结果格式"""
+    ROWS = "rows"
+    COLUMNS = "columns"
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 class ExtractExcelRangeRequest(BaseModel):
     """
     [EXC-04] extract_excel_named_range
@@ -262,6 +272,28 @@ class ExtractExcelRangeRequest(BaseModel):
         description="内容检索关键词。系统将定位包含此关键词的区域并返回上下文。"
                     "与 cell_range 二选一使用。"
     )
+    offset: int = Field(
+        default=0,
+        ge=0,
+        description="跳过的数据行数（不含表头）。"
+    )
+    limit: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100000,
+        description="本页最多返回的数据行数。不填则返回全部；大表建议分页读取。"
+    )
+    cursor: Optional[str] = Field(
+        default=None,
+        max_length=512,
+        description="上一页响应中的 next_cursor（csv 格式为响应头 X-Next-Cursor），原样传回即可读取下一页。"
+                    "提供时忽略 offset，且文件 / Sheet / 区域 / 关键字必须与上一页一致。"
+    )
+    output_format: ExtractFormat = Field(
+        default=ExtractFormat.ROWS,
+        description="结果格式。rows: 按行 JSON；columns: 按列 JSON；"
+                    "csv / ndjson: 流式响应体（ndjson 末行为分页信息）。"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -270,6 +302,12 @@ class ExtractExcelRangeRequest(BaseModel):
                     "source_excel_url": "https://cos.example.com/excel/财报总表.xlsx",
                     "sheet_name": "Sheet2",
                     "cell_range": "A1:E20"
+                },
+                {
+                    "source_excel_url": "https://cos.example.com/excel/总账.xlsx",
+                    "sheet_name": "明细",
+                    "limit": 1000,
+                    "output_format": "columns"
                 }
             ]
         }
@@ -280,5 +318,187 @@ class ExtractExcelRangeResult(BaseModel):
     """EXC-04 响应数据"""
     sheet_name: str = Field(..., description="实际读取的 Sheet 名称")
     headers: list[str] = Field(..., description="提取区域的表头")
-    data: list[list[Any]] = Field(..., description="提取的扁平化数据行")
-    total_rows: int = Field(..., description="提取的总行数")
+    data: Optional[list[list[Any]]] = Field(default=None, description="提取的扁平化数据行（rows 格式）")
+    columns: Optional[list[list[Any]]] = Field(default=None, description="按列组织的数据，与 headers 一一对应（columns 格式）")
+    total_rows: int = Field(..., description="本次返回的数据行数")
+    offset: int = Field(default=0, description="本页第一行在提取区域中的序号（从 0 开始，不含表头）")
+    has_more: bool = Field(default=False, description="是否还有下一页")
+    next_cursor: Optional[str] = Field(default=None, description="下一页游标，没有下一页时为 null")
+
+
+# ========== EXC-04: 多区域提取 ==========
+
+class RangeSpec(BaseModel):
+    """多区域提取中的一个区域，cell_range / keyword / defined_name 三选一"""
+    key: str = Field(..., min_length=1, max_length=100, description="结果映射中的键，同一请求内唯一")
+    sheet_name: Optional[str] = Field(
+        default=None,
+        max_length=31,
+        description="该区域所在的 Sheet；不填使用请求级 sheet_name。定义名称自带 Sheet 时忽略。"
+    )
+    cell_range: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Z]{1,3}\d+:[A-Z]{1,3}\d+$",
+        description="单元格区间，例如 'A1:D10'；单个单元格写作 'B3:B3'。"
+    )
+    keyword: Optional[str] = Field(
+        default=None,
+        max_length=200,
+        description="以包含此关键词的行作为表头，读取其下连续的数据行。"
+    )
+    defined_name: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="工作簿中的定义名称（命名区域 / 命名单元格）。"
+    )
+    limit: Optional[int] = Field(default=None, ge=1, le=100000, description="该区域最多返回的数据行数。")
+
+
+class ExtractExcelRangesRequest(BaseModel):
+    """
+    [EXC-04] 多区域提取
+    一次请求从同一工作簿读取多个区域（单元格区间 / 关键字区域 / 定义名称），
+    文件只下载、解析一次，结果按 key 返回。
+    """
+    source_excel_url: HttpUrl = Field(..., description="云端 .xlsx 文件的可下载链接。")
+    sheet_name: str = Field(default="Sheet1", max_length=31, description="区域未指定 sheet_name 时使用的 Sheet。")
+    ranges: list[RangeSpec] = Field(..., min_length=1, max_length=50, description="要提取的区域列表。")
+
+    @field_validator("ranges")
+    @classmethod
+    def validate_ranges(cls, v):
+        """key 唯一，且每个区域恰好指定 cell_range / keyword / defined_name 之一"""
+        seen = set()
+        for i, spec in enumerate(v):
+            if spec.key in seen:
+                raise ValueError(f"ranges[{i}].key '{spec.key}' 重复，每个区域的 key 必须唯一。")
+            seen.add(spec.key)
+            given = [spec.cell_range, spec.keyword, spec.defined_name]
+            if sum(item is not None for item in given) != 1:
+                raise ValueError(f"ranges[{i}] 必须且只能指定 cell_range、keyword、defined_name 其中之一。")
+        return v
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "source_excel_url": "https://cos.example.com/excel/月度经营报表.xlsx",
+                    "sheet_name": "明细",
+                    "ranges": [
+                        {"key": "summary", "keyword": "区域汇总"},
+                        {"key": "detail", "cell_range": "A12:H200", "limit": 100},
+                        {"key": "total", "defined_name": "营收合计"},
+                        {"key": "period", "sheet_name": "封面", "cell_range": "B3:B3"}
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class ExtractedRange(BaseModel):
+    """多区域提取中一个区域的结果"""
+    sheet_name: str = Field(..., description="区域所在的 Sheet")
+    ref: Optional[str] = Field(default=None, description="实际读取的单元格区间；关键字未命中时为 null")
+    headers: list[str] = Field(..., description="区域表头（首行）；单个单元格时为空")
+    data: list[list[Any]] = Field(..., description="数据行")
+    total_rows: int = Field(..., description="返回的数据行数")
+    has_more: bool = Field(default=False, description="是否因 limit 截断")
+    value: Any = Field(default=None, description="区域为单个单元格时的值")
+
+
+class ExtractExcelRangesResult(BaseModel):
+    """EXC-04 多区域提取响应数据"""
+    results: dict[str, ExtractedRange] = Field(..., description="按 key 组织的各区域结果，顺序与请求一致")
+
+
+# ========== EXC-04: 查询下推 (投影 / 过滤 / 分组聚合) ==========
+
+class QueryOperator(str, Enum):
+    """过滤运算符"""
+    EQ = "eq"
+    NE = "ne"
+    GT = "gt"
+    GTE = "gte"
+    LT = "lt"
+    LTE = "lte"
+    CONTAINS = "contains"
+    IN = "in"
+    IS_NULL = "is_null"
+    NOT_NULL = "not_null"
+
+
+class AggregateFunc(str, Enum):
+    """聚合函数"""
+    SUM = "sum"
+    COUNT = "count"
+    AVG = "avg"
+    MIN = "min"
+    MAX = "max"
+
+
+class QueryPredicate(BaseModel):
+    """行过滤条件"""
+    column: str = Field(..., description="表头名称（或相对区域首列的列字母）")
+    op: QueryOperator = Field(default=QueryOperator.EQ, description="比较运算符")
+    value: Any = Field(default=None, description="比较值，除 is_null / not_null 外必填；in 运算符为数组")
+
+
+class QueryAggregate(BaseModel):
+    """聚合列"""
+    func: AggregateFunc = Field(..., description="聚合函数: sum / count / avg / min / max")
+    column: Optional[str] = Field(default=None, description="聚合的列；count 不指定时统计行数")
+    alias: Optional[str] = Field(default=None, max_length=100, description="结果列名，默认为 'func(column)'")
+
+
+class ExcelQueryRequest(BaseModel):
+    """
+    [EXC-04] 查询下推
+    在服务端对远程 Excel 的数据区域执行 列投影 / 行过滤 / 分组聚合，只返回结果，
+    避免把整张表拉回 Agent 上下文再计算。
+    """
+    source_excel_url: HttpUrl = Field(..., description="云端 .xlsx 文件的可下载链接。")
+    sheet_name: str = Field(default="Sheet1", max_length=31, description="目标 Sheet 页签名称。")
+    cell_range: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Z]{1,3}\d+:[A-Z]{1,3}\d+$",
+        description="数据区域（首行为表头），例如 'A1:H5000'。不填则为整张表。"
+    )
+    keyword: Optional[str] = Field(
+        default=None,
+        max_length=200,
+        description="以包含此关键词的行作为表头，读取其下连续的数据行。与 cell_range 二选一。"
+    )
+    select: Optional[list[str]] = Field(default=None, description="返回的列；不填返回全部列。不能与聚合同时使用。")
+    where: Optional[list[QueryPredicate]] = Field(default=None, description="过滤条件，多个条件之间为 AND。")
+    group_by: Optional[list[str]] = Field(default=None, description="分组列。")
+    aggregates: Optional[list[QueryAggregate]] = Field(default=None, description="聚合列。")
+    limit: Optional[int] = Field(default=None, ge=1, description="最多返回的结果行数（受服务端上限约束）。")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "source_excel_url": "https://cos.example.com/excel/总账.xlsx",
+                    "sheet_name": "明细",
+                    "where": [{"column": "日期", "op": "gte", "value": "2024-01-01"}],
+                    "group_by": ["区域"],
+                    "aggregates": [
+                        {"func": "sum", "column": "金额", "alias": "总金额"},
+                        {"func": "count"}
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class ExcelQueryResult(BaseModel):
+    """EXC-04 查询下推响应数据"""
+    sheet_name: str = Field(..., description="实际读取的 Sheet 名称")
+    columns: list[str] = Field(..., description="结果列名")
+    column_types: list[str] = Field(..., description="结果列类型: number / datetime / string / boolean / mixed / empty")
+    rows: list[list[Any]] = Field(..., description="结果行")
+    total_rows: int = Field(..., description="返回的结果行数")
+    scanned_rows: int = Field(..., description="实际读取的数据行数")
+    truncated: bool = Field(..., description="结果是否因行数上限被截断")
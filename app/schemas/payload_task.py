@@ -0,0 +1,32 @@
+"""
+异步任务模式（模式 B）的响应 Schema 定义。
+长耗时接口带 ?async=true 调用时返回 202 + task_id，Agent 轮询 status_url 获取结果。
+"""
+
+from typing import Optional, Any
+from pydantic import BaseModel, Field
+
+
+class TaskSubmittedResult(BaseModel):
+    """202 Accepted 响应数据"""
+    task_id: str = Field(..., description="后台任务 ID")
+    status_url: str = Field(..., description="任务状态轮询地址。Agent 建议间隔 2~5 秒轮询一次。")
+
+
+class TaskStatusResult(BaseModel):
+    """任务状态查询响应数据"""
+    task_id: str = Field(..., description="后台任务 ID")
+    kind: str = Field(..., description="任务类别，如 PDF-01 / EXC-03 / VIS-02")
+    status: str = Field(..., description="任务状态: queued / running / succeeded / failed")
+    result: Optional[dict[str, Any]] = Field(
+        default=None,
+        description="任务成功时的结果数据，结构与同步调用的 data 字段一致。",
+    )
+    result_url: Optional[str] = Field(default=None, description="任务成功时生成文件的云端 URL（即 result.file_url）")
+    error: Optional[str] = Field(
+        default=None,
+        description="任务失败原因。error_code=422 表示入参问题，Agent 应修正入参后重新提交。",
+    )
+    error_code: Optional[int] = Field(default=None, description="失败时对应的 HTTP 语义状态码 (422 / 500)")
+    created_at: str = Field(..., description="任务创建时间 (ISO 8601)")
+    updated_at: str = Field(..., description="最近一次状态变更时间 (ISO 8601)")
@@ -0,0 +1,160 @@
+"""
+EXC-02 追加请求合并（write-combining）。
+
+多个 Agent 向同一份共享日志表追加行时，每次调用各自 下载 → 追加 → 上传，
+并发调用会得到各自只含本次新增行的文件，彼此的更新互相丢失。本模块按源 URL 合并：
+
+- 合并键为 (请求上下文, 源 URL)：选择不同存储后端（X-Storage-Backend）的请求不会合并，
+  批次在该组请求自己的上下文中执行，结果只上传到调用方选择的后端；
+- 同一键的追加在 excel_append_batch_window_ms 窗口内到达的，合并为一次读-改-写，
+  所有调用方拿到同一个结果 URL；
+- 同一键的批次串行执行，前一批执行期间到达的请求排队，前一批完成后立即作为下一批执行；
+  链上每批以上一批的结果文件为源，期间传入该链某次结果 URL 的请求也并入这条链；
+- 链在没有排队请求时结束并忘记链头：之后的调用按调用方传入的 URL 原样追加；
+- 合并批次失败时逐个重试，一个请求的非法数据不连累同批的其他请求。
+
+状态保存在当前进程的事件循环中：多 worker 部署时只合并落到同一 worker 的请求。
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.core.config import get_settings
+from app.core.request_context import snapshot
+
+logger = logging.getLogger(__name__)
+
+# apply(源 URL, [(sheet_name, rows)]) → 结果文件 URL
+ApplyAppends = Callable[[str, list[tuple[str, list[list[Any]]]]], Awaitable[str]]
+
+# (请求上下文, 源 URL)
+ChainKey = tuple[Hashable, str]
+
+
+class _PendingAppend:
+    __slots__ = ("sheet_name", "rows", "future")
+
+    def __init__(self, sheet_name: str, rows: list[list[Any]], future: asyncio.Future):
+        self.sheet_name = sheet_name
+        self.rows = rows
+        self.future = future
+
+
+class AppendCombiner:
+    """按源 URL 合并、串行化 EXC-02 追加；只在单个事件循环内使用"""
+
+    def __init__(self, window_seconds: float = 0.05):
+        self.window_seconds = window_seconds
+        self._pending: dict[ChainKey, list[_PendingAppend]] = {}
+        self._draining: set[ChainKey] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._heads: dict[ChainKey, str] = {}           # 进行中的链 → 最新结果 URL
+        self._aliases: dict[ChainKey, ChainKey] = {}    # 进行中的链上 (上下文, 结果 URL) → 链键
+        self._counters = {"requests": 0, "batches": 0, "retries": 0}
+
+    async def submit(
+        self,
+        source_url: str,
+        sheet_name: str,
+        rows: list[list[Any]],
+        apply: ApplyAppends,
+    ) -> dict[str, Any]:
+        """
+        提交一次追加，等待所在批次完成。
+
+        Returns:
+            dict: {"file_url", "batch_size"}
+        """
+        context = tuple(sorted(snapshot().items()))
+        key = self._aliases.get((context, source_url), (context, source_url))
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, []).append(_PendingAppend(sheet_name, rows, future))
+        self._counters["requests"] += 1
+        if key not in self._draining:
+            self._draining.add(key)
+            # 任务复制当前上下文：同一键的请求上下文相同，批次在其中执行
+            task = asyncio.create_task(self._drain(key, apply))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await future
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._counters, "chains": len(self._draining)}
+
+    # ---------- 内部 ----------
+
+    async def _drain(self, key: ChainKey, apply: ApplyAppends) -> None:
+        """依次执行该键的批次，直到没有排队的请求；结束时丢弃链头与别名"""
+        try:
+            # 收集窗口：只在链空闲后的第一批等待；之后的批次在前一批执行期间已完成排队
+            await asyncio.sleep(self.window_seconds)
+            while self._pending.get(key):
+                batch = self._pending.pop(key)
+                await self._apply_batch(key, batch, apply)
+        finally:
+            self._draining.discard(key)
+            self._heads.pop(key, None)
+            for alias in [alias for alias, target in self._aliases.items() if target == key]:
+                del self._aliases[alias]
+
+    async def _apply_batch(self, key: ChainKey, batch: list[_PendingAppend], apply: ApplyAppends) -> None:
+        batch = [item for item in batch if not item.future.done()]  # 调用方已取消的不再追加
+        if not batch:
+            return
+        try:
+            file_url = await apply(self._heads.get(key, key[1]), [(item.sheet_name, item.rows) for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return
+            logger.warning(f"EXC-02 合并追加失败，逐个重试 {len(batch)} 个请求: {e}")
+            self._counters["retries"] += 1
+            for item in batch:
+                await self._apply_batch(key, [item], apply)
+            return
+
+        self._counters["batches"] += 1
+        self._advance(key, file_url)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result({"file_url": file_url, "batch_size": len(batch)})
+
+    def _advance(self, key: ChainKey, file_url: str) -> None:
+        """记录链头，并让结果 URL 在链结束前作为同一条链的别名"""
+        self._heads[key] = file_url
+        self._aliases[(key[0], file_url)] = key
+
+
+async def combined_append(
+    source_url: str,
+    sheet_name: str,
+    rows: list[list[Any]],
+    apply: ApplyAppends,
+) -> dict[str, Any]:
+    """
+    路由层使用的包装：启用合并时经 AppendCombiner 提交，否则直接执行一次读-改-写。
+
+    Returns:
+        dict: {"file_url", "batch_size"}
+    """
+    combiner = get_append_combiner()
+    if combiner is None:
+        return {"file_url": await apply(source_url, [(sheet_name, rows)]), "batch_size": 1}
+    return await combiner.submit(source_url, sheet_name, rows, apply)
+
+
+# 模块级单例 (惰性初始化；只在事件循环线程中访问)
+_append_combiner: AppendCombiner | None = None
+
+
+def get_append_combiner() -> Optional[AppendCombiner]:
+    """获取追加合并器单例，未启用时返回 None"""
+    global _append_combiner
+    settings = get_settings()
+    if not settings.excel_append_combine_enabled:
+        return None
+    if _append_combiner is None:
+        _append_combiner = AppendCombiner(window_seconds=settings.excel_append_batch_window_ms / 1000)
+    return _append_combiner
@@ -1,24 +1,30 @@
 """
-COS 云对象存储服务封装。
-所有文件的上传/下载都通过此模块统一处理，彻底剥离对宿主机本地文件系统的依赖。
+COS 云对象存储服务封装（存储后端 "cos"）。
+所有文件的上传/下载都通过存储后端统一处理，彻底剥离对宿主机本地文件系统的依赖。
 """
 
 import os
-import uuid
-import tempfile
+import time
+import logging
+import threading
 from io import BytesIO
-from datetime import datetime
-from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Union
+from urllib.parse import unquote
 
-import requests
 from qcloud_cos import CosConfig, CosS3Client
 
 from app.core.config import get_settings
+from app.services.storage_backend import StorageBackend, UploadData, get_storage_backend, guess_content_type
 
+logger = logging.getLogger(__name__)
 
-class CosStorageService:
+
+class CosStorageService(StorageBackend):
     """腾讯云 COS 对象存储操作封装"""
 
+    name = "cos"
+
     def __init__(self):
         settings = get_settings()
         self._config = CosConfig(
@@ -34,22 +40,91 @@ class CosStorageService:
     def base_url(self) -> str:
         return f"https://{self._bucket}.cos.{self._region}.myqcloud.com"
 
-    def upload_bytes(self, data: bytes, cos_key: str) -> str:
+    def upload_bytes(self, data: UploadData, cos_key: str) -> str:
         """
-        上传字节流到 COS。
+        上传内存数据到 COS。
+        超过 upload_multipart_threshold_mb 时改用分片上传，分片并发发送、单片失败单独重试。
         Args:
-            data: 文件字节内容
+            data: bytes / memoryview，或可 seek 的文件对象 (如 service 返回的 BytesIO，无需 getvalue)
             cos_key: COS 路径键名 (如 'documents/报告_20250221.docx')
         Returns:
             文件的公网访问 URL
         """
-        stream = BytesIO(data)
-        self._client.put_object(
-            Bucket=self._bucket,
-            Body=stream,
-            Key=cos_key,
-        )
-        return f"{self.base_url}/{quote(cos_key)}"
+        settings = get_settings()
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            size = memoryview(data).nbytes
+        else:
+            size = data.seek(0, os.SEEK_END)
+            data.seek(0)
+
+        if size < settings.upload_multipart_threshold_mb * 1024 * 1024:
+            if isinstance(data, (bytearray, memoryview)):
+                data = bytes(data)  # 小文件，拷贝一次无妨
+            self._client.put_object(
+                Bucket=self._bucket,
+                Body=data,
+                Key=cos_key,
+                ContentType=guess_content_type(cos_key),
+            )
+        else:
+            if isinstance(data, BytesIO):
+                data = data.getbuffer()  # 零拷贝视图，分片直接切片
+            elif isinstance(data, (bytes, bytearray)):
+                data = memoryview(data)
+            self._upload_multipart(data, size, cos_key)
+        return self.url_for(cos_key)
+
+    def _upload_multipart(self, data: Union[memoryview, BinaryIO], size: int, cos_key: str) -> None:
+        """分片上传：按 upload_part_size_mb 切片，upload_part_concurrency 个线程并发发送"""
+        settings = get_settings()
+        part_size = max(1, settings.upload_part_size_mb) * 1024 * 1024
+        offsets = list(range(0, size, part_size))
+        read_lock = threading.Lock()
+
+        def read_part(offset: int) -> bytes:
+            length = min(part_size, size - offset)
+            if isinstance(data, memoryview):
+                return data[offset:offset + length].tobytes()
+            # 普通文件对象不能并发读取：加锁定位后读出本片
+            with read_lock:
+                data.seek(offset)
+                return data.read(length)
+
+        def upload_part(part_number: int, offset: int) -> dict[str, object]:
+            body = read_part(offset)
+            attempts = max(1, settings.upload_part_retries + 1)
+            for attempt in range(1, attempts + 1):
+                try:
+                    resp = self._client.upload_part(
+                        Bucket=self._bucket,
+                        Key=cos_key,
+                        Body=body,
+                        PartNumber=part_number,
+                        UploadId=upload_id,
+                    )
+                    return {"PartNumber": part_number, "ETag": resp["ETag"]}
+                except Exception as e:
+                    if attempt == attempts:
+                        raise
+                    logger.warning(f"分片 {part_number} 上传失败（第 {attempt} 次），重试: {e}")
+                    time.sleep(0.5 * 2 ** (attempt - 1))
+
+        upload_id = self._client.create_multipart_upload(
+            Bucket=self._bucket, Key=cos_key, ContentType=guess_content_type(cos_key),
+        )["UploadId"]
+        try:
+            workers = max(1, min(settings.upload_part_concurrency, len(offsets)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sga-upload") as pool:
+                parts = list(pool.map(upload_part, range(1, len(offsets) + 1), offsets))
+            self._client.complete_multipart_upload(
+                Bucket=self._bucket,
+                Key=cos_key,
+                UploadId=upload_id,
+                MultipartUpload={"Part": parts},
+            )
+        except Exception:
+            self._client.abort_multipart_upload(Bucket=self._bucket, Key=cos_key, UploadId=upload_id)
+            raise
 
     def upload_file(self, local_path: str, cos_key: str) -> str:
         """
@@ -60,70 +135,32 @@ class CosStorageService:
         Returns:
             文件的公网访问 URL
         """
+        settings = get_settings()
         self._client.upload_file(
             Bucket=self._bucket,
             LocalFilePath=local_path,
             Key=cos_key,
+            ContentType=guess_content_type(cos_key),
+            PartSize=max(1, settings.upload_part_size_mb),
+            MAXThread=max(1, settings.upload_part_concurrency),
         )
-        return f"{self.base_url}/{quote(cos_key)}"
+        return self.url_for(cos_key)
 
-    def download_to_bytes(self, url: str) -> bytes:
+    def exists(self, file_url: str) -> bool:
         """
-        从 URL 下载文件到内存。支持 COS 内部链接和任意外部 URL。
-        Args:
-            url: 文件的可下载链接
-        Returns:
-            文件字节内容
+        判断已上传的文件是否仍然存在。
+        本桶内的文件走 HEAD Object；外部 URL 发 HEAD 请求，仅 404/410 视为不存在。
         """
-        response = requests.get(
-            url,
-            timeout=60,
-            headers={
-                "User-Agent": "SGA-Office/1.0 (Agent-First File Processor)"
-            },
-        )
-        response.raise_for_status()
-        return response.content
-
-    def download_to_tempfile(self, url: str, suffix: str = "") -> str:
-        """
-        从 URL 下载文件到临时文件。
-        Args:
-            url: 文件的可下载链接
-            suffix: 临时文件后缀 (如 '.docx')
-        Returns:
-            临时文件的本地路径 (调用方需负责清理)
-        """
-        data = self.download_to_bytes(url)
-        fd, temp_path = tempfile.mkstemp(suffix=suffix)
-        try:
-            os.write(fd, data)
-        finally:
-            os.close(fd)
-        return temp_path
-
-    @staticmethod
-    def generate_cos_key(prefix: str, filename: str, ext: str) -> str:
-        """
-        生成标准化的 COS 存储路径。
-        格式: {prefix}/{清理后文件名}_{日期}_{短UUID}.{ext}
-        """
-        import re
-        clean_name = re.sub(r'[\\/:*?"<>|\s]', '', filename)[:30]
-        if not clean_name:
-            clean_name = "unnamed"
-        date_str = datetime.now().strftime("%Y%m%d")
-        short_id = uuid.uuid4().hex[:8]
-        return f"{prefix}/{clean_name}_{date_str}_{short_id}.{ext}"
-
-
-# 模块级单例 (惰性初始化)
-_cos_service: CosStorageService | None = None
-
-
-def get_cos_service() -> CosStorageService:
-    """获取 COS 服务单例"""
-    global _cos_service
-    if _cos_service is None:
-        _cos_service = CosStorageService()
-    return _cos_service
+        prefix = f"{self.base_url}/"
+        if file_url.startswith(prefix):
+            key = unquote(file_url[len(prefix):])
+            return self._client.object_exists(Bucket=self._bucket, Key=key)
+        return self._remote_exists(file_url)
+
+
+def get_cos_service() -> StorageBackend:
+    """
+    获取当前生效的存储后端单例。
+    默认为 COS；可按部署 (STORAGE_BACKEND) 或按请求 (X-Storage-Backend) 切换为本地磁盘。
+    """
+    return get_storage_backend()
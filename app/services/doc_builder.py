@@ -5,21 +5,30 @@ DOC-X 系列核心业务引擎。
 """
 
 import re
+import copy
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from io import BytesIO
-from typing import Optional, Any
+from typing import Optional, Any, Union
 
 import yaml
 import mistune
 import requests
-from PIL import Image
 from docx import Document
-from docx.shared import Pt, Cm, RGBColor
+from docx.shared import Pt, Cm, Emu, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml.ns import qn, nsdecls
+from docx.oxml import OxmlElement, parse_xml
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.part import Part
+from lxml.etree import SubElement
 
+from app.core.config import get_settings
 from app.core.themes import Theme, get_theme
+from app.services.docx_styles import REFERENCED_STYLES, TABLE_STYLE_ID, apply_theme_styles
+from app.services.image_transcode import transcode_image
+from app.services.source_cache import open_source
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +68,7 @@ def _parse_frontmatter(markdown_content: str) -> tuple[dict | None, str]:
 # =====================================================
 
 def _setup_page(doc: Document) -> None:
-    """A4 页面与全局字体设置。"""
+    """A4 页面与正文段落设置（字体见 docx_styles）。"""
     section = doc.sections[0]
     section.page_height = Cm(29.7)
     section.page_width = Cm(21)
@@ -69,13 +78,109 @@ def _setup_page(doc: Document) -> None:
     section.right_margin = Cm(2.8)
 
     style = doc.styles['Normal']
-    style.font.name = '宋体'
-    style._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
     style.font.size = Pt(12)
     style.paragraph_format.line_spacing = Pt(25)
     style.paragraph_format.first_line_indent = Cm(0.74)
 
 
+# =====================================================
+#  基础文档缓存
+# =====================================================
+
+_RT_STYLES_WITH_EFFECTS = "http://schemas.microsoft.com/office/2007/relationships/stylesWithEffects"
+# 渲染器引用的样式（styles.xml 中的名称）；其余内置样式不写入基础文档
+_BASE_STYLE_NAMES = frozenset(('Normal', 'No Spacing', 'List Bullet', 'List Number') + REFERENCED_STYLES)
+
+
+def _prune_styles(doc: Document) -> None:
+    """
+    只保留渲染器与编号定义引用的样式、其 basedOn/link/next 依赖和各类默认样式。
+    python-docx 默认模板带 164 个样式（9000+ 个 XML 元素），每次克隆、按名称查找样式、保存都要遍历。
+    """
+    styles = doc.styles.element
+    by_id = {s.get(qn('w:styleId')): s for s in styles.findall(qn('w:style'))}
+    pending = [
+        style_id for style_id, s in by_id.items()
+        if s.get(qn('w:default')) == '1' or s.find(qn('w:name')).get(qn('w:val')) in _BASE_STYLE_NAMES
+    ]
+    # numbering.xml 中各级列表引用的段落样式
+    numbering = doc.part.numbering_part.element
+    pending.extend(ref.get(qn('w:val')) for ref in numbering.iter(qn('w:pStyle')))
+    keep = set()
+    while pending:
+        style_id = pending.pop()
+        if style_id in keep or style_id not in by_id:
+            continue
+        keep.add(style_id)
+        for tag in ('w:basedOn', 'w:link', 'w:next'):
+            ref = by_id[style_id].find(qn(tag))
+            if ref is not None:
+                pending.append(ref.get(qn('w:val')))
+    for style_id, s in by_id.items():
+        if style_id not in keep:
+            styles.remove(s)
+
+
+def _drop_unused_parts(doc: Document) -> None:
+    """去掉默认模板中与渲染无关的部件：Word 2010 兼容样式副本（430KB）与缩略图。"""
+    for r_id, rel in list(doc.part.rels.items()):
+        if rel.reltype == _RT_STYLES_WITH_EFFECTS:
+            doc.part.drop_rel(r_id)
+    package_rels = doc.part.package.rels
+    for r_id, rel in list(package_rels.items()):
+        if rel.reltype == RT.THUMBNAIL:
+            package_rels.pop(r_id)
+
+
+class _BaseDocument:
+    """按主题预先准备好的基础文档（页面设置 + 主题样式）；clone() 深拷贝 XML 部件，只读的二进制部件直接共享"""
+
+    def __init__(self, theme: Theme):
+        doc = Document()
+        _setup_page(doc)
+        _prune_styles(doc)
+        apply_theme_styles(doc, theme)
+        _drop_unused_parts(doc)
+        self.doc = doc
+        self._shared = {id(part): part for part in doc.part.package.iter_parts() if type(part) is Part}
+
+    def clone(self) -> Document:
+        return copy.deepcopy(self.doc, dict(self._shared))
+
+
+_base_documents: dict[Theme, _BaseDocument] = {}
+_base_lock = threading.Lock()
+
+
+def _new_document(theme: Theme) -> Document:
+    """从该主题的基础文档克隆一份新文档（首次使用时构建并缓存）"""
+    base = _base_documents.get(theme)
+    if base is None:
+        with _base_lock:
+            base = _base_documents.get(theme)
+            if base is None:
+                base = _base_documents[theme] = _BaseDocument(theme)
+    return base.clone()
+
+
+# =====================================================
+#  域代码
+# =====================================================
+
+_FIELD_BEGIN = parse_xml(f'<w:r {nsdecls("w")}><w:fldChar w:fldCharType="begin"/></w:r>')
+_FIELD_INSTR = parse_xml(f'<w:r {nsdecls("w")}><w:instrText xml:space="preserve"/></w:r>')
+_FIELD_END = parse_xml(f'<w:r {nsdecls("w")}><w:fldChar w:fldCharType="end"/></w:r>')
+
+
+def _append_field(paragraph, instr: str) -> None:
+    """在段落末尾追加域代码（begin / instrText / end 三个 run，Word 打开时计算）。"""
+    begin, code, end = (copy.deepcopy(e) for e in (_FIELD_BEGIN, _FIELD_INSTR, _FIELD_END))
+    code[0].text = instr
+    paragraph._p.append(begin)
+    paragraph._p.append(code)
+    paragraph._p.append(end)
+
+
 # =====================================================
 #  封面页
 # =====================================================
@@ -158,21 +263,7 @@ def _add_header_footer(doc: Document, config: dict) -> None:
 
         if footer_type in ("page_number", "both"):
             # 插入页码域代码
-            run = fp.add_run()
-            fldChar1 = OxmlElement('w:fldChar')
-            fldChar1.set(qn('w:fldCharType'), 'begin')
-            run._element.append(fldChar1)
-
-            run2 = fp.add_run()
-            instrText = OxmlElement('w:instrText')
-            instrText.set(qn('xml:space'), 'preserve')
-            instrText.text = ' PAGE '
-            run2._element.append(instrText)
-
-            run3 = fp.add_run()
-            fldChar2 = OxmlElement('w:fldChar')
-            fldChar2.set(qn('w:fldCharType'), 'end')
-            run3._element.append(fldChar2)
+            _append_field(fp, ' PAGE ')
 
         if footer_type in ("custom_text", "both"):
             footer_text_val = config.get("footer_text", "")
@@ -191,21 +282,7 @@ def _add_toc(doc: Document) -> None:
     toc_title.style = doc.styles['Heading 1']
 
     paragraph = doc.add_paragraph()
-    run = paragraph.add_run()
-    fldChar1 = OxmlElement('w:fldChar')
-    fldChar1.set(qn('w:fldCharType'), 'begin')
-    run._element.append(fldChar1)
-
-    run2 = paragraph.add_run()
-    instrText = OxmlElement('w:instrText')
-    instrText.set(qn('xml:space'), 'preserve')
-    instrText.text = ' TOC \\o "1-3" \\h \\z \\u '
-    run2._element.append(instrText)
-
-    run3 = paragraph.add_run()
-    fldChar2 = OxmlElement('w:fldChar')
-    fldChar2.set(qn('w:fldCharType'), 'end')
-    run3._element.append(fldChar2)
+    _append_field(paragraph, ' TOC \\o "1-3" \\h \\z \\u ')
 
     doc.add_page_break()
 
@@ -258,35 +335,123 @@ def _render_callout_box(doc: Document, callout_type: str, lines: list[str], them
     doc.add_paragraph()
 
 
+# =====================================================
+#  图片预取
+# =====================================================
+
+_IMAGE_FETCH_TIMEOUT = 30  # 单张图片的下载超时(秒)
+
+# URL → 图片字节，或下载失败时的异常
+PrefetchedImages = dict[str, Union[bytes, Exception]]
+
+
+def _fetch_image(url: str, timeout: float) -> bytes:
+    with open_source(url, timeout=timeout) as f:
+        return f.read()
+
+
+_prefetch_lock = threading.Lock()
+_prefetch_executor: ThreadPoolExecutor | None = None
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    """
+    获取图片下载线程池单例（惰性创建）。
+    进程内所有并发渲染共用，同时进行的下载数不超过 docx_image_prefetch_workers。
+    """
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        with _prefetch_lock:
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(
+                    max_workers=max(1, get_settings().docx_image_prefetch_workers),
+                    thread_name_prefix="sga-docx-image",
+                )
+    return _prefetch_executor
+
+
+def _prefetch_images(urls: list[str]) -> PrefetchedImages:
+    """
+    在共用的下载线程池中并发下载全部图片，整篇文档共用一个截止时间。
+    截止时仍未完成的图片记为 TimeoutError，渲染时输出下载失败占位。
+    """
+    settings = get_settings()
+    if not urls or settings.docx_image_prefetch_workers <= 0:
+        return {}
+
+    deadline = settings.docx_image_prefetch_timeout_seconds
+    timeout = min(_IMAGE_FETCH_TIMEOUT, deadline)
+    pool = _get_prefetch_executor()
+    futures = {url: pool.submit(_fetch_image, url, timeout) for url in urls}
+    wait(futures.values(), timeout=deadline)
+    # 不等待超时未完成的下载：排队中的取消，进行中的由各自的请求超时结束
+    for future in futures.values():
+        future.cancel()
+
+    images: PrefetchedImages = {}
+    for url, future in futures.items():
+        if not future.done() or future.cancelled():
+            images[url] = TimeoutError(f"超过 {deadline:g} 秒未完成")
+        elif future.exception() is not None:
+            images[url] = future.exception()
+        else:
+            images[url] = future.result()
+    return images
+
+
 # =====================================================
 #  MarkdownToDocx 渲染器 (从 main.py 迁移)
 # =====================================================
 
+# 表格与行内样式（样式 ID，见 docx_styles）
+_TABLE_LOOK = {
+    qn('w:firstColumn'): '1', qn('w:firstRow'): '1', qn('w:lastColumn'): '0',
+    qn('w:lastRow'): '0', qn('w:noHBand'): '0', qn('w:noVBand'): '1', qn('w:val'): '04A0',
+}
+_INLINE_STYLES = {'strong': 'Strong', 'emphasis': 'Emphasis'}
+_RUN_BREAK_CHARS = re.compile(r'[\t\n\r]')
+_W_R, _W_RPR, _W_RSTYLE, _W_T, _W_VAL = qn('w:r'), qn('w:rPr'), qn('w:rStyle'), qn('w:t'), qn('w:val')
+_XML_SPACE = qn('xml:space')
+
+
 class MarkdownToDocx:
     """将 mistune 3.x AST 渲染为 python-docx Document"""
 
-    def __init__(self, doc: Document, theme: Theme | None = None):
+    def __init__(self, doc: Document, theme: Theme | None = None, images: PrefetchedImages | None = None):
         self.doc = doc
         self.theme = theme or get_theme()
-        self.table = None
-        self.row = None
-        self.cell = None
+        self.images = images or {}  # 预取的图片；未预取的 URL 在渲染时下载
         self.list_style = None
 
-    def set_font(self, run, bold=False, italic=False):
-        run.font.name = '宋体'
-        run._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
-        run.font.name = 'Times New Roman'
-        run._element.rPr.rFonts.set(qn('w:ascii'), 'Times New Roman')
-        if bold:
-            run.bold = True
-        if italic:
-            run.italic = True
-
     def render(self, ast):
         for node in ast:
             self.dispatch(node)
 
+    @classmethod
+    def collect_image_urls(cls, ast) -> list[str]:
+        """
+        按出现顺序收集渲染时会插入的图片 URL（去重），供渲染前预取。
+        与 dispatch 的遍历一致：独占一个段落的图片被渲染，只深入没有专门 visit_ 方法的节点。
+        """
+        urls: dict[str, None] = {}
+
+        def walk(nodes):
+            for node in nodes:
+                kind = node.get('type')
+                children = node.get('children') or []
+                if kind == 'paragraph' and len(children) == 1 and children[0]['type'] == 'image':
+                    node = children[0]
+                    kind = 'image'
+                if kind == 'image':
+                    url = node.get('attrs', {}).get('url', '')
+                    if url:
+                        urls[url] = None
+                elif not hasattr(cls, f"visit_{kind}"):
+                    walk(children)
+
+        walk(ast)
+        return list(urls)
+
     def dispatch(self, node):
         method_name = f"visit_{node['type']}"
         method = getattr(self, method_name, self.visit_unknown)
@@ -300,15 +465,8 @@ class MarkdownToDocx:
     def visit_heading(self, node):
         level = node.get('attrs', {}).get('level', 1)
         text = self.get_text(node)
-        heading = self.doc.add_paragraph(style=f'Heading {level}')
-        run = heading.add_run(text)
-        self.set_font(run, bold=True)
-        size_map = {1: 16, 2: 15, 3: 14}
-        run.font.size = Pt(size_map.get(level, 12))
-        # 主题标题色
-        run.font.color.rgb = RGBColor.from_string(self.theme.heading_color)
-        heading.paragraph_format.space_before = Pt(22)
-        heading.paragraph_format.space_after = Pt(11)
+        # 字体、字号、主题标题色与段距由主题样式提供
+        self.doc.add_paragraph(text, style=f'Heading {level}')
 
     def visit_paragraph(self, node):
         if len(node.get('children', [])) == 1 and node['children'][0]['type'] == 'image':
@@ -317,8 +475,6 @@ class MarkdownToDocx:
         p = self.doc.add_paragraph()
         if 'children' in node:
             self.render_inline(p, node['children'])
-        p.paragraph_format.line_spacing = Pt(25)
-        p.paragraph_format.first_line_indent = Cm(0.74)
 
     def visit_block_code(self, node):
         code = node.get('raw', '')
@@ -372,8 +528,7 @@ class MarkdownToDocx:
             # 普通块引用，渲染为缩进段落
             p = self.doc.add_paragraph()
             p.paragraph_format.left_indent = Cm(1)
-            run = p.add_run(full_text)
-            self.set_font(run, italic=True)
+            p.add_run(full_text).italic = True
 
     def _extract_blockquote_text(self, node) -> list[str]:
         """递归提取 block_quote 节点内所有文本行。"""
@@ -430,42 +585,39 @@ class MarkdownToDocx:
             return
 
         col_count = max(len(cells) for cells in all_rows)
-        self.table = self.doc.add_table(rows=len(all_rows), cols=col_count)
-        self.table.style = "Table Grid"
-
-        for i, cells in enumerate(all_rows):
-            self.row = self.table.rows[i]
-            for j, cell_node in enumerate(cells):
-                self.cell = self.row.cells[j]
-                self.cell._element.clear_content()
-                p = self.cell.add_paragraph()
-                self.render_inline(p, cell_node.get('children', []))
-                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                for run in p.runs:
-                    self.set_font(run)
-
-            # 主题色：表头行着色
-            if i == 0:
-                for j in range(len(cells)):
-                    cell_elem = self.row.cells[j]
-                    tc_pr = cell_elem._element.get_or_add_tcPr()
-                    shading = OxmlElement('w:shd')
-                    shading.set(qn('w:fill'), self.theme.table_header_bg)
-                    shading.set(qn('w:val'), 'clear')
-                    tc_pr.append(shading)
-                    # 表头字体色
-                    for p in cell_elem.paragraphs:
-                        for run in p.runs:
-                            run.font.color.rgb = RGBColor.from_string(self.theme.table_header_font)
-            # 主题色：交替行底色
-            elif i % 2 == 0:
-                for j in range(len(cells)):
-                    cell_elem = self.row.cells[j]
-                    tc_pr = cell_elem._element.get_or_add_tcPr()
-                    shading = OxmlElement('w:shd')
-                    shading.set(qn('w:fill'), self.theme.table_alt_row_bg)
-                    shading.set(qn('w:val'), 'clear')
-                    tc_pr.append(shading)
+        self.doc.element.body._insert_tbl(self._build_table(all_rows, col_count))
+
+    def _build_table(self, all_rows: list[list[dict]], col_count: int):
+        """
+        一次遍历直接生成 w:tbl 元素树（结构与 doc.add_table 生成的一致）。
+        doc.add_table 之后逐格访问 row.cells[j] 每次都要重新遍历整个网格，大表格为平方复杂度；
+        表头底色与字体色、交替行底色、单元格居中由主题表格样式提供，单元格只写内容。
+        """
+        section = self.doc.sections[-1]
+        block_width = section.page_width - section.left_margin - section.right_margin
+        col_width = str(Emu(block_width // col_count).twips)
+        w_tr, w_tc, w_tc_pr, w_tc_w, w_p = qn('w:tr'), qn('w:tc'), qn('w:tcPr'), qn('w:tcW'), qn('w:p')
+        tc_w_attrs = {qn('w:type'): 'dxa', qn('w:w'): col_width}
+        append_runs = self._append_runs
+
+        tbl = OxmlElement('w:tbl')
+        tbl_pr = SubElement(tbl, qn('w:tblPr'))
+        SubElement(tbl_pr, qn('w:tblStyle'), {qn('w:val'): TABLE_STYLE_ID})
+        SubElement(tbl_pr, qn('w:tblW'), {qn('w:type'): 'auto', qn('w:w'): '0'})
+        SubElement(tbl_pr, qn('w:tblLook'), _TABLE_LOOK)
+        tbl_grid = SubElement(tbl, qn('w:tblGrid'))
+        for _ in range(col_count):
+            SubElement(tbl_grid, qn('w:gridCol'), {qn('w:w'): col_width})
+
+        for cells in all_rows:
+            tr = SubElement(tbl, w_tr)
+            for j in range(col_count):
+                tc = SubElement(tr, w_tc)
+                SubElement(SubElement(tc, w_tc_pr), w_tc_w, tc_w_attrs)
+                p = SubElement(tc, w_p)
+                if j < len(cells):
+                    append_runs(p, cells[j].get('children', []))
+        return tbl
 
     def visit_image(self, node):
         url = node.get('attrs', {}).get('url', '')
@@ -473,39 +625,19 @@ class MarkdownToDocx:
             return
 
         try:
-            response = requests.get(url, timeout=30, headers={
-                'User-Agent': 'SGA-Office/1.0'
-            })
-            if response.status_code != 200:
-                self.doc.add_paragraph(f"[图片下载失败: HTTP {response.status_code}]")
+            try:
+                image_stream = self._open_image(url)
+            except requests.HTTPError as e:
+                self.doc.add_paragraph(f"[图片下载失败: HTTP {e.response.status_code}]")
+                return
+            except (TimeoutError, requests.Timeout):
+                self.doc.add_paragraph("[图片下载失败: 超时]")
                 return
 
-            image_stream = BytesIO(response.content)
-            img = Image.open(image_stream)
-            img_width, img_height = img.size
-
-            # RGBA/P → RGB 转换
-            if img.mode in ('RGBA', 'P', 'LA'):
-                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = rgb_img
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            output_stream = BytesIO()
-            img.save(output_stream, format='JPEG', quality=95)
-            output_stream.seek(0)
-
-            # 计算合适的宽度
-            max_width_cm = 14
-            aspect_ratio = img_width / img_height if img_height > 0 else 1
-            final_width_cm = max_width_cm
-            expected_height_cm = max_width_cm / aspect_ratio
-            if expected_height_cm > 18:
-                final_width_cm = 18 * aspect_ratio
-            final_width_cm = final_width_cm * 0.6
+            with image_stream:
+                data = image_stream.read()
+            # 按显示尺寸与打印 DPI 下采样，线稿/图表保存为 PNG，照片保存为 JPEG
+            image = transcode_image(data, dpi=get_settings().docx_image_dpi)
 
             paragraph = self.doc.add_paragraph()
             paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -513,7 +645,7 @@ class MarkdownToDocx:
             paragraph.paragraph_format.space_after = Pt(12)
 
             run = paragraph.add_run()
-            inline_shape = run.add_picture(output_stream, width=Cm(final_width_cm))
+            inline_shape = run.add_picture(BytesIO(image.data), width=Cm(image.width_cm))
 
             # 设置上下型环绕布局
             inline = inline_shape._inline
@@ -560,23 +692,39 @@ class MarkdownToDocx:
             logger.error(f"图片处理失败: {e}")
             self.doc.add_paragraph(f"[图片处理失败: {str(e)}]")
 
+    def _open_image(self, url: str):
+        prefetched = self.images.get(url)
+        if prefetched is None:
+            return open_source(url, timeout=_IMAGE_FETCH_TIMEOUT)
+        if isinstance(prefetched, Exception):
+            raise prefetched
+        return BytesIO(prefetched)
+
     def render_inline(self, paragraph, nodes):
+        self._append_runs(paragraph._p, nodes)
+
+    def _append_runs(self, p, nodes):
+        """在 w:p 元素末尾追加行内节点对应的 run（加粗/倾斜引用 Strong/Emphasis 字符样式）"""
         for node in nodes:
-            if node['type'] == 'text':
-                run = paragraph.add_run(node.get('raw', ''))
-                self.set_font(run)
-            elif node['type'] == 'strong':
-                run = paragraph.add_run(self.get_text(node))
-                self.set_font(run, bold=True)
-            elif node['type'] == 'emphasis':
-                run = paragraph.add_run(self.get_text(node))
-                self.set_font(run, italic=True)
-            elif node['type'] == 'codespan':
-                run = paragraph.add_run(node.get('raw', ''))
-                run.font.name = 'Courier New'
-                self.set_font(run)
-            elif node['type'] == 'image':
-                pass  # inline image skip
+            kind = node['type']
+            if kind in ('text', 'codespan'):
+                text, style = node.get('raw', ''), None
+            elif kind in _INLINE_STYLES:
+                text, style = self.get_text(node), _INLINE_STYLES[kind]
+            else:
+                continue  # inline image 等跳过
+            r = SubElement(p, _W_R)
+            if style:
+                SubElement(SubElement(r, _W_RPR), _W_RSTYLE, {_W_VAL: style})
+            if not text:
+                continue
+            if _RUN_BREAK_CHARS.search(text):
+                r.text = text  # python-docx 把 \t、\n 转为 w:tab、w:br
+            else:
+                t = SubElement(r, _W_T)
+                t.text = text
+                if len(text.strip()) < len(text):
+                    t.set(_XML_SPACE, 'preserve')
 
     def get_text(self, node):
         if 'raw' in node:
@@ -675,9 +823,8 @@ def render_markdown_to_docx(
     content = _convert_tab_tables_to_markdown(content)
     content = _repair_markdown_table(content)
 
-    # 4. 创建文档
-    doc = Document()
-    _setup_page(doc)
+    # 4. 创建文档（从按主题缓存的基础文档克隆）
+    doc = _new_document(theme)
 
     # 5. 封面页
     if config and config.get("cover"):
@@ -701,7 +848,8 @@ def render_markdown_to_docx(
     # 8. 解析 & 渲染正文
     markdown = mistune.create_markdown(renderer=None, plugins=['table'])
     ast = markdown(content)
-    renderer = MarkdownToDocx(doc, theme=theme)
+    images = _prefetch_images(MarkdownToDocx.collect_image_urls(ast))
+    renderer = MarkdownToDocx(doc, theme=theme, images=images)
     renderer.render(ast)
 
     output = BytesIO()
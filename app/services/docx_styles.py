@@ -0,0 +1,85 @@
+"""
+Docx 主题样式。
+
+DOC-01 的外观原先逐个元素直接写入：每个 run 写字体（rFonts），每个标题 run 写字号和颜色，
+每个表头单元格和交替行单元格写底色（w:shd）与字体色。document.xml 随内容线性膨胀，
+生成、保存和 soffice 转换都变慢。本模块把这些外观按主题写成文档级样式，渲染器只按样式名引用：
+
+- Normal：西文 Times New Roman、中文宋体（页眉页脚保持宋体）；
+- Heading 1-9：加粗、主题标题色、字号（一/二/三级 16/15/14 磅，其余 12 磅）、段前 22 磅、段后 11 磅；
+- Strong / Emphasis：内置的加粗 / 倾斜字符样式，渲染器直接引用；
+- SGA Table：基于 Table Grid 的表格样式。首行使用主题表头底色与字体色，
+  数据行从第二行起隔行使用主题交替底色（band2Horz），单元格段落居中。
+
+样式只在按主题缓存的基础文档中生成一次，每次渲染不再重复构造。
+"""
+
+from docx.document import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Pt, RGBColor
+
+from app.core.themes import Theme
+
+BODY_FONT = 'Times New Roman'
+BODY_EAST_ASIA_FONT = '宋体'
+HEADING_SIZES = {1: 16, 2: 15, 3: 14}
+HEADING_DEFAULT_SIZE = 12
+
+TABLE_STYLE = 'SGA Table'
+TABLE_STYLE_ID = 'SGATable'
+
+# 外观依赖的内置样式（styles.xml 中的名称），基础文档裁剪样式时需保留
+REFERENCED_STYLES = ('Strong', 'Emphasis', 'Table Grid', 'header', 'footer') + tuple(
+    f'heading {level}' for level in range(1, 10)
+)
+
+_THEME_FONT_ATTRS = ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme', 'w:cstheme')
+
+
+def _set_fonts(style, ascii_font: str, east_asia_font: str) -> None:
+    """设置样式的西文/中文字体，并去掉会覆盖显式字体的主题字体属性"""
+    style.font.name = ascii_font
+    r_fonts = style.element.rPr.rFonts
+    r_fonts.set(qn('w:eastAsia'), east_asia_font)
+    for attr in _THEME_FONT_ATTRS:
+        r_fonts.attrib.pop(qn(attr), None)
+
+
+def _table_style_xml(theme: Theme) -> str:
+    return (
+        f'<w:style {nsdecls("w")} w:type="table" w:customStyle="1" w:styleId="{TABLE_STYLE_ID}">'
+        f'<w:name w:val="{TABLE_STYLE}"/>'
+        '<w:basedOn w:val="TableGrid"/>'
+        '<w:uiPriority w:val="59"/>'
+        '<w:pPr><w:jc w:val="center"/></w:pPr>'
+        '<w:tblStylePr w:type="firstRow">'
+        f'<w:rPr><w:color w:val="{theme.table_header_font}"/></w:rPr>'
+        f'<w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{theme.table_header_bg}"/></w:tcPr>'
+        '</w:tblStylePr>'
+        '<w:tblStylePr w:type="band2Horz">'
+        f'<w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{theme.table_alt_row_bg}"/></w:tcPr>'
+        '</w:tblStylePr>'
+        '</w:style>'
+    )
+
+
+def apply_theme_styles(doc: Document, theme: Theme) -> None:
+    """在文档中写入主题样式（对基础文档调用一次）"""
+    styles = doc.styles
+
+    _set_fonts(styles['Normal'], BODY_FONT, BODY_EAST_ASIA_FONT)
+    for name in ('Header', 'Footer'):
+        _set_fonts(styles[name], BODY_EAST_ASIA_FONT, BODY_EAST_ASIA_FONT)
+
+    heading_color = RGBColor.from_string(theme.heading_color)
+    for level in range(1, 10):
+        style = styles[f'Heading {level}']
+        _set_fonts(style, BODY_FONT, BODY_EAST_ASIA_FONT)
+        style.font.bold = True
+        style.font.size = Pt(HEADING_SIZES.get(level, HEADING_DEFAULT_SIZE))
+        style.font.color.rgb = heading_color
+        style.paragraph_format.space_before = Pt(22)
+        style.paragraph_format.space_after = Pt(11)
+
+    styles.element.append(parse_xml(_table_style_xml(theme)))
@@ -0,0 +1,492 @@
+"""
+EXC-02 zip 级增量追加引擎。
+
+不经 openpyxl 加载整个工作簿，而是直接改写 .xlsx 压缩包：
+- 未改动的部件（其他 Sheet、共享字符串、图表、图片、VBA 等）按原压缩数据逐字节拷贝，不解压；
+- 目标 Sheet 的 XML 流式解压两遍：第一遍定位最后一个有单元格的行，
+  第二遍更新 <dimension> 并在 </sheetData> 前插入新的 <row>，边解压边重新压缩；
+- 新单元格使用内联字符串（t="inlineStr"），不改写 sharedStrings.xml；
+- 单元格样式引用与 ExcelStyleRegistry.body() 同名的命名样式，styles.xml 中已有则复用，否则追加一份。
+
+追加成本只与新增行数和目标 Sheet 的压缩体积（zlib 级别的解压/压缩）有关，与工作簿中其他内容无关。
+遇到不支持的结构（Strict OOXML、ZIP64、行缺少 r 属性等）时抛出 ZipAppendUnsupported，
+由调用方回退为完整加载。
+"""
+
+import logging
+import math
+import posixpath
+import re
+import struct
+import zlib
+from io import BytesIO
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+from zipfile import BadZipFile, ZipFile, ZipInfo
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter, range_boundaries
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_BODY_STYLE = "SGA Body"  # 与 ExcelStyleRegistry.body() 的命名样式一致
+
+
+class ZipAppendUnsupported(RuntimeError):
+    """源文件结构不在 zip 级追加的支持范围内，调用方应回退为完整加载"""
+
+
+# =====================================================
+#  部件定位
+# =====================================================
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _read_rels(zf: ZipFile, part: str) -> list[tuple[str, str, str]]:
+    """读取部件的关系文件，返回 [(Id, Type, 解析后的目标部件路径)]"""
+    root = ET.fromstring(zf.read(_rels_path(part)))
+    base = posixpath.dirname(part)
+    rels = []
+    for rel in root.iter(f"{{{_PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") == "External":
+            continue
+        if target.startswith("/"):
+            path = target.lstrip("/")
+        else:
+            path = posixpath.normpath(posixpath.join(base, target))
+        rels.append((rel.get("Id", ""), rel.get("Type", ""), path))
+    return rels
+
+
+def _locate_parts(zf: ZipFile, sheet_name: str) -> tuple[str, str, str]:
+    """返回 (workbook.xml, 目标 Sheet, styles.xml) 的部件路径；Sheet 不存在时使用活动 Sheet"""
+    try:
+        workbook = next(path for _, rel_type, path in _read_rels(zf, "") if rel_type.endswith("/officeDocument"))
+        root = ET.fromstring(zf.read(workbook))
+        rels = {rel_id: (rel_type, path) for rel_id, rel_type, path in _read_rels(zf, workbook)}
+    except (KeyError, StopIteration, ET.ParseError) as e:
+        raise ZipAppendUnsupported(f"无法解析工作簿结构: {e}")
+    if root.tag != f"{{{_MAIN_NS}}}workbook":
+        raise ZipAppendUnsupported(f"不支持的工作簿命名空间: {root.tag}")
+
+    sheets = [
+        (sheet.get("name"), sheet.get(f"{{{_REL_NS}}}id"))
+        for sheet in root.iter(f"{{{_MAIN_NS}}}sheet")
+    ]
+    if not sheets:
+        raise ZipAppendUnsupported("工作簿中没有 Sheet")
+    names = [name for name, _ in sheets]
+    if sheet_name in names:
+        index = names.index(sheet_name)
+    else:
+        view = root.find(f"{{{_MAIN_NS}}}bookViews/{{{_MAIN_NS}}}workbookView")
+        index = int(view.get("activeTab", 0)) if view is not None else 0
+        index = index if index < len(sheets) else 0
+        logger.warning(f"Sheet '{sheet_name}' 不存在，使用活动 Sheet: {names[index]}")
+
+    rel_type, sheet_path = rels.get(sheets[index][1], ("", ""))
+    if not rel_type.endswith("/worksheet"):
+        raise ZipAppendUnsupported(f"目标 Sheet 不是普通工作表: {rel_type}")
+    styles = [path for rel_type, path in rels.values() if rel_type.endswith("/styles")]
+    if not styles:
+        raise ZipAppendUnsupported("工作簿缺少 styles.xml")
+    return workbook, sheet_path, styles[0]
+
+
+# =====================================================
+#  目标 Sheet: 扫描与改写
+# =====================================================
+
+_SHEET_DATA_RE = re.compile(rb"<([\w.-]+:)?sheetData\s*(/?)>")
+_LAST_ROW_RE = re.compile(rb"(?s:.*)(<(?:[\w.-]+:)?row\b([^>]*?)(/?)>)")
+_ROW_NUM_RE = re.compile(rb"\sr=\"(\d+)\"")
+_MERGE_REF_RE = re.compile(rb"<(?:[\w.-]+:)?mergeCell\b[^>]*?\sref=\"([A-Z]+\d+(?::[A-Z]+\d+)?)\"")
+_DIMENSION_RE = re.compile(rb"(<(?:[\w.-]+:)?dimension\b[^>]*?\sref=\")([^\"]*)(\")")
+
+
+def _iter_member(zf: ZipFile, name: str) -> Iterator[bytes]:
+    with zf.open(name) as src:
+        while chunk := src.read(_CHUNK_SIZE):
+            yield chunk
+
+
+def _scan_sheet(zf: ZipFile, name: str) -> tuple[bytes, int]:
+    """
+    第一遍流式解压目标 Sheet，返回 (命名空间前缀, 已占用的最后一行)。
+    已占用的行 = 最后一个含单元格的 <row>，以及合并区域覆盖到的最后一行（与 openpyxl 的 max_row 一致）。
+    """
+    prefix: Optional[bytes] = None
+    last_row = 0
+    carry = b""
+    for chunk in _iter_member(zf, name):
+        buf = carry + chunk
+        cut = buf.rfind(b">") + 1
+        body, carry = buf[:cut], buf[cut:]
+        if prefix is None:
+            match = _SHEET_DATA_RE.search(body)
+            if match:
+                prefix = match.group(1) or b""
+        # 本块中最后一个非自闭合的 <row>（自闭合的行没有单元格）
+        end = len(body)
+        while (match := _LAST_ROW_RE.match(body, 0, end)) is not None:
+            if not match.group(3):
+                number = _ROW_NUM_RE.search(match.group(2))
+                if number is None:
+                    raise ZipAppendUnsupported("<row> 缺少 r 属性")
+                last_row = max(last_row, int(number.group(1)))
+                break
+            end = match.start(1)
+        for ref in _MERGE_REF_RE.findall(body):
+            last_row = max(last_row, range_boundaries(ref.decode("ascii"))[3])
+    if prefix is None:
+        raise ZipAppendUnsupported("目标 Sheet 中没有 <sheetData>")
+    return prefix, last_row
+
+
+def _update_dimension(head: bytes, max_row: int, max_col: int) -> bytes:
+    match = _DIMENSION_RE.search(head)
+    if match is None:
+        return head
+    try:
+        min_col, min_row, old_col, old_row = range_boundaries(match.group(2).decode("ascii"))
+    except (ValueError, TypeError):
+        return head
+    ref = f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max(old_col, max_col))}{max(old_row, max_row)}"
+    return head[:match.start(2)] + ref.encode("ascii") + head[match.end(2):]
+
+
+def _rewrite_sheet(
+    zf: ZipFile, name: str, prefix: bytes, rows_xml: bytes, max_row: int, max_col: int,
+) -> Iterator[bytes]:
+    """第二遍流式解压：更新 <dimension>，在 </sheetData> 前插入新行，其余字节原样输出"""
+    end_tag = b"</" + prefix + b"sheetData>"
+    keep = len(end_tag) - 1
+    buf = b""
+    head_done = inserted = False
+    for chunk in _iter_member(zf, name):
+        buf += chunk
+        if not head_done:
+            match = _SHEET_DATA_RE.search(buf)
+            if match is None:
+                continue  # <sheetData> 之前的部分很小，累积到找到为止
+            head = _update_dimension(buf[:match.start()], max_row, max_col)
+            if match.group(2):
+                # <sheetData/>：空表
+                yield head + b"<" + prefix + b"sheetData>" + rows_xml + end_tag
+                inserted = True
+            else:
+                yield head + match.group(0)
+            buf = buf[match.end():]
+            head_done = True
+        if inserted:
+            yield buf
+            buf = b""
+            continue
+        index = buf.find(end_tag)
+        if index >= 0:
+            yield buf[:index] + rows_xml + buf[index:]
+            buf = b""
+            inserted = True
+        elif len(buf) > keep:
+            yield buf[:-keep]
+            buf = buf[-keep:]
+    if not inserted:
+        raise ZipAppendUnsupported("目标 Sheet 中没有 </sheetData>")
+    yield buf
+
+
+def _cell_xml(p: str, ref: str, style_id: int, value: Any) -> tuple[str, bool]:
+    """单元格 XML，返回 (xml, 是否公式)；与 openpyxl 一致，以 '=' 开头的字符串视为公式"""
+    if value is None:
+        return f'<{p}c r="{ref}" s="{style_id}"/>', False
+    if isinstance(value, bool):
+        return f'<{p}c r="{ref}" s="{style_id}" t="b"><{p}v>{int(value)}</{p}v></{p}c>', False
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return f'<{p}c r="{ref}" s="{style_id}" t="n"><{p}v>{value!r}</{p}v></{p}c>', False
+
+    text = value if isinstance(value, str) else str(value)
+    if ILLEGAL_CHARACTERS_RE.search(text):
+        raise ValueError(f"单元格 {ref} 包含 Excel 不允许的控制字符")
+    if text.startswith("=") and len(text) > 1:
+        return f'<{p}c r="{ref}" s="{style_id}"><{p}f>{escape(text[1:])}</{p}f><{p}v></{p}v></{p}c>', True
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return (
+        f'<{p}c r="{ref}" s="{style_id}" t="inlineStr"><{p}is><{p}t{space}>{escape(text)}</{p}t></{p}is></{p}c>',
+        False,
+    )
+
+
+def _rows_xml(rows: list[list[Any]], start_row: int, style_id: int, prefix: bytes) -> tuple[bytes, int, bool]:
+    """新增行的 XML，返回 (xml, 最大列数, 是否含公式)"""
+    p = prefix.decode("ascii")
+    parts: list[str] = []
+    max_col = 0
+    has_formula = False
+    for row_num, row_data in enumerate(rows, start_row):
+        if not row_data:
+            continue
+        parts.append(f'<{p}row r="{row_num}">')
+        for col_num, value in enumerate(row_data, 1):
+            xml, formula = _cell_xml(p, f"{get_column_letter(col_num)}{row_num}", style_id, value)
+            parts.append(xml)
+            has_formula = has_formula or formula
+        parts.append(f"</{p}row>")
+        max_col = max(max_col, len(row_data))
+    return "".join(parts).encode("utf-8"), max_col, has_formula
+
+
+# =====================================================
+#  styles.xml / workbook.xml 的文本级修改
+# =====================================================
+# 只做局部插入，不经 ElementTree 重新序列化：后者会改写命名空间前缀，
+# 使 mc:Ignorable 引用的前缀失效，Excel 打开时会提示修复。
+
+_ATTR_RE = re.compile(r'([\w:.-]+)="([^"]*)"')
+
+
+def _set_count(attrs: str, count: int) -> str:
+    if re.search(r'\scount="\d*"', attrs):
+        return re.sub(r'(\scount=")\d*(")', rf"\g<1>{count}\g<2>", attrs)
+    return f'{attrs} count="{count}"'
+
+
+def _block_entries(text: str, p: str, block: str, entry: str) -> list[dict[str, str]]:
+    """列出某个集合元素（如 cellXfs）下各条目的属性"""
+    match = re.search(rf"<{re.escape(p)}{block}\b[^>]*?(/?)>", text)
+    if match is None or match.group(1):
+        return []
+    close = text.find(f"</{p}{block}>", match.end())
+    inner = text[match.end():close]
+    return [dict(_ATTR_RE.findall(attrs)) for attrs in re.findall(rf"<{re.escape(p)}{entry}\b([^>]*)", inner)]
+
+
+def _append_entry(text: str, p: str, block: str, entry: str, entry_xml: str) -> tuple[str, int]:
+    """在集合元素末尾追加一个条目并更新 count，返回 (新文本, 新条目的索引)"""
+    match = re.search(rf"<{re.escape(p)}{block}\b([^>]*?)(/?)>", text)
+    if match is None:
+        raise ZipAppendUnsupported(f"styles.xml 缺少 <{block}>")
+    attrs = match.group(1)
+    if match.group(2):
+        new_block = f"<{p}{block}{_set_count(attrs, 1)}>{entry_xml}</{p}{block}>"
+        return text[:match.start()] + new_block + text[match.end():], 0
+    close = text.index(f"</{p}{block}>", match.end())
+    index = len(re.findall(rf"<{re.escape(p)}{entry}\b", text[match.end():close]))
+    open_tag = f"<{p}{block}{_set_count(attrs, index + 1)}>"
+    return text[:match.start()] + open_tag + text[match.end():close] + entry_xml + text[close:], index
+
+
+def _ensure_body_style(styles: bytes) -> tuple[Optional[bytes], int]:
+    """
+    确保 styles.xml 中有正文命名样式（细边框 + 居中换行），返回 (修改后的 styles.xml 或 None, cellXfs 索引)。
+    已存在同名命名样式（例如本服务生成的文件）时直接复用。
+    """
+    text = styles.decode("utf-8")
+    root = re.search(r"<([\w.-]+:)?styleSheet\b", text)
+    if root is None:
+        raise ZipAppendUnsupported("无法识别 styles.xml")
+    p = root.group(1) or ""
+
+    for style in _block_entries(text, p, "cellStyles", "cellStyle"):
+        if style.get("name") == _BODY_STYLE:
+            for index, xf in enumerate(_block_entries(text, p, "cellXfs", "xf")):
+                if xf.get("xfId") == style.get("xfId"):
+                    return None, index
+
+    alignment = f'<{p}alignment horizontal="center" vertical="center" wrapText="1"/>'
+    sides = "".join(f'<{p}{side} style="thin"/>' for side in ("left", "right", "top", "bottom"))
+    text, border_id = _append_entry(text, p, "borders", "border", f"<{p}border>{sides}<{p}diagonal/></{p}border>")
+    xf_attrs = f'numFmtId="0" fontId="0" fillId="0" borderId="{border_id}" applyBorder="1" applyAlignment="1"'
+    text, style_xf = _append_entry(text, p, "cellStyleXfs", "xf", f"<{p}xf {xf_attrs}>{alignment}</{p}xf>")
+    text, cell_xf = _append_entry(
+        text, p, "cellXfs", "xf", f'<{p}xf {xf_attrs} xfId="{style_xf}">{alignment}</{p}xf>',
+    )
+    text, _ = _append_entry(
+        text, p, "cellStyles", "cellStyle", f'<{p}cellStyle name="{_BODY_STYLE}" xfId="{style_xf}"/>',
+    )
+    return text.encode("utf-8"), cell_xf
+
+
+# CT_Workbook 中 calcPr 之后可能出现的元素，新 calcPr 插在其中第一个之前
+_AFTER_CALC_PR = (
+    "oleSize", "customWorkbookViews", "pivotCaches", "smartTagPr", "smartTagTypes",
+    "webPublishing", "fileRecoveryPr", "webPublishObjects", "extLst",
+)
+
+
+def _ensure_full_calc(workbook: bytes) -> Optional[bytes]:
+    """新增公式没有缓存值，设置 fullCalcOnLoad 让 Excel 打开时重新计算；已设置时返回 None"""
+    text = workbook.decode("utf-8")
+    root = re.search(r"<([\w.-]+:)?workbook\b", text)
+    p = (root.group(1) or "") if root else ""
+    calc = re.search(rf"<{re.escape(p)}calcPr\b([^>]*?)(/?)>", text)
+    if calc is not None:
+        if "fullCalcOnLoad=" in calc.group(1):
+            return None
+        insert_at = calc.start() + len(f"<{p}calcPr")
+        return (text[:insert_at] + ' fullCalcOnLoad="1"' + text[insert_at:]).encode("utf-8")
+    names = "|".join(_AFTER_CALC_PR)
+    anchor = re.search(rf"<{re.escape(p)}(?:{names})\b|</{re.escape(p)}workbook>", text)
+    if anchor is None:
+        raise ZipAppendUnsupported("无法识别 workbook.xml")
+    return (text[:anchor.start()] + f'<{p}calcPr fullCalcOnLoad="1"/>' + text[anchor.start():]).encode("utf-8")
+
+
+# =====================================================
+#  zip 写入
+# =====================================================
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP32_LIMIT = 0xFFFFFFFF
+
+
+def _dos_time(date_time: tuple) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def _encode_name(info: ZipInfo) -> tuple[bytes, int]:
+    try:
+        return info.filename.encode("ascii"), info.flag_bits & ~0x800
+    except UnicodeEncodeError:
+        return info.filename.encode("utf-8"), info.flag_bits | 0x800
+
+
+class _ZipWriter:
+    """最小 zip 写入器：原样拷贝源条目的压缩数据，或对新内容流式 deflate"""
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.central: list[bytes] = []
+
+    def _add_central(self, info: ZipInfo, name: bytes, flags: int, compress_type: int,
+                     crc: int, compress_size: int, file_size: int, extra: bytes, offset: int) -> None:
+        dostime, dosdate = _dos_time(info.date_time)
+        self.central.append(_CENTRAL_HEADER.pack(
+            b"PK\x01\x02", info.create_version, info.create_system, info.extract_version, info.reserved,
+            flags, compress_type, dostime, dosdate, crc, compress_size, file_size,
+            len(name), len(extra), len(info.comment), 0, info.internal_attr, info.external_attr, offset,
+        ) + name + extra + info.comment)
+
+    def copy_raw(self, src: BinaryIO, info: ZipInfo) -> None:
+        """拷贝源条目的本地头 + 压缩数据（+ 数据描述符），不解压"""
+        if max(info.compress_size, info.file_size, info.header_offset) >= _ZIP32_LIMIT:
+            raise ZipAppendUnsupported("不支持 ZIP64 源文件")
+        src.seek(info.header_offset)
+        header = src.read(_LOCAL_HEADER.size)
+        if header[:4] != b"PK\x03\x04":
+            raise ZipAppendUnsupported(f"条目 {info.filename} 的本地头无效")
+        name_len, extra_len = struct.unpack("<2H", header[26:30])
+        offset = self.fp.tell()
+        self.fp.write(header)
+        remaining = name_len + extra_len + info.compress_size
+        while remaining > 0:
+            chunk = src.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ZipAppendUnsupported(f"条目 {info.filename} 数据不完整")
+            self.fp.write(chunk)
+            remaining -= len(chunk)
+        if info.flag_bits & 0x08:
+            descriptor = src.read(16)
+            self.fp.write(descriptor if descriptor[:4] == b"PK\x07\x08" else descriptor[:12])
+        name, flags = _encode_name(info)
+        self._add_central(info, name, flags, info.compress_type, info.CRC,
+                          info.compress_size, info.file_size, info.extra, offset)
+
+    def write_stream(self, info: ZipInfo, chunks: Iterable[bytes]) -> None:
+        """以 deflate 写入新内容（沿用源条目的名称、时间与属性），写完后回填本地头中的 CRC 与长度"""
+        name, flags = _encode_name(info)
+        flags &= 0x800
+        offset = self.fp.tell()
+        dostime, dosdate = _dos_time(info.date_time)
+        self.fp.write(_LOCAL_HEADER.pack(
+            b"PK\x03\x04", 20, 0, flags, 8, dostime, dosdate, 0, 0, 0, len(name), 0,
+        ) + name)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        crc = file_size = compress_size = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            data = compressor.compress(chunk)
+            compress_size += len(data)
+            self.fp.write(data)
+        data = compressor.flush()
+        compress_size += len(data)
+        self.fp.write(data)
+        if max(file_size, compress_size, offset) >= _ZIP32_LIMIT:
+            raise ZipAppendUnsupported("改写后的条目超过 ZIP32 上限")
+
+        end = self.fp.tell()
+        self.fp.seek(offset + 14)
+        self.fp.write(struct.pack("<3L", crc, compress_size, file_size))
+        self.fp.seek(end)
+        info.extract_version = max(info.extract_version, 20)
+        self._add_central(info, name, flags, 8, crc, compress_size, file_size, b"", offset)
+
+    def close(self) -> None:
+        start = self.fp.tell()
+        for record in self.central:
+            self.fp.write(record)
+        size = self.fp.tell() - start
+        count = len(self.central)
+        self.fp.write(_END_RECORD.pack(b"PK\x05\x06", 0, 0, count, count, size, start, 0))
+
+
+# =====================================================
+#  入口
+# =====================================================
+
+def append_rows_zip(source: BinaryIO, rows: list[list[Any]], sheet_name: str) -> BytesIO:
+    """
+    在 zip 层把 rows 追加到 sheet_name（不存在时为活动 Sheet）已占用区域之后，返回新的 .xlsx。
+
+    Args:
+        source:     可 seek 的源 .xlsx 文件对象
+        rows:       要追加的行数据
+        sheet_name: 目标 Sheet 名称
+
+    Raises:
+        ZipAppendUnsupported: 源文件结构不受支持（调用方应回退为完整加载）
+        ValueError:           数据中含有 Excel 不允许的字符
+    """
+    try:
+        zf = ZipFile(source)
+    except BadZipFile as e:
+        raise ZipAppendUnsupported(f"不是有效的 zip 文件: {e}")
+
+    with zf:
+        workbook_path, sheet_path, styles_path = _locate_parts(zf, sheet_name)
+        prefix, last_row = _scan_sheet(zf, sheet_path)
+        styles_xml, style_id = _ensure_body_style(zf.read(styles_path))
+
+        # 与 openpyxl 一致：空表的 max_row 为 1，新行从第 2 行开始
+        start_row = max(last_row, 1) + 1
+        rows_xml, max_col, has_formula = _rows_xml(rows, start_row, style_id, prefix)
+        replaced = {styles_path: styles_xml}
+        if has_formula:
+            replaced[workbook_path] = _ensure_full_calc(zf.read(workbook_path))
+
+        output = BytesIO()
+        writer = _ZipWriter(output)
+        for info in zf.infolist():
+            if info.filename == sheet_path:
+                chunks = _rewrite_sheet(zf, sheet_path, prefix, rows_xml, start_row + len(rows) - 1, max_col)
+                writer.write_stream(info, chunks)
+            elif replaced.get(info.filename) is not None:
+                writer.write_stream(info, [replaced[info.filename]])
+            else:
+                writer.copy_raw(source, info)
+        writer.close()
+
+    output.seek(0)
+    return output
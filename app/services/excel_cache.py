@@ -0,0 +1,366 @@
+"""
+EXC-04 解析结果缓存（进程内）。
+
+同一份报表常被连续提取多次（不同区域、再按关键字定位、再做查询下推），
+每次重新解析 Sheet XML 的成本远高于一次下载。本模块把已解析的 Sheet 以列式结构保存在内存中：
+
+- 每列一个类型码数组（bytearray）+ 一个数值数组（array('d')），
+  字符串进入 Sheet 级字符串表、日期等其他对象进入对象表，数值槽位保存其下标；
+- 键为 (URL, 源文件版本)：版本取自源文件缓存条件 GET 得到的 ETag / Last-Modified
+  （本地存储为 mtime + 大小，见 source_cache.source_version），命中时不读取文件内容；
+  服务端不提供校验器时才退回内容 sha256，此时每次查询仍需读取整个文件；
+- 按估算的内存占用限制总体积，超出时淘汰最久未访问的工作簿；
+- 第二次访问同一 Sheet 时才整表解析入缓存：首次的小窗口读取仍只解析到窗口末行。
+
+缓存只保存在 API 进程中（见 cached_excel_read）：先在 I/O 线程池中只查缓存执行，
+全部命中时不经过 CPU 进程池；未命中时解析连同已确定的版本派发到进程池，需要入缓存的 Sheet
+由子进程整表解析后随结果传回 API 进程写入。子进程本身不持有缓存、也不再计算版本，
+总内存占用约为 uvicorn worker 数 × excel_parse_cache_mb。
+"""
+
+import hashlib
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, TypeVar
+
+from app.core.config import get_settings
+from app.core.executor import run_cpu_bound, run_io_bound
+
+T = TypeVar("T")
+
+_NONE, _FLOAT, _INT, _STR, _BOOL, _OBJECT = range(6)
+_MAX_EXACT_INT = 2 ** 53      # array('d') 可精确表示的整数范围
+_DECODE_BATCH_ROWS = 4096     # 迭代时每批解码的行数
+_SEEN_KEYS = 4096             # 记录"已访问一次"的 Sheet 键数上限
+_DIGEST_CHUNK = 1024 * 1024
+
+
+def source_digest(f: BinaryIO) -> str:
+    """源文件内容的 sha256（读完后回到开头），源文件没有 ETag / Last-Modified 时作为版本"""
+    h = hashlib.sha256()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(_DIGEST_CHUNK), b""):
+        h.update(chunk)
+    f.seek(0)
+    return h.hexdigest()
+
+
+# =====================================================
+#  列式 Sheet
+# =====================================================
+
+class ColumnarSheet:
+    """
+    一张 Sheet 的单元格值（仅值，不含样式）的列式副本。
+    iter_rows 与只读工作表的 iter_rows(values_only=True) 行为一致：
+    - 不指定列范围时，各行只到该行最后一个单元格（空行为 ()）；
+    - 指定列范围时每行补齐到固定宽度，行数不超过 Sheet 实际行数。
+    """
+
+    def __init__(self, title: str, max_column: int):
+        self.title = title
+        self.max_column = max_column   # <dimension> 声明的列数，仅作为列数下限
+        self.row_lengths = array("I")
+        self.columns: list[tuple[bytearray, array]] = []
+        self.strings: list[str] = []
+        self.objects: list[Any] = []
+
+    @classmethod
+    def from_rows(cls, title: str, max_column: int, rows: Iterable[tuple]) -> "ColumnarSheet":
+        """从逐行迭代的单元格值构建（一次遍历）"""
+        sheet = cls(title, max_column)
+        columns = sheet.columns
+        row_lengths = sheet.row_lengths
+        string_index: dict[str, int] = {}
+        object_index: dict[Any, int] = {}
+
+        for row in rows:
+            n_rows = len(row_lengths)
+            length = len(row)
+            while len(columns) < length:
+                columns.append((bytearray(n_rows), array("d", bytes(8 * n_rows))))
+            for (kinds, values), value in zip(columns, row):
+                if value is None:
+                    kinds.append(_NONE)
+                    values.append(0.0)
+                    continue
+                kind = type(value)
+                if kind is float:
+                    kinds.append(_FLOAT)
+                    values.append(value)
+                elif kind is str:
+                    index = string_index.get(value)
+                    if index is None:
+                        index = string_index[value] = len(sheet.strings)
+                        sheet.strings.append(value)
+                    kinds.append(_STR)
+                    values.append(index)
+                elif kind is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+                    kinds.append(_INT)
+                    values.append(value)
+                elif kind is bool:
+                    kinds.append(_BOOL)
+                    values.append(value)
+                else:
+                    index = object_index.get(value)
+                    if index is None:
+                        index = object_index[value] = len(sheet.objects)
+                        sheet.objects.append(value)
+                    kinds.append(_OBJECT)
+                    values.append(index)
+            for kinds, values in columns[length:]:
+                kinds.append(_NONE)
+                values.append(0.0)
+            row_lengths.append(length)
+        return sheet
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.row_lengths)
+
+    @property
+    def nbytes(self) -> int:
+        """估算的内存占用（字节）"""
+        size = self.row_lengths.itemsize * len(self.row_lengths)
+        for kinds, values in self.columns:
+            size += len(kinds) + values.itemsize * len(values)
+        size += sum(sys.getsizeof(s) + 8 for s in self.strings)
+        size += sum(sys.getsizeof(o) + 8 for o in self.objects)
+        return size
+
+    def iter_rows(
+        self,
+        min_row: Optional[int] = None,
+        max_row: Optional[int] = None,
+        min_col: Optional[int] = None,
+        max_col: Optional[int] = None,
+        values_only: bool = True,
+    ) -> Iterator[tuple]:
+        start = (min_row or 1) - 1
+        stop = self.n_rows if max_row is None else min(max_row, self.n_rows)
+        first = (min_col or 1) - 1
+        for a in range(start, stop, _DECODE_BATCH_ROWS):
+            yield from self._decode_rows(a, min(a + _DECODE_BATCH_ROWS, stop), first, max_col)
+
+    def _decode_rows(self, a: int, b: int, first: int, last: Optional[int]) -> Iterator[tuple]:
+        lengths = self.row_lengths[a:b]
+        width = last if last is not None else max(lengths, default=0)
+        if width <= first:
+            yield from [()] * (b - a)
+            return
+        empty = [None] * (b - a)
+        cols = [self._decode_column(j, a, b) if j < len(self.columns) else empty for j in range(first, width)]
+        if last is not None:
+            yield from zip(*cols)
+            return
+        for row, length in zip(zip(*cols), lengths):
+            yield row if length == width else row[:length]
+
+    def _decode_column(self, j: int, a: int, b: int) -> list[Any]:
+        kinds, values = self.columns[j]
+        kinds = kinds[a:b]
+        decoded = values[a:b].tolist()
+        # 整批同一类型（常见情况）时按列整体转换
+        if kinds.count(kinds[0]) == len(kinds):
+            kind = kinds[0]
+            if kind == _FLOAT:
+                return decoded
+            if kind == _INT:
+                return list(map(int, decoded))
+            if kind == _STR:
+                return list(map(self.strings.__getitem__, map(int, decoded)))
+            if kind == _NONE:
+                return [None] * len(decoded)
+        strings, objects = self.strings, self.objects
+        for i, kind in enumerate(kinds):
+            if kind == _FLOAT:
+                continue
+            if kind == _NONE:
+                decoded[i] = None
+            elif kind == _STR:
+                decoded[i] = strings[int(decoded[i])]
+            elif kind == _INT:
+                decoded[i] = int(decoded[i])
+            elif kind == _BOOL:
+                decoded[i] = bool(decoded[i])
+            else:
+                decoded[i] = objects[int(decoded[i])]
+        return decoded
+
+
+# =====================================================
+#  缓存
+# =====================================================
+
+class _CachedWorkbook:
+    """一个源文件版本的已解析 Sheet 及选择 Sheet 所需的工作簿信息"""
+
+    __slots__ = ("sheetnames", "active", "sheets", "nbytes")
+
+    def __init__(self, sheetnames: list[str], active: str):
+        self.sheetnames = sheetnames
+        self.active = active
+        self.sheets: dict[str, ColumnarSheet] = {}
+        self.nbytes = 0
+
+
+class ExcelParseCache:
+    """按 (URL, 源文件版本) 缓存列式 Sheet，按估算内存占用做 LRU 淘汰，线程安全"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._workbooks: "OrderedDict[tuple[str, str], _CachedWorkbook]" = OrderedDict()
+        self._seen: "OrderedDict[tuple[str, str, str], None]" = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "builds": 0, "evictions": 0}
+
+    def get(self, url: str, version: str, sheet_name: str) -> Optional[ColumnarSheet]:
+        """查找 Sheet；名称不存在时与 _select_sheet 一致回退到活动 Sheet"""
+        with self._lock:
+            workbook = self._workbooks.get((url, version))
+            sheet = None
+            if workbook is not None:
+                title = sheet_name if sheet_name in workbook.sheetnames else workbook.active
+                sheet = workbook.sheets.get(title)
+            if sheet is None:
+                self._counters["misses"] += 1
+                return None
+            self._workbooks.move_to_end((url, version))
+            self._counters["hits"] += 1
+            return sheet
+
+    def should_build(self, url: str, version: str, title: str) -> bool:
+        """记录一次未命中的访问；同一 Sheet 第二次访问时返回 True（应整表解析入缓存）"""
+        key = (url, version, title)
+        with self._lock:
+            if key in self._seen:
+                del self._seen[key]
+                return True
+            self._seen[key] = None
+            while len(self._seen) > _SEEN_KEYS:
+                self._seen.popitem(last=False)
+            return False
+
+    def put(self, url: str, version: str, sheetnames: list[str], active: str, sheet: ColumnarSheet) -> None:
+        size = sheet.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            workbook = self._workbooks.get((url, version))
+            if workbook is None:
+                workbook = self._workbooks[(url, version)] = _CachedWorkbook(list(sheetnames), active)
+            old = workbook.sheets.get(sheet.title)
+            if old is not None:
+                workbook.nbytes -= old.nbytes
+                self._bytes -= old.nbytes
+            workbook.sheets[sheet.title] = sheet
+            workbook.nbytes += size
+            self._bytes += size
+            self._workbooks.move_to_end((url, version))
+            self._counters["builds"] += 1
+            while self._bytes > self.max_bytes:
+                _, evicted = self._workbooks.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._counters["evictions"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "workbooks": len(self._workbooks), "memory_bytes": self._bytes}
+
+
+# 模块级单例 (惰性初始化)
+_parse_cache: ExcelParseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_excel_parse_cache() -> Optional[ExcelParseCache]:
+    """获取解析结果缓存单例，excel_parse_cache_mb 为 0 时返回 None"""
+    global _parse_cache
+    settings = get_settings()
+    if settings.excel_parse_cache_mb <= 0:
+        return None
+    if _parse_cache is None:
+        with _cache_lock:
+            if _parse_cache is None:
+                _parse_cache = ExcelParseCache(max_bytes=settings.excel_parse_cache_mb * 1024 * 1024)
+    return _parse_cache
+
+
+# =====================================================
+#  API 进程 / CPU 进程池分工
+# =====================================================
+
+class ParseCacheMiss(Exception):
+    """只查缓存执行时 Sheet 未命中（sheet_name 为 None 表示需要加载工作簿本身，如解析定义名称）"""
+
+    def __init__(self, url: str, version: str, sheet_name: Optional[str]):
+        super().__init__(f"{url} [{sheet_name}]")
+        self.url = url
+        self.version = version
+        self.sheet_name = sheet_name
+
+
+class WorkerParse:
+    """
+    CPU 进程池中的一次解析：不读写本进程的缓存。
+    version 为 API 进程只查缓存时确定的源文件版本；build 为 True 时打开的 Sheet 整表解析，
+    (url, 版本, sheetnames, 活动 Sheet, ColumnarSheet) 记入 built，由 API 进程写入缓存。
+    """
+
+    def __init__(self, build: bool, version: Optional[str]):
+        self.build = build
+        self.version = version
+        self.built: list[tuple[str, str, list[str], str, ColumnarSheet]] = []
+
+
+CACHE_ONLY = "cache_only"
+
+# 当前读取的缓存用法：None 直接读写本进程缓存，CACHE_ONLY 未命中即抛 ParseCacheMiss，WorkerParse 见上
+parse_mode: ContextVar[Any] = ContextVar("excel_parse_mode", default=None)
+
+
+def _read_from_cache(func: Callable[..., T], **kwargs: Any) -> T:
+    token = parse_mode.set(CACHE_ONLY)
+    try:
+        return func(**kwargs)
+    finally:
+        parse_mode.reset(token)
+
+
+def _read_in_worker(
+    build: bool, version: Optional[str], func: Callable[..., T], **kwargs: Any,
+) -> tuple[T, list[tuple]]:
+    worker = WorkerParse(build, version)
+    token = parse_mode.set(worker)
+    try:
+        return func(**kwargs), worker.built
+    finally:
+        parse_mode.reset(token)
+
+
+async def cached_excel_read(func: Callable[..., T], **kwargs: Any) -> T:
+    """
+    路由层调用 EXC-04 读取入口（extract_excel_range 等）的包装。
+    缓存命中时在 I/O 线程池中直接返回；未命中时解析派发到 CPU 进程池，
+    同一 Sheet 第二次未命中时由子进程整表解析，结果在本进程写入缓存。
+    只查缓存时确定的源文件版本随调用传给子进程，子进程不再重新计算。
+    缓存关闭时等价于 await run_cpu_bound(func, **kwargs)。
+    """
+    cache = get_excel_parse_cache()
+    if cache is None:
+        return await run_cpu_bound(func, **kwargs)
+
+    try:
+        return await run_io_bound(_read_from_cache, func, **kwargs)
+    except ParseCacheMiss as miss:
+        build = miss.sheet_name is not None and cache.should_build(miss.url, miss.version, miss.sheet_name)
+        version = miss.version
+
+    result, built = await run_cpu_bound(_read_in_worker, build, version, func, **kwargs)
+    for entry in built:
+        await run_io_bound(cache.put, *entry)
+    return result
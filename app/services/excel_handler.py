@@ -5,52 +5,43 @@ Excel 核心业务处理引擎
 """
 
 import re
+import csv
+import json
+import base64
+import hashlib
 import logging
-from io import BytesIO
-from datetime import datetime, date, timedelta
-from typing import Any, Optional, Union
+import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, islice
+from io import BytesIO, StringIO
+from datetime import datetime, date, time, timedelta
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Union
 
-import requests
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.reader.excel import ExcelReader
 from openpyxl.utils import get_column_letter, column_index_from_string
-from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+from app.services.excel_append import ZipAppendUnsupported, append_rows_zip
+from app.services.excel_cache import (
+    CACHE_ONLY, ColumnarSheet, ParseCacheMiss, WorkerParse, get_excel_parse_cache, parse_mode, source_digest,
+)
+from app.services.excel_styles import ExcelStyleRegistry
+from app.services.source_cache import open_source, source_version
 
 logger = logging.getLogger(__name__)
 
 
 # =====================================================
-#  通用样式工具
+#  通用工具
 # =====================================================
 
-_THIN_BORDER = Border(
-    left=Side(style="thin"),
-    right=Side(style="thin"),
-    top=Side(style="thin"),
-    bottom=Side(style="thin"),
-)
-
-_HEADER_FILL = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-_SUMMARY_FILL = PatternFill(start_color="E6F3FF", end_color="E6F3FF", fill_type="solid")
-
 _SUMMARY_KEYWORDS = {"合计", "总计", "Total", "小计", "Subtotal"}
 
 
-def _apply_cell_style(
-    cell,
-    is_header: bool = False,
-    is_summary: bool = False,
-) -> None:
-    """为单元格应用统一的对齐、边框与条件样式"""
-    cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    cell.border = _THIN_BORDER
-    if is_header:
-        cell.font = Font(bold=True, size=11)
-        cell.fill = _HEADER_FILL
-    if is_summary:
-        cell.font = Font(bold=True, size=11)
-        cell.fill = _SUMMARY_FILL
-
-
 def _calculate_title_style(title: str) -> dict:
     """根据标题长度动态计算字号与行高"""
     length = len(title)
@@ -64,22 +55,79 @@ def _calculate_title_style(title: str) -> dict:
         return {"size": 11, "height": 55}
 
 
-def _auto_column_widths(sheet) -> None:
-    """自动根据内容设置列宽"""
-    for col_cells in sheet.columns:
-        max_len = 0
-        col_letter = get_column_letter(col_cells[0].column)
-        for cell in col_cells:
-            try:
-                if cell.value is not None:
-                    # 中文字符按 2 字宽计算
-                    val = str(cell.value)
-                    char_len = sum(2 if ord(c) > 127 else 1 for c in val)
-                    max_len = max(max_len, char_len)
-            except Exception:
-                pass
-        adjusted = min(max(max_len + 3, 8), 60)  # 最小 8, 最大 60
-        sheet.column_dimensions[col_letter].width = adjusted
+# ---------- 列宽估算 ----------
+
+_WIDTH_MIN, _WIDTH_MAX, _WIDTH_PADDING = 8, 60, 3
+_WIDTH_SAMPLE_ROWS = 1000   # 非字符串值：前 N 行逐个测量
+_WIDTH_SAMPLE_STRIDE = 10   # 之后每隔若干行抽样一次
+
+
+@lru_cache(maxsize=1)
+def _wide_char_pattern() -> "re.Pattern[str]":
+    """
+    East Asian Width 为 W/F（全角、宽字符）的码位区间，编译为一个字符类正则。
+    首次使用时由 unicodedata 预计算一次（覆盖 BMP 与 CJK 扩展平面）。
+    """
+    ranges: list[str] = []
+    start = None
+    for cp in range(0x80, 0x40001):
+        if cp < 0x40000 and unicodedata.east_asian_width(chr(cp)) in ("W", "F"):
+            if start is None:
+                start = cp
+            continue
+        if start is not None:
+            ranges.append(f"{re.escape(chr(start))}-{re.escape(chr(cp - 1))}")
+            start = None
+    return re.compile(f"[{''.join(ranges)}]")
+
+
+def _display_width(text: str) -> int:
+    """文本在表格中的显示宽度：宽字符计 2，其余计 1"""
+    if text.isascii():
+        return len(text)
+    return 2 * len(text) - len(_wide_char_pattern().sub("", text))
+
+
+def _estimate_column_widths(
+    rows: Iterable[list[Any]],
+    title: Optional[str] = None,
+    skip_columns: frozenset[int] = frozenset(),
+) -> dict[int, int]:
+    """
+    写入前对原始输入数据做一次遍历估算列宽，返回 {列号: 宽度}。
+
+    - 字符串: 只有 len × 2 可能超过当前最大值时才测量显示宽度
+    - 其他值: 前 _WIDTH_SAMPLE_ROWS 行逐个测量，之后按步长抽样
+    - 某列达到宽度上限后不再测量；skip_columns（手动指定列宽的列）完全跳过
+    - title 计入第 1 列（标题写在 A1）
+    """
+    cap = _WIDTH_MAX - _WIDTH_PADDING
+    max_lens: dict[int, int] = {}
+    if title and 1 not in skip_columns:
+        max_lens[1] = min(_display_width(title), cap)
+
+    for row_idx, row in enumerate(rows):
+        sample = row_idx < _WIDTH_SAMPLE_ROWS or row_idx % _WIDTH_SAMPLE_STRIDE == 0
+        for col_num, value in enumerate(row, 1):
+            current = max_lens.get(col_num)
+            if current is None:
+                if col_num in skip_columns:
+                    continue
+                current = max_lens[col_num] = 0
+            if current >= cap or value is None:
+                continue
+            if isinstance(value, str):
+                if 2 * len(value) <= current:
+                    continue
+                length = _display_width(value)
+            elif sample:
+                length = _display_width(str(value))
+            else:
+                continue
+            if length > current:
+                max_lens[col_num] = min(length, cap)
+
+    return {col: max(length + _WIDTH_PADDING, _WIDTH_MIN) for col, length in max_lens.items()}
 
 
 def _sanitize_filename(name: str, max_length: int = 30) -> str:
@@ -105,119 +153,6 @@ def _parse_excel_style(style: Any) -> Any:
     return None
 
 
-def _apply_style_engine(
-    sheet,
-    data: list[list[Any]],
-    style_config,
-    title_row: bool = True,
-) -> None:
-    """
-    Apply the style engine to a sheet.
-
-    Args:
-        sheet: openpyxl worksheet
-        data: the original data (data[0] = headers, data[1:] = rows)
-        style_config: ExcelStyle instance
-        title_row: whether a title row exists at row 1 (EXC-01 has one, EXC-03 does not)
-    """
-    from app.core.themes import get_theme
-
-    theme = get_theme(style_config.theme)
-    headers = data[0]
-    data_rows = data[1:]
-    num_cols = len(headers)
-    header_row_idx = 2 if title_row else 1
-    first_data_row = header_row_idx + 1
-
-    # --- a) Themed header colors ---
-    if style_config.header_style == "colored":
-        header_fill = PatternFill(
-            start_color=theme.table_header_bg,
-            end_color=theme.table_header_bg,
-            fill_type="solid",
-        )
-        header_font = Font(
-            bold=True, size=11,
-            color=theme.table_header_font,
-        )
-        for col_num in range(1, num_cols + 1):
-            cell = sheet.cell(row=header_row_idx, column=col_num)
-            cell.fill = header_fill
-            cell.font = header_font
-    elif style_config.header_style == "minimal":
-        for col_num in range(1, num_cols + 1):
-            cell = sheet.cell(row=header_row_idx, column=col_num)
-            cell.font = Font(bold=True, size=11)
-    # bold_only: just bold, no fill changes (default _apply_cell_style already does bold)
-
-    # --- b) Freeze panes ---
-    if style_config.freeze_panes:
-        sheet.freeze_panes = style_config.freeze_panes
-
-    # --- c) Auto filter ---
-    if style_config.auto_filter:
-        end_col_letter = get_column_letter(num_cols)
-        sheet.auto_filter.ref = f"A{header_row_idx}:{end_col_letter}{header_row_idx}"
-
-    # --- d) Column widths ---
-    if style_config.column_widths:
-        for col_letter, width in style_config.column_widths.items():
-            sheet.column_dimensions[col_letter].width = width
-
-    # --- e) Alternating rows ---
-    if style_config.alternating_rows and style_config.theme:
-        alt_fill = PatternFill(
-            start_color=theme.table_alt_row_bg,
-            end_color=theme.table_alt_row_bg,
-            fill_type="solid",
-        )
-        for i, _ in enumerate(data_rows):
-            row_idx = first_data_row + i
-            if i % 2 == 1:  # every other row (0-indexed: 1, 3, 5...)
-                for col_num in range(1, num_cols + 1):
-                    sheet.cell(row=row_idx, column=col_num).fill = alt_fill
-
-    # --- f) Row groups ---
-    if style_config.row_groups:
-        rg = style_config.row_groups
-        # If rg is a dict (shouldn't happen after _parse but be safe)
-        from app.schemas.payload_excel import RowGroupConfig
-        if isinstance(rg, dict):
-            rg = RowGroupConfig(**rg)
-        group_col_idx = column_index_from_string(rg.group_column)
-        colors_map = rg.colors or {}
-        # Auto-assign colors for unknown groups
-        auto_colors = ["4472C4", "ED7D31", "A5A5A5", "FFC000", "5B9BD5", "70AD47"]
-        auto_idx = 0
-        for i, row_data in enumerate(data_rows):
-            row_idx = first_data_row + i
-            if group_col_idx - 1 < len(row_data):
-                group_val = str(row_data[group_col_idx - 1]) if row_data[group_col_idx - 1] is not None else ""
-                if group_val and group_val not in colors_map:
-                    colors_map[group_val] = auto_colors[auto_idx % len(auto_colors)]
-                    auto_idx += 1
-                if group_val in colors_map:
-                    # Apply a light tint by using the color directly
-                    color_hex = colors_map[group_val]
-                    # Create a lighter version for row background
-                    light_hex = _lighten_color(color_hex, factor=0.7)
-                    row_fill = PatternFill(
-                        start_color=light_hex,
-                        end_color=light_hex,
-                        fill_type="solid",
-                    )
-                    for col_num in range(1, num_cols + 1):
-                        sheet.cell(row=row_idx, column=col_num).fill = row_fill
-
-    # --- g) Gantt timeline ---
-    if style_config.gantt:
-        gantt = style_config.gantt
-        from app.schemas.payload_excel import GanttConfig
-        if isinstance(gantt, dict):
-            gantt = GanttConfig(**gantt)
-        _render_gantt_timeline(sheet, data, headers, gantt, style_config, title_row)
-
-
 def _lighten_color(hex_color: str, factor: float = 0.7) -> str:
     """Lighten a hex color by mixing with white."""
     hex_color = hex_color.lstrip("#")
@@ -230,100 +165,142 @@ def _lighten_color(hex_color: str, factor: float = 0.7) -> str:
     return f"{r:02X}{g:02X}{b:02X}"
 
 
-def _render_gantt_timeline(
-    sheet,
-    data: list[list[Any]],
-    headers: list,
-    gantt_config,
-    style_config,
-    title_row: bool = True,
-) -> None:
+class _SheetStyler:
     """
-    Render a Gantt timeline as colored cells to the right of the data columns.
+    一个工作表的样式计划。
+    由 ExcelStyle 配置一次性解析出主题、交替行、分组色和甘特时间轴，
+    逐行返回单元格应引用的命名样式（来自 ExcelStyleRegistry）。
 
-    Args:
-        sheet: openpyxl worksheet
-        data: original data (data[0]=headers, data[1:]=rows)
-        headers: header row
-        gantt_config: GanttConfig instance
-        style_config: ExcelStyle instance (for theme colors)
-        title_row: whether row 1 is a title row
+    Style engine features:
+        a) themed header colors   b) freeze panes   c) auto filter   d) column widths
+        e) alternating rows       f) row groups     g) gantt timeline
     """
-    from app.core.themes import get_theme
 
-    theme = get_theme(style_config.theme)
-    data_rows = data[1:]
-    num_data_cols = len(headers)
-    header_row_idx = 2 if title_row else 1
-    first_data_row = header_row_idx + 1
-
-    # Parse timeline boundaries
-    tl_start = datetime.strptime(gantt_config.timeline_start, "%Y-%m-%d").date()
-    tl_end = datetime.strptime(gantt_config.timeline_end, "%Y-%m-%d").date()
-
-    # Calculate time slots
-    slots = _calculate_time_slots(tl_start, tl_end, gantt_config.granularity)
-    if not slots:
-        return
-
-    # Write timeline header columns
-    start_col = num_data_cols + 1
-    for slot_idx, (slot_start, slot_end, label) in enumerate(slots):
-        col = start_col + slot_idx
-        cell = sheet.cell(row=header_row_idx, column=col, value=label)
-        cell.font = Font(bold=True, size=9)
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = _THIN_BORDER
-        sheet.column_dimensions[get_column_letter(col)].width = 6
-
-    # Parse date columns
-    start_col_idx = column_index_from_string(gantt_config.date_columns[0])
-    end_col_idx = column_index_from_string(gantt_config.date_columns[1])
-
-    # Default bar color
-    default_fill = PatternFill(
-        start_color=theme.table_header_bg,
-        end_color=theme.table_header_bg,
-        fill_type="solid",
-    )
+    _AUTO_COLORS = ["4472C4", "ED7D31", "A5A5A5", "FFC000", "5B9BD5", "70AD47"]
 
-    # Fill gantt bars for each data row
-    for i, row_data in enumerate(data_rows):
-        row_idx = first_data_row + i
-        # Get start/end dates from data
-        try:
-            raw_start = row_data[start_col_idx - 1]
-            raw_end = row_data[end_col_idx - 1]
-            if raw_start is None or raw_end is None:
-                continue
-            task_start = _parse_date_value(raw_start)
-            task_end = _parse_date_value(raw_end)
-            if task_start is None or task_end is None:
-                continue
-        except (IndexError, ValueError):
-            continue
+    def __init__(self, styles: ExcelStyleRegistry, headers: list[Any], style_config=None):
+        from app.core.themes import get_theme
 
-        # Determine bar color
-        bar_fill = default_fill
-        if gantt_config.bar_color_column and style_config.row_groups:
-            # Try to get color from row_groups mapping
-            rg = style_config.row_groups
+        self.styles = styles
+        self.num_cols = len(headers)
+        self.config = style_config
+        theme = get_theme(style_config.theme) if style_config else None
+        self.theme = theme
+
+        # --- a) Themed header colors (minimal / bold_only 与默认表头一致) ---
+        colored = style_config is not None and style_config.header_style == "colored"
+        self.header = styles.header(theme if colored else None)
+
+        # --- e) Alternating rows ---
+        self.alt_fill: Optional[str] = None
+        if style_config and style_config.alternating_rows and style_config.theme:
+            self.alt_fill = theme.table_alt_row_bg
+
+        # --- f) Row groups ---
+        self.row_groups = None
+        if style_config and style_config.row_groups:
             from app.schemas.payload_excel import RowGroupConfig
+            rg = style_config.row_groups
             if isinstance(rg, dict):
                 rg = RowGroupConfig(**rg)
-            bc_idx = column_index_from_string(gantt_config.bar_color_column)
-            if bc_idx - 1 < len(row_data):
-                group_val = str(row_data[bc_idx - 1]) if row_data[bc_idx - 1] is not None else ""
-                if rg.colors and group_val in rg.colors:
-                    color = rg.colors[group_val]
-                    bar_fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-
-        # Fill cells in the timeline that overlap with task
-        for slot_idx, (slot_start, slot_end, _label) in enumerate(slots):
-            col = num_data_cols + 1 + slot_idx
-            if task_start <= slot_end and task_end >= slot_start:
-                sheet.cell(row=row_idx, column=col).fill = bar_fill
-                sheet.cell(row=row_idx, column=col).border = _THIN_BORDER
+            self.row_groups = rg
+            self._group_col = column_index_from_string(rg.group_column) - 1
+            self._group_colors = rg.colors or {}
+            self._group_fills: dict[str, str] = {}
+            self._auto_idx = 0
+
+        # --- g) Gantt timeline ---
+        self.gantt = None
+        self.slots: list[tuple[date, date, str]] = []
+        if style_config and style_config.gantt:
+            from app.schemas.payload_excel import GanttConfig
+            gantt = style_config.gantt
+            if isinstance(gantt, dict):
+                gantt = GanttConfig(**gantt)
+            tl_start = datetime.strptime(gantt.timeline_start, "%Y-%m-%d").date()
+            tl_end = datetime.strptime(gantt.timeline_end, "%Y-%m-%d").date()
+            self.slots = _calculate_time_slots(tl_start, tl_end, gantt.granularity)
+            if self.slots:
+                self.gantt = gantt
+                self.gantt_header = styles.gantt_header()
+                self._gantt_start = column_index_from_string(gantt.date_columns[0]) - 1
+                self._gantt_end = column_index_from_string(gantt.date_columns[1]) - 1
+
+    def row(self, index: int, row_data: list[Any]) -> tuple[str, Optional[str]]:
+        """
+        第 index 个数据行的样式。
+        Returns:
+            (数据单元格样式名, 短行补齐到表头宽度的空白单元格样式名或 None)
+        """
+        summary = bool(row_data and str(row_data[0]) in _SUMMARY_KEYWORDS)
+        fill = None
+        if self.alt_fill is not None and index % 2 == 1:  # every other row (0-indexed: 1, 3, 5...)
+            fill = self.alt_fill
+        if self.row_groups is not None:
+            fill = self._group_fill(row_data) or fill
+        body = self.styles.body(fill, summary)
+        return body, (self.styles.fill_only(fill) if fill else None)
+
+    def _group_fill(self, row_data: list[Any]) -> Optional[str]:
+        if self._group_col >= len(row_data):
+            return None
+        raw = row_data[self._group_col]
+        group_val = str(raw) if raw is not None else ""
+        if group_val and group_val not in self._group_colors:
+            # Auto-assign colors for unknown groups
+            self._group_colors[group_val] = self._AUTO_COLORS[self._auto_idx % len(self._AUTO_COLORS)]
+            self._auto_idx += 1
+        if group_val not in self._group_colors:
+            return None
+        light = self._group_fills.get(group_val)
+        if light is None:
+            light = _lighten_color(self._group_colors[group_val], factor=0.7)
+            self._group_fills[group_val] = light
+        return light
+
+    def gantt_cells(self, row_data: list[Any]) -> list[tuple[int, str]]:
+        """本行需要着色的时间轴列: [(表头之后的第几列, 样式名)]；日期无法解析时为空"""
+        if self.gantt is None:
+            return []
+        try:
+            task_start = _parse_date_value(row_data[self._gantt_start])
+            task_end = _parse_date_value(row_data[self._gantt_end])
+        except IndexError:
+            return []
+        if task_start is None or task_end is None:
+            return []
+
+        color = self.theme.table_header_bg
+        if self.gantt.bar_color_column and self.row_groups is not None:
+            bc_idx = column_index_from_string(self.gantt.bar_color_column) - 1
+            if bc_idx < len(row_data):
+                group_val = str(row_data[bc_idx]) if row_data[bc_idx] is not None else ""
+                if self.row_groups.colors and group_val in self.row_groups.colors:
+                    color = self.row_groups.colors[group_val]
+        style = self.styles.gantt_bar(color)
+        return [
+            (slot_idx, style)
+            for slot_idx, (slot_start, slot_end, _label) in enumerate(self.slots)
+            if task_start <= slot_end and task_end >= slot_start
+        ]
+
+    def column_widths(
+        self, headers: list[Any], data_rows: list[list[Any]], title: Optional[str] = None,
+    ) -> dict[int, float]:
+        """最终列宽：甘特时间轴窄列 > 手动列宽 > 按输入数据估算（手动指定的列不参与估算）"""
+        manual: dict[int, float] = {}
+        if self.config and self.config.column_widths:
+            manual = {
+                column_index_from_string(col_letter): width
+                for col_letter, width in self.config.column_widths.items()
+            }
+        widths: dict[int, float] = _estimate_column_widths(
+            chain([headers], data_rows), title, skip_columns=frozenset(manual),
+        )
+        widths.update(manual)
+        for slot_idx in range(len(self.slots) if self.gantt else 0):
+            widths[self.num_cols + 1 + slot_idx] = 6
+        return widths
 
 
 def _parse_date_value(val) -> Optional[date]:
@@ -400,6 +377,168 @@ def _calculate_time_slots(
     return slots
 
 
+# =====================================================
+#  工作表写入（普通 / write-only 流式）
+# =====================================================
+# 数据行数超过 excel_streaming_row_threshold 时改用 openpyxl write-only 工作簿：
+# 每行生成带样式的 WriteOnlyCell 后立即写出到临时 XML，不保留 Cell 对象模型，
+# 内存占用与行数无关。两种模式共用 _sheet_rows 生成的 (值, 样式名) 行，外观完全一致。
+# write-only 模式下列宽、冻结窗格、行高必须在写第一行之前确定，两种模式都在写入前从输入数据估算列宽。
+
+def _use_streaming(row_count: int) -> bool:
+    """数据行数是否达到流式写入阈值"""
+    from app.core.config import get_settings
+    return row_count > get_settings().excel_streaming_row_threshold
+
+
+def _covered_merge_cells(merge_cells: list[str]) -> tuple[list[str], set[tuple[int, int]]]:
+    """
+    校验合并区域，返回 (有效区域, 被合并覆盖的非左上角单元格坐标)。
+    合并后这些单元格的值会被清空，写入时直接置空。
+    """
+    from openpyxl.worksheet.cell_range import CellRange
+
+    valid, covered = [], set()
+    for merge_range in merge_cells:
+        try:
+            cr = CellRange(merge_range)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"合并单元格 '{merge_range}' 失败: {e}")
+            continue
+        valid.append(merge_range)
+        for row in range(cr.min_row, cr.max_row + 1):
+            for col in range(cr.min_col, cr.max_col + 1):
+                if (row, col) != (cr.min_row, cr.min_col):
+                    covered.add((row, col))
+    return valid, covered
+
+
+_Row = list[Optional[tuple[Any, str]]]
+
+
+def _sheet_rows(
+    styler: _SheetStyler,
+    headers: list[Any],
+    data_rows: list[list[Any]],
+    title: Optional[str],
+    covered: set[tuple[int, int]],
+) -> Iterator[_Row]:
+    """逐行生成 [(值, 样式名) | None]：标题行(可选)、表头行（含甘特时间轴表头）、数据行"""
+    num_cols = styler.num_cols
+    if title:
+        yield [(title, styler.styles.title(_calculate_title_style(title)["size"]))]
+
+    header_row_idx = 2 if title else 1
+    row: _Row = [
+        (None if (header_row_idx, col_num) in covered else header, styler.header)
+        for col_num, header in enumerate(headers, 1)
+    ]
+    if styler.gantt is not None:
+        row += [(label, styler.gantt_header) for _, _, label in styler.slots]
+    yield row
+
+    for i, row_data in enumerate(data_rows):
+        row_idx = header_row_idx + 1 + i
+        cell_style, pad_style = styler.row(i, row_data)
+        if covered:
+            row = [
+                (None if (row_idx, col_num) in covered else value, cell_style)
+                for col_num, value in enumerate(row_data, 1)
+            ]
+        else:
+            row = [(value, cell_style) for value in row_data]
+        if pad_style is not None and len(row) < num_cols:
+            # 行底色覆盖整行表头宽度，短行补齐空白单元格
+            row += [(None, pad_style)] * (num_cols - len(row))
+        for offset, bar_style in styler.gantt_cells(row_data):
+            col_idx = num_cols + offset
+            row.extend([None] * (col_idx + 1 - len(row)))
+            existing = row[col_idx]
+            row[col_idx] = (existing[0] if existing else None, bar_style)
+        yield row
+
+
+def _write_sheet(
+    sheet,
+    styles: ExcelStyleRegistry,
+    headers: list[Any],
+    data_rows: list[list[Any]],
+    style_config=None,
+    title: Optional[str] = None,
+    merge_cells: Optional[list[str]] = None,
+) -> None:
+    """
+    写入一个工作表：标题行(可选) / 表头 / 数据行，并应用样式引擎。
+    sheet 为 WriteOnlyWorksheet 时逐行流式写出。
+
+    Args:
+        sheet:        Worksheet 或 WriteOnlyWorksheet
+        styles:       工作簿的样式注册表
+        headers:      表头行
+        data_rows:    数据行
+        style_config: ExcelStyle 实例或 None
+        title:        EXC-01 的标题（合并居中于首行）；EXC-03 为 None
+        merge_cells:  EXC-03 的合并区域列表
+    """
+    streaming = isinstance(sheet, WriteOnlyWorksheet)
+    styler = _SheetStyler(styles, headers, style_config)
+    merges, covered = _covered_merge_cells(list(merge_cells or []))
+    header_row_idx = 2 if title else 1
+    if title:
+        merges.insert(0, f"A1:{get_column_letter(len(headers))}1")
+        sheet.row_dimensions[1].height = _calculate_title_style(title)["height"]
+
+    # ---------- 写第一行之前: 列宽 / 冻结窗格 ----------
+    for col_num, width in sorted(styler.column_widths(headers, data_rows, title).items()):
+        sheet.column_dimensions[get_column_letter(col_num)].width = width
+    if style_config and style_config.freeze_panes:
+        sheet.freeze_panes = style_config.freeze_panes
+
+    # ---------- 逐行写入 ----------
+    rows = _sheet_rows(styler, headers, data_rows, title, covered)
+    if streaming:
+        for row in rows:
+            sheet.append([_write_only_cell(sheet, item) for item in row])
+    else:
+        for row_idx, row in enumerate(rows, 1):
+            for col_num, item in enumerate(row, 1):
+                if item is not None:
+                    sheet.cell(row=row_idx, column=col_num, value=item[0]).style = item[1]
+
+    # ---------- 写完所有行之后: 合并 / 筛选 ----------
+    for merge_range in merges:
+        if streaming:
+            sheet.merged_cells.add(merge_range)
+        else:
+            sheet.merge_cells(merge_range)
+    if style_config and style_config.auto_filter:
+        sheet.auto_filter.ref = f"A{header_row_idx}:{get_column_letter(len(headers))}{header_row_idx}"
+
+
+def _write_only_cell(sheet, item: Optional[tuple[Any, str]]) -> Optional[WriteOnlyCell]:
+    if item is None:
+        return None
+    cell = WriteOnlyCell(sheet, value=item[0])
+    cell.style = item[1]
+    return cell
+
+
+def _new_workbook(row_count: int) -> openpyxl.Workbook:
+    """按数据量选择普通工作簿或 write-only 工作簿（后者不含默认 Sheet）"""
+    if _use_streaming(row_count):
+        return openpyxl.Workbook(write_only=True)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    return wb
+
+
+def _save_workbook(wb: openpyxl.Workbook) -> BytesIO:
+    output = BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
 # =====================================================
 #  EXC-01: create_excel_from_array
 # =====================================================
@@ -412,6 +551,7 @@ def create_excel_from_array(
 ) -> BytesIO:
     """
     从二维数组创建简单 Excel 文件。
+    数据行数超过 excel_streaming_row_threshold 时自动使用流式写入。
 
     Args:
         title:      表格标题（首行合并居中）
@@ -423,67 +563,23 @@ def create_excel_from_array(
         BytesIO 对象，包含生成的 .xlsx 数据
     """
     style_config = _parse_excel_style(style)
-
-    wb = openpyxl.Workbook()
-    sheet = wb.active
-    sheet.title = sheet_name
-
     headers = data[0]
     data_rows = data[1:]
-    end_col = get_column_letter(len(headers))
-
-    # ---------- 标题行 ----------
-    title_style = _calculate_title_style(title)
-    sheet["A1"] = title
-    title_cell = sheet["A1"]
-    title_cell.font = Font(size=title_style["size"], bold=True)
-    title_cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    sheet.merge_cells(f"A1:{end_col}1")
-    sheet.row_dimensions[1].height = title_style["height"]
-
-    # ---------- 表头行 ----------
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=2, column=col_num, value=header)
-        _apply_cell_style(cell, is_header=True)
-
-    # ---------- 数据行 ----------
-    for row_idx, row_data in enumerate(data_rows, 3):
-        is_summary = bool(row_data and str(row_data[0]) in _SUMMARY_KEYWORDS)
-        for col_num, value in enumerate(row_data, 1):
-            cell = sheet.cell(row=row_idx, column=col_num, value=value)
-            _apply_cell_style(cell, is_summary=is_summary)
-
-    # ---------- 自动列宽 ----------
-    _auto_column_widths(sheet)
-
-    # ---------- Style engine (optional) ----------
-    if style_config:
-        # Column widths override: skip auto for specified columns
-        if style_config.column_widths:
-            for col_letter, width in style_config.column_widths.items():
-                sheet.column_dimensions[col_letter].width = width
-        _apply_style_engine(sheet, data, style_config, title_row=True)
 
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
+    wb = _new_workbook(len(data_rows))
+    sheet = wb.create_sheet(title=sheet_name)
+    _write_sheet(sheet, ExcelStyleRegistry(wb), headers, data_rows, style_config, title=title)
+    return _save_workbook(wb)
 
 
 # =====================================================
 #  EXC-02: append_rows_to_excel
 # =====================================================
 
-def _download_excel_from_url(url: str) -> BytesIO:
-    """从公网 URL 下载 Excel 文件到内存"""
+def _download_excel_from_url(url: str) -> BinaryIO:
+    """打开公网 URL 上的 Excel 文件（经源文件缓存），调用方负责 close"""
     logger.info(f"正在下载 Excel 文件: {url}")
-    resp = requests.get(
-        str(url),
-        timeout=60,
-        headers={"User-Agent": "SGA-Office/1.0"},
-    )
-    resp.raise_for_status()
-    return BytesIO(resp.content)
+    return open_source(str(url))
 
 
 def append_rows_to_excel(
@@ -493,6 +589,8 @@ def append_rows_to_excel(
 ) -> BytesIO:
     """
     下载已有 Excel，在指定 Sheet 末尾追加行数据，返回新的 BytesIO。
+    优先在 zip 层增量追加（见 app.services.excel_append）：其余部件原样拷贝，
+    图表、图片等 openpyxl 不支持的内容不受影响；源文件结构不受支持时回退为完整加载。
 
     Args:
         source_excel_url: 源文件公网 URL
@@ -502,29 +600,57 @@ def append_rows_to_excel(
     Returns:
         BytesIO 对象，包含追加后的 .xlsx 数据
     """
-    excel_data = _download_excel_from_url(source_excel_url)
-    wb = openpyxl.load_workbook(excel_data)
+    return append_rows_batch(source_excel_url, [(sheet_name, rows)])
 
-    if sheet_name in wb.sheetnames:
-        sheet = wb[sheet_name]
-    else:
-        # 如果指定 Sheet 不存在，使用第一个 Sheet
-        logger.warning(f"Sheet '{sheet_name}' 不存在，使用第一个 Sheet: {wb.sheetnames[0]}")
-        sheet = wb.active
 
-    # 找到当前最后一行
-    max_row = sheet.max_row
+def append_rows_batch(
+    source_excel_url: str,
+    appends: list[tuple[str, list[list[Any]]]],
+) -> BytesIO:
+    """
+    把多次追加合并为一次读-改-写：源文件只下载一次，按顺序追加全部行，只产出一个文件。
+    同一 Sheet 的多次追加按提交顺序拼接后一次写入。
 
-    for row_offset, row_data in enumerate(rows, 1):
-        target_row = max_row + row_offset
-        for col_num, value in enumerate(row_data, 1):
-            cell = sheet.cell(row=target_row, column=col_num, value=value)
-            _apply_cell_style(cell)
+    Args:
+        source_excel_url: 源文件公网 URL
+        appends:          [(sheet_name, rows)]，按提交顺序
 
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
+    Returns:
+        BytesIO 对象，包含追加后的 .xlsx 数据
+    """
+    groups: dict[str, list[list[Any]]] = {}
+    for sheet_name, rows in appends:
+        groups.setdefault(sheet_name, []).extend(rows)
+
+    with _download_excel_from_url(source_excel_url) as excel_data:
+        try:
+            data: BinaryIO = excel_data
+            for sheet_name, rows in groups.items():
+                data = append_rows_zip(data, rows, sheet_name)
+            return data
+        except ZipAppendUnsupported as e:
+            logger.warning(f"zip 级追加不适用，回退为完整加载: {e}")
+        excel_data.seek(0)
+        wb = openpyxl.load_workbook(excel_data)
+
+    body_style = ExcelStyleRegistry(wb).body()
+    for sheet_name, rows in groups.items():
+        if sheet_name in wb.sheetnames:
+            sheet = wb[sheet_name]
+        else:
+            # 如果指定 Sheet 不存在，使用第一个 Sheet
+            logger.warning(f"Sheet '{sheet_name}' 不存在，使用第一个 Sheet: {wb.sheetnames[0]}")
+            sheet = wb.active
+
+        # 找到当前最后一行
+        max_row = sheet.max_row
+
+        for row_offset, row_data in enumerate(rows, 1):
+            target_row = max_row + row_offset
+            for col_num, value in enumerate(row_data, 1):
+                sheet.cell(row=target_row, column=col_num, value=value).style = body_style
+
+    return _save_workbook(wb)
 
 
 # =====================================================
@@ -538,6 +664,8 @@ def generate_complex_excel(
 ) -> BytesIO:
     """
     生成包含多个 Sheet、合并单元格、预埋公式的行业级报表。
+    所有 Sheet 的数据总行数超过 excel_streaming_row_threshold 时自动使用流式写入。
+    以 '=' 开头的字符串值由 openpyxl 自动识别为公式。
 
     Args:
         title:      报表总标题（会写入第一个 Sheet 的文件属性）
@@ -548,63 +676,22 @@ def generate_complex_excel(
         BytesIO 对象
     """
     global_style = _parse_excel_style(style)
-    wb = openpyxl.Workbook()
+    wb = _new_workbook(sum(len(sdef["data"]) for sdef in sheets_def))
     wb.properties.title = title
+    styles = ExcelStyleRegistry(wb)
+
+    for sdef in sheets_def:
+        sheet = wb.create_sheet(title=sdef["sheet_name"])
+        _write_sheet(
+            sheet,
+            styles,
+            sdef["headers"],
+            sdef["data"],
+            _parse_excel_style(sdef.get("style")) or global_style,
+            merge_cells=sdef.get("merge_cells") or [],
+        )
 
-    for idx, sdef in enumerate(sheets_def):
-        if idx == 0:
-            sheet = wb.active
-            sheet.title = sdef["sheet_name"]
-        else:
-            sheet = wb.create_sheet(title=sdef["sheet_name"])
-
-        headers = sdef["headers"]
-        data_rows = sdef["data"]
-        end_col = get_column_letter(len(headers))
-
-        # ---------- 表头行 (Row 1) ----------
-        for col_num, header in enumerate(headers, 1):
-            cell = sheet.cell(row=1, column=col_num, value=header)
-            _apply_cell_style(cell, is_header=True)
-
-        # ---------- 数据行 ----------
-        for row_idx, row_data in enumerate(data_rows, 2):
-            is_summary = bool(row_data and str(row_data[0]) in _SUMMARY_KEYWORDS)
-            for col_num, value in enumerate(row_data, 1):
-                cell = sheet.cell(row=row_idx, column=col_num)
-
-                # 如果值以 '=' 开头，认为是 Excel 公式
-                if isinstance(value, str) and value.startswith("="):
-                    cell.value = value  # openpyxl 会自动识别公式
-                else:
-                    cell.value = value
-
-                _apply_cell_style(cell, is_summary=is_summary)
-
-        # ---------- 合并单元格 ----------
-        merge_cells = sdef.get("merge_cells") or []
-        for merge_range in merge_cells:
-            try:
-                sheet.merge_cells(merge_range)
-            except Exception as e:
-                logger.warning(f"合并单元格 '{merge_range}' 失败: {e}")
-
-        # ---------- 自动列宽 ----------
-        _auto_column_widths(sheet)
-
-        # ---------- Style engine (per-sheet or global) ----------
-        sheet_style = _parse_excel_style(sdef.get("style")) or global_style
-        if sheet_style:
-            full_data = [headers] + data_rows
-            if sheet_style.column_widths:
-                for col_letter, width in sheet_style.column_widths.items():
-                    sheet.column_dimensions[col_letter].width = width
-            _apply_style_engine(sheet, full_data, sheet_style, title_row=False)
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
+    return _save_workbook(wb)
 
 
 # =====================================================
@@ -629,123 +716,641 @@ def _parse_cell_range(cell_range: str) -> tuple[int, int, int, int]:
     return start_row, end_row, start_col, end_col
 
 
+class _ReadOnlySheet(ReadOnlyWorksheet):
+    """
+    只读工作表：打开时只探测 <dimension>。
+    openpyxl 在缺少 <dimension> 时（如 write-only 模式生成的文件）会把整张表解析到
+    </sheetData> 才放弃，且加载工作簿时对每个 Sheet 都执行一次；
+    <dimension> 只可能出现在 <sheetData> 之前，遇到 <sheetData> 开始标签即可停止。
+    """
+
+    def _get_size(self):
+        from xml.etree.ElementTree import iterparse
+        from openpyxl.worksheet.dimensions import SheetDimension
+        from openpyxl.xml.constants import SHEET_MAIN_NS
+
+        with self._get_source() as src:
+            for _event, element in iterparse(src, events=("start",)):
+                if element.tag == f"{{{SHEET_MAIN_NS}}}dimension":
+                    dim = SheetDimension.from_tree(element)
+                    self._min_column, self._min_row, self._max_column, self._max_row = dim.boundaries
+                    return
+                if element.tag == f"{{{SHEET_MAIN_NS}}}sheetData":
+                    return
+
+
+class _ReadOnlyReader(ExcelReader):
+    """只读模式的工作簿读取器，Sheet 使用 _ReadOnlySheet"""
+
+    def read_worksheets(self):
+        for sheet, rel in self.parser.find_sheets():
+            if rel.target not in self.valid_files or "chartsheet" in rel.Type:
+                continue
+            ws = _ReadOnlySheet(self.wb, sheet.name, rel.target, self.shared_strings)
+            ws.sheet_state = sheet.state
+            self.wb._sheets.append(ws)
+
+
+def _load_read_only_workbook(excel_data: BinaryIO) -> openpyxl.Workbook:
+    """以只读 + 仅值模式打开工作簿；Sheet 内容在迭代时才从 zip 中流式解析"""
+    reader = _ReadOnlyReader(excel_data, read_only=True, data_only=True)
+    reader.read()
+    return reader.wb
+
+
+# ---------- 分页游标 ----------
+# 游标为 base64url(JSON)，记录下一页的 offset 与查询指纹，不保存任何服务端状态：
+# 源文件不变时，同一游标重复请求总是得到同一页。指纹不一致说明游标不属于本次查询。
+
+def _extract_fingerprint(
+    source_excel_url: str, sheet_name: str, cell_range: Optional[str], keyword: Optional[str],
+) -> str:
+    raw = json.dumps([str(source_excel_url), sheet_name, cell_range, keyword], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_extract_cursor(fingerprint: str, offset: int) -> str:
+    raw = json.dumps({"v": 1, "q": fingerprint, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_extract_cursor(cursor: str, fingerprint: str) -> int:
+    """解析游标并校验其属于本次查询，返回 offset"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        query, offset = payload["q"], payload["o"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("cursor 无法解析，请将上一页响应中的 next_cursor 原样传回") from e
+    if query != fingerprint or not isinstance(offset, int) or offset < 0:
+        raise ValueError("cursor 与本次查询条件（文件 / Sheet / 区域 / 关键字）不匹配")
+    return offset
+
+
+# ---------- 按行惰性读取 ----------
+
+def _select_sheet(wb, sheet_name: str) -> tuple[Any, str]:
+    """按名称选择 Sheet，不存在时回退到活动 Sheet，返回 (sheet, 实际名称)"""
+    if sheet_name in wb.sheetnames:
+        return wb[sheet_name], sheet_name
+    sheet = wb.active
+    return sheet, sheet.title
+
+
+class _SourceWorkbook:
+    """
+    一次请求内打开的源工作簿。Sheet 优先取自解析结果缓存（ColumnarSheet）；
+    未命中时以只读模式打开，同一 Sheet 第二次访问时整表解析入缓存。
+    缓存键中的版本取 ETag / Last-Modified（见 source_version），全部命中时不打开源文件；
+    源文件在首次需要时才打开，只读工作簿按需从 zip 中流式解析，Sheet 只在关闭前有效。
+    缓存的用法随 excel_cache.parse_mode 而定（只查缓存 / CPU 进程池中解析，见 cached_excel_read）。
+    """
+
+    def __init__(self, source_excel_url: str):
+        self.url = str(source_excel_url)
+        self.mode = parse_mode.get()
+        self._excel_data: Optional[BinaryIO] = None
+        self._wb: Optional[openpyxl.Workbook] = None
+        self._opened: dict[str, Any] = {}   # 本次请求内已打开的 Sheet，按实际名称
+        if isinstance(self.mode, WorkerParse):
+            self.cache = None
+            self.version = self.mode.version
+        else:
+            self.cache = get_excel_parse_cache()
+            self.version = self._resolve_version() if self.cache is not None else None
+
+    def _resolve_version(self) -> str:
+        version = source_version(self.url)
+        if version is None:
+            version = f"sha256:{source_digest(self.excel_data)}"
+        return version
+
+    @property
+    def excel_data(self) -> BinaryIO:
+        """源文件（首次访问时打开）"""
+        if self._excel_data is None:
+            self._excel_data = _download_excel_from_url(self.url)
+        return self._excel_data
+
+    @property
+    def wb(self) -> openpyxl.Workbook:
+        """只读工作簿（首次访问时加载，缓存全部命中时不加载）"""
+        if self._wb is None:
+            if self.mode == CACHE_ONLY:
+                raise ParseCacheMiss(self.url, self.version, None)
+            self._wb = _load_read_only_workbook(self.excel_data)
+        return self._wb
+
+    def sheet(self, sheet_name: str) -> tuple[Any, str]:
+        """
+        按名称选择 Sheet（不存在时回退到活动 Sheet），返回 (sheet, 实际名称)。
+        同一请求内同一 Sheet 只打开一次。
+        """
+        cache = self.cache
+        if cache is not None:
+            cached = cache.get(self.url, self.version, sheet_name)
+            if cached is not None:
+                return cached, cached.title
+            if self.mode == CACHE_ONLY:
+                raise ParseCacheMiss(self.url, self.version, sheet_name)
+
+        sheet, title = _select_sheet(self.wb, sheet_name)
+        if title in self._opened:
+            return self._opened[title], title
+        if self._should_build(title):
+            values, max_column = _iter_sheet_values(sheet)
+            sheet = ColumnarSheet.from_rows(title, max_column, values)
+            entry = (self.url, self.version, self.wb.sheetnames, self.wb.active.title, sheet)
+            if cache is not None:
+                cache.put(*entry)
+            else:
+                self.mode.built.append(entry)
+        self._opened[title] = sheet
+        return sheet, title
+
+    def _should_build(self, title: str) -> bool:
+        if isinstance(self.mode, WorkerParse):
+            return self.mode.build and self.version is not None
+        return self.cache is not None and self.cache.should_build(self.url, self.version, title)
+
+    def close(self) -> None:
+        if self._wb is not None:
+            self._wb.close()
+        if self._excel_data is not None:
+            self._excel_data.close()
+
+
+@contextmanager
+def _open_source_workbook(source_excel_url: str) -> Iterator[_SourceWorkbook]:
+    source = _SourceWorkbook(source_excel_url)
+    try:
+        yield source
+    finally:
+        source.close()
+
+
+def _iter_sheet_values(sheet, min_row: int = 1) -> tuple[Iterator[tuple], int]:
+    """
+    从 min_row 行起逐行迭代单元格值，返回 (行迭代器, 已知列数)。
+    只读模式下 <dimension> 可能缺失或不准确：不用它截断行，只作为列数下限；
+    各行按 XML 中实际存在的单元格返回，长度可能不一，由调用方补齐。
+    """
+    max_column = sheet.max_column or 0
+    if isinstance(sheet, ReadOnlyWorksheet):
+        sheet.reset_dimensions()
+    return sheet.iter_rows(min_row=min_row, values_only=True), max_column
+
+
+def _iter_window(sheet, start_row: int, end_row: int, start_col: int, end_col: int) -> Iterator[tuple]:
+    """读取矩形窗口：解析到 end_row 即停止；工作表行数不足时以空行补齐"""
+    count = 0
+    for row in sheet.iter_rows(
+        min_row=start_row, max_row=end_row, min_col=start_col, max_col=end_col, values_only=True,
+    ):
+        count += 1
+        yield row
+    for _ in range(end_row - start_row + 1 - count):
+        yield ()
+
+
+def _until_empty(rows: Iterator[tuple]) -> Iterator[tuple]:
+    """逐行返回，遇到全空行即停止"""
+    for row in rows:
+        if all(val is None for val in row):
+            return
+        yield row
+
+
+def _trim_trailing_empty(rows: Iterator[tuple]) -> Iterator[tuple]:
+    """去掉末尾没有任何单元格的行（中间的空行照常返回）"""
+    pending: list[tuple] = []
+    for row in rows:
+        if not row:
+            pending.append(row)
+            continue
+        yield from pending
+        pending.clear()
+        yield row
+
+
+def _open_extract(
+    sheet, cell_range: Optional[str], keyword: Optional[str],
+) -> tuple[Optional[tuple], Iterator[tuple], int]:
+    """
+    定位提取区域，返回 (表头行, 数据行迭代器, 已知列数)。
+    关键字未命中时表头为 None。数据行在迭代时才解析，调用方按需截取。
+    """
+    if keyword:
+        values, width = _iter_sheet_values(sheet)
+        for row in values:
+            if any(val and keyword in str(val) for val in row):
+                return row, _until_empty(values), max(width, len(row))
+        return None, iter(()), 0
+
+    if cell_range:
+        start_row, end_row, start_col, end_col = _parse_cell_range(cell_range)
+        rows = _iter_window(sheet, start_row, end_row, start_col, end_col)
+        width = end_col - start_col + 1
+    else:
+        # 全量读取：从 A1 到最后一个有单元格的行
+        values, width = _iter_sheet_values(sheet)
+        rows = _trim_trailing_empty(values)
+    header = next(rows, ())
+    return header, rows, max(width, len(header), 1)
+
+
+def _pad_rows(rows: list[tuple], width: int) -> list[list[Any]]:
+    return [list(row) + [None] * (width - len(row)) for row in rows]
+
+
+def _header_strings(header: tuple, width: int) -> list[str]:
+    return [str(val) if val is not None else "" for val in _pad_rows([header], width)[0]]
+
+
+# ---------- 入口 ----------
+
 def extract_excel_range(
     source_excel_url: str,
     sheet_name: str = "Sheet1",
     cell_range: Optional[str] = None,
     keyword: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    orient: str = "rows",
 ) -> dict:
     """
     从远程 Excel 中精准提取局部数据。
+    以只读模式打开工作簿：只解析目标 Sheet 的 XML，且读到本页最后一行（多读一行判断是否还有下一页）即停止。
+    同一文件再次提取时从解析结果缓存读取（见 app.services.excel_cache）。
 
     Args:
         source_excel_url: 文件 URL
         sheet_name:       Sheet 名称
         cell_range:       单元格范围 (如 'A1:D10')
         keyword:          关键字搜索
+        offset:           跳过的数据行数（不含表头）
+        limit:            本页最多返回的数据行数，None 表示全部
+        cursor:           上一页返回的 next_cursor，提供时覆盖 offset
+        orient:           rows（按行）/ columns（按列，与 headers 一一对应）
 
     Returns:
-        dict: {"sheet_name", "headers", "data", "total_rows"}
+        dict: {"sheet_name", "headers", "data" | "columns", "total_rows",
+               "offset", "has_more", "next_cursor"}
     """
-    excel_data = _download_excel_from_url(source_excel_url)
-    wb = openpyxl.load_workbook(excel_data, data_only=True)
-
-    # 确定目标 Sheet
-    if sheet_name in wb.sheetnames:
-        sheet = wb[sheet_name]
+    fingerprint = _extract_fingerprint(source_excel_url, sheet_name, cell_range, keyword)
+    if cursor:
+        offset = _decode_extract_cursor(cursor, fingerprint)
+
+    with _open_source_workbook(source_excel_url) as source:
+        sheet, sheet_name = source.sheet(sheet_name)
+        header, rows, width = _open_extract(sheet, cell_range, keyword)
+        stop = None if limit is None else offset + limit + 1
+        page = list(islice(rows, offset, stop))
+
+    has_more = limit is not None and len(page) > limit
+    if has_more:
+        page = page[:limit]
+
+    if header is None:
+        headers, data = [], []
     else:
-        sheet = wb.active
-        sheet_name = sheet.title
+        width = max([width] + [len(row) for row in page])
+        headers = _header_strings(header, width)
+        data = _pad_rows(page, width)
 
-    # ---------- 关键字搜索模式 ----------
-    if keyword:
-        return _extract_by_keyword(sheet, sheet_name, keyword)
-
-    # ---------- 精确范围模式 ----------
-    if cell_range:
-        start_row, end_row, start_col, end_col = _parse_cell_range(cell_range)
-    else:
-        # 全量读取
-        start_row = 1
-        end_row = sheet.max_row
-        start_col = 1
-        end_col = sheet.max_column
-
-    # 提取表头（第一行作为 headers）
-    headers = []
-    for col in range(start_col, end_col + 1):
-        val = sheet.cell(row=start_row, column=col).value
-        headers.append(str(val) if val is not None else "")
-
-    # 提取数据行
-    data = []
-    for row in range(start_row + 1, end_row + 1):
-        row_data = []
-        for col in range(start_col, end_col + 1):
-            val = sheet.cell(row=row, column=col).value
-            row_data.append(val)
-        data.append(row_data)
-
-    return {
+    result = {
         "sheet_name": sheet_name,
         "headers": headers,
-        "data": data,
         "total_rows": len(data),
+        "offset": offset,
+        "has_more": has_more,
+        "next_cursor": _encode_extract_cursor(fingerprint, offset + len(data)) if has_more else None,
     }
+    if orient == "columns":
+        result["columns"] = [list(col) for col in zip(*data)] if data else [[] for _ in headers]
+    else:
+        result["data"] = data
+    return result
+
+
+# ---------- 流式 CSV / NDJSON ----------
+
+_STREAM_BATCH_ROWS = 1000
 
 
-def _extract_by_keyword(sheet, sheet_name: str, keyword: str) -> dict:
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_excel_range(
+    source_excel_url: str,
+    sheet_name: str = "Sheet1",
+    cell_range: Optional[str] = None,
+    keyword: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    output_format: str = "ndjson",
+) -> tuple[Iterator[bytes], Optional[str]]:
     """
-    基于关键字在 Sheet 中定位区域：
-    找到包含关键字的单元格，以其所在行为起始行，向下读取连续有数据的行。
+    以 CSV 或 NDJSON 流式输出提取结果，每 _STREAM_BATCH_ROWS 行编码一块，整页不在内存中成形。
+
+    游标校验、下载与表头定位在本函数内同步完成（出错时在响应开始前抛出），
+    数据行在迭代响应体时才解析。
+
+    - csv:    首行为表头，其后为数据行
+    - ndjson: 首行 {"sheet_name", "headers"}，每个数据行一行 JSON 数组，
+              末行 {"total_rows", "offset", "has_more", "next_cursor"}
+
+    Returns:
+        (响应体分块迭代器, 下一页游标)。CSV 无法携带尾部元数据，下一页游标随响应头返回：
+        响应开始前先单独遍历到本页之后一行确认是否还有数据，没有下一页时为 None；
+        NDJSON 的下一页游标在末行中，此处总是 None。
     """
-    found_row = None
-    found_col = None
+    fingerprint = _extract_fingerprint(source_excel_url, sheet_name, cell_range, keyword)
+    if cursor:
+        offset = _decode_extract_cursor(cursor, fingerprint)
+
+    chunks = _stream_chunks(
+        source_excel_url, sheet_name, cell_range, keyword, offset, limit, output_format, fingerprint,
+    )
+    next_cursor = next(chunks)
+    head = next(chunks)
+    return chain([head], chunks), next_cursor
+
 
-    for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row):
-        for cell in row:
-            if cell.value and keyword in str(cell.value):
-                found_row = cell.row
-                found_col = cell.column
+def _stream_chunks(
+    source_excel_url: str,
+    sheet_name: str,
+    cell_range: Optional[str],
+    keyword: Optional[str],
+    offset: int,
+    limit: Optional[int],
+    output_format: str,
+    fingerprint: str,
+) -> Iterator[Any]:
+    """首个元素为 CSV 的下一页游标（见 stream_excel_range），其后为响应体分块"""
+    csv_mode = output_format == "csv"
+    buf = StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+
+    def encode(rows: list[Any]) -> bytes:
+        if csv_mode:
+            writer.writerows(rows)
+            text = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        else:
+            text = "".join(
+                json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows
+            )
+        return text.encode("utf-8")
+
+    with _open_source_workbook(source_excel_url) as source:
+        sheet, sheet_name = source.sheet(sheet_name)
+        header, rows, width = _open_extract(sheet, cell_range, keyword)
+        headers = [] if header is None else _header_strings(header, width)
+
+        next_cursor = None
+        if csv_mode and limit is not None and header is not None:
+            # 另起一次遍历探测本页之后是否还有行（解析结果缓存命中时只是解码，代价很小）
+            _, ahead, _ = _open_extract(sheet, cell_range, keyword)
+            if next(islice(ahead, offset + limit, None), None) is not None:
+                next_cursor = _encode_extract_cursor(fingerprint, offset + limit)
+        yield next_cursor
+        yield encode([headers] if csv_mode else [{"sheet_name": sheet_name, "headers": headers}])
+
+        page = islice(rows, offset, None if limit is None else offset + limit)
+        count = 0
+        while True:
+            batch = _pad_rows(list(islice(page, _STREAM_BATCH_ROWS)), width)
+            if not batch:
                 break
-        if found_row:
-            break
-
-    if found_row is None:
-        return {
-            "sheet_name": sheet_name,
-            "headers": [],
-            "data": [],
-            "total_rows": 0,
-        }
-
-    # 从找到的位置开始，读取直到遇到完全空行
+            count += len(batch)
+            yield encode(batch)
+        has_more = limit is not None and count == limit and next(rows, None) is not None
+
+    if not csv_mode:
+        yield encode([{
+            "total_rows": count,
+            "offset": offset,
+            "has_more": has_more,
+            "next_cursor": _encode_extract_cursor(fingerprint, offset + count) if has_more else None,
+        }])
+
+
+# ---------- 查询下推 ----------
+
+def query_excel_range(
+    source_excel_url: str,
+    sheet_name: str = "Sheet1",
+    cell_range: Optional[str] = None,
+    keyword: Optional[str] = None,
+    select: Optional[list[str]] = None,
+    where: Optional[list[dict]] = None,
+    group_by: Optional[list[str]] = None,
+    aggregates: Optional[list[dict]] = None,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    在服务端对提取区域执行 投影 / 过滤 / 分组聚合，只返回结果。
+    区域定位与 extract_excel_range 相同（cell_range / keyword / 全表），
+    查询在表头确定后编译，随后对数据行做一次流式遍历（见 app.services.excel_query）。
+
+    Returns:
+        dict: {"sheet_name", "columns", "column_types", "rows", "total_rows", "scanned_rows", "truncated"}
+    """
+    from app.core.config import get_settings
+    from app.services.excel_query import ExcelQuery
+
+    max_rows = get_settings().excel_query_max_rows
+    limit = min(limit, max_rows) if limit else max_rows
+
+    with _open_source_workbook(source_excel_url) as source:
+        sheet, sheet_name = source.sheet(sheet_name)
+        header, rows, width = _open_extract(sheet, cell_range, keyword)
+        if header is None:
+            raise ValueError(f"Sheet '{sheet_name}' 中未找到包含关键字 '{keyword}' 的单元格")
+        query = ExcelQuery(
+            _header_strings(header, width),
+            select=select, where=where, group_by=group_by, aggregates=aggregates, limit=limit,
+        )
+        result = query.run(rows)
+
+    return {"sheet_name": sheet_name, **result}
+
+
+# ---------- 多区域提取 ----------
+
+class _WindowCollector:
+    """矩形区域（cell_range / 定义名称）：首行为表头；单个单元格时不区分表头"""
+
+    def __init__(self, cell_range: str, limit: Optional[int]):
+        self.start_row, self.end_row, self.start_col, self.end_col = _parse_cell_range(cell_range)
+        self.first_row = self.start_row
+        self.single = self.start_row == self.end_row and self.start_col == self.end_col
+        self.width = max(self.end_col - self.start_col + 1, 1)
+        # 需要读取的行数（含表头）；指定 limit 时多读一行判断是否还有更多
+        self.stop = max(self.end_row - self.start_row + 1, 0)
+        if limit is not None and not self.single:
+            self.stop = min(self.stop, limit + 2)
+        self.rows: list[tuple] = []
+
+    def feed(self, index: int, row: tuple) -> bool:
+        """接收第 index 行，返回本区域是否已读完"""
+        if index < self.start_row:
+            return False
+        if len(self.rows) < self.stop:
+            self.rows.append(row[self.start_col - 1:self.end_col])
+        return len(self.rows) >= self.stop
+
+    def finish(self, max_column: int) -> None:
+        # 工作表行数不足时以空行补齐
+        self.rows.extend([()] * (self.stop - len(self.rows)))
+
+
+class _KeywordCollector:
+    """关键字区域：包含关键字的首行为表头，读到全空行为止"""
+
+    first_row = 1
     start_col = 1
-    end_col = sheet.max_column
-
-    # 表头为 found_row
-    headers = []
-    for col in range(start_col, end_col + 1):
-        val = sheet.cell(row=found_row, column=col).value
-        headers.append(str(val) if val is not None else "")
-
-    # 数据行
-    data = []
-    for row_num in range(found_row + 1, sheet.max_row + 1):
-        row_data = []
-        all_none = True
-        for col in range(start_col, end_col + 1):
-            val = sheet.cell(row=row_num, column=col).value
-            row_data.append(val)
-            if val is not None:
-                all_none = False
-        if all_none:
-            break  # 遇到全空行就停止
-        data.append(row_data)
-
-    return {
-        "sheet_name": sheet_name,
-        "headers": headers,
-        "data": data,
-        "total_rows": len(data),
-    }
+
+    def __init__(self, keyword: str, limit: Optional[int]):
+        self.keyword = keyword
+        self.stop = None if limit is None else limit + 1
+        self.header: Optional[tuple] = None
+        self.header_row = 0
+        self.rows: list[tuple] = []
+        self.width = 0
+
+    def feed(self, index: int, row: tuple) -> bool:
+        if self.header is None:
+            if any(val and self.keyword in str(val) for val in row):
+                self.header, self.header_row, self.width = row, index, len(row)
+            return False
+        if all(val is None for val in row):
+            return True
+        self.rows.append(row)
+        return self.stop is not None and len(self.rows) >= self.stop
+
+    def finish(self, max_column: int) -> None:
+        if self.header is not None:
+            self.width = max([max_column, self.width] + [len(row) for row in self.rows])
+
+
+def _resolve_defined_name(wb, name: str, sheet_name: str) -> tuple[str, str]:
+    """定义名称 → (Sheet 名称, 'A1:B2')。先查 sheet_name 的局部名称，再查工作簿级名称"""
+    definition = None
+    if sheet_name in wb.sheetnames:
+        definition = wb[sheet_name].defined_names.get(name)
+    if definition is None:
+        definition = wb.defined_names.get(name)
+    if definition is None:
+        raise ValueError(f"工作簿中不存在定义名称 '{name}'")
+
+    try:
+        destinations = list(definition.destinations) if definition.type == "RANGE" else []
+    except AttributeError:  # 引用中缺少 Sheet 名称
+        destinations = []
+    if len(destinations) != 1:
+        raise ValueError(f"定义名称 '{name}' 不是单个连续的单元格区域: {definition.value}")
+    title, ref = destinations[0]
+    title = title.replace("''", "'")
+    if title not in wb.sheetnames:
+        raise ValueError(f"定义名称 '{name}' 指向不存在的 Sheet '{title}'")
+    ref = ref.replace("$", "")
+    return title, ref if ":" in ref else f"{ref}:{ref}"
+
+
+def _scan_ranges(sheet, collectors: list) -> None:
+    """对 Sheet 做一次顺序遍历，把每一行分发给尚未读完的区域，全部读完即停止解析"""
+    first_row = min(c.first_row for c in collectors)
+    values, max_column = _iter_sheet_values(sheet, min_row=first_row)
+    active = list(collectors)
+    for index, row in enumerate(values, start=first_row):
+        finished = [c for c in active if c.feed(index, row)]
+        if finished:
+            active = [c for c in active if c not in finished]
+            if not active:
+                break
+    for c in collectors:
+        c.finish(max_column)
+
+
+def _range_result(sheet_name: str, collector, limit: Optional[int]) -> dict:
+    """把一个区域收集到的行整理为结果"""
+    result = {"sheet_name": sheet_name, "ref": None, "headers": [], "data": [],
+              "total_rows": 0, "has_more": False, "value": None}
+    start_col = get_column_letter(collector.start_col)
+
+    if isinstance(collector, _WindowCollector):
+        if collector.single:
+            row = collector.rows[0]
+            result.update(ref=f"{start_col}{collector.start_row}", data=[[row[0] if row else None]],
+                          total_rows=1, value=row[0] if row else None)
+            return result
+        header, rows, header_row = (collector.rows or [()])[0], collector.rows[1:], collector.start_row
+    elif collector.header is None:
+        return result
+    else:
+        header, rows, header_row = collector.header, collector.rows, collector.header_row
+
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    width = collector.width
+    end_col = get_column_letter(collector.start_col + width - 1)
+    result.update(
+        ref=f"{start_col}{header_row}:{end_col}{header_row + len(rows)}",
+        headers=_header_strings(header, width),
+        data=_pad_rows(rows, width),
+        total_rows=len(rows),
+        has_more=has_more,
+    )
+    return result
+
+
+def extract_excel_ranges(
+    source_excel_url: str,
+    ranges: list[dict],
+    sheet_name: str = "Sheet1",
+) -> dict:
+    """
+    一次从同一工作簿提取多个区域，文件只下载、打开一次。
+    同一 Sheet 上的全部区域在一次顺序遍历中完成：按行号分发给各区域，所有区域读完即停止解析。
+
+    Args:
+        source_excel_url: 文件 URL
+        ranges:           [{"key", "sheet_name"?, "cell_range" | "keyword" | "defined_name", "limit"?}]
+        sheet_name:       区域未指定 sheet_name 时使用的 Sheet
+
+    Returns:
+        dict: {"results": {key: {"sheet_name", "ref", "headers", "data", "total_rows", "has_more", "value"}}}
+    """
+    with _open_source_workbook(source_excel_url) as source:
+        # 先把每个区域解析为 (Sheet, 收集器)，再按 Sheet 分组各遍历一次
+        plans: list[tuple[str, str, Any, Optional[int]]] = []
+        sheets: dict[str, Any] = {}
+        for spec in ranges:
+            target = spec.get("sheet_name") or sheet_name
+            cell_range = spec.get("cell_range")
+            if spec.get("defined_name"):
+                target, cell_range = _resolve_defined_name(source.wb, spec["defined_name"], target)
+            limit = spec.get("limit")
+            if cell_range:
+                collector = _WindowCollector(cell_range, limit)
+            elif spec.get("keyword"):
+                collector = _KeywordCollector(spec["keyword"], limit)
+            else:
+                raise ValueError(f"区域 '{spec['key']}' 必须指定 cell_range、keyword、defined_name 其中之一")
+
+            sheet, title = source.sheet(target)
+            sheets.setdefault(title, sheet)
+            plans.append((spec["key"], title, collector, limit))
+
+        for title, sheet in sheets.items():
+            _scan_ranges(sheet, [collector for _, t, collector, _ in plans if t == title])
+
+    return {"results": {key: _range_result(title, collector, limit) for key, title, collector, limit in plans}}
@@ -0,0 +1,298 @@
+"""
+EXC-04 查询下推引擎。
+
+对提取区域（表头 + 数据行迭代器）做列投影、行过滤与分组聚合，在一次遍历中完成，
+只保留结果所需的状态：无聚合时最多保留 limit + 1 行（凑满即停止读取），
+有聚合时每组只保留各聚合函数的累加器。
+
+比较按单元格的实际类型进行：数值列与数值（或数字字符串）按数值比较，
+日期列与 ISO 日期字符串按时间比较，其余按字符串比较。
+"""
+
+from datetime import date, datetime, time
+from typing import Any, Iterable, Optional
+
+_NUMBER, _DATETIME, _STRING, _BOOLEAN = "number", "datetime", "string", "boolean"
+
+OPERATORS = {"eq", "ne", "gt", "gte", "lt", "lte", "contains", "in", "is_null", "not_null"}
+AGGREGATES = {"sum", "count", "avg", "min", "max"}
+
+
+# =====================================================
+#  值类型与比较
+# =====================================================
+
+def _value_type(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return _BOOLEAN
+    if isinstance(value, (int, float)):
+        return _NUMBER
+    if isinstance(value, (datetime, date, time)):
+        return _DATETIME
+    return _STRING
+
+
+def _as_number(value: Any) -> Optional[float]:
+    """数值或数字字符串（允许千分位逗号）转为数值，其余返回 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.strip().replace(",", ""))
+        except ValueError:
+            return None
+    return None
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """
+    日期/日期时间或 ISO 8601 字符串转为不带时区的 datetime，其余返回 None。
+    Excel 单元格只有墙上时间：带时区的条件值（含结尾 Z）去掉时区、保留其墙上时间后比较。
+    """
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        text = value.strip()
+        if text[-1:] in ("Z", "z"):
+            text = text[:-1] + "+00:00"  # Python 3.10 的 fromisoformat 不接受结尾 Z
+        try:
+            return datetime.fromisoformat(text).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def _comparable(cell: Any, value: Any) -> Optional[tuple[Any, Any]]:
+    """按单元格类型把 (单元格值, 条件值) 转为可比较的一对；类型不兼容时返回 None"""
+    if cell is None:
+        return None
+    if isinstance(value, bool) or isinstance(cell, bool):
+        return (cell, value) if isinstance(cell, bool) and isinstance(value, bool) else None
+    if isinstance(value, (int, float)) or isinstance(cell, (int, float)):
+        a, b = _as_number(cell), _as_number(value)
+        return (a, b) if a is not None and b is not None else None
+    if isinstance(cell, (datetime, date)):
+        a, b = _as_datetime(cell), _as_datetime(value)
+        return (a, b) if a is not None and b is not None else None
+    return str(cell), str(value)
+
+
+def _sort_key(value: Any) -> tuple[int, Any]:
+    """min / max 的排序键：与 Excel 排序一致，数值 < 日期 < 文本 < 逻辑值"""
+    kind = _value_type(value)
+    if kind == _NUMBER:
+        return 0, value
+    if kind == _DATETIME:
+        return (1, _as_datetime(value)) if not isinstance(value, time) else (1, datetime.combine(date.min, value))
+    if kind == _BOOLEAN:
+        return 3, value
+    return 2, str(value)
+
+
+def _match(op: str, cell: Any, value: Any) -> bool:
+    if op == "is_null":
+        return cell is None or cell == ""
+    if op == "not_null":
+        return not (cell is None or cell == "")
+    if op == "contains":
+        return cell is not None and str(value) in str(cell)
+    if op == "in":
+        return any(_match("eq", cell, item) for item in value)
+    pair = _comparable(cell, value)
+    if pair is None:
+        return op == "ne"
+    a, b = pair
+    if op == "eq":
+        return a == b
+    if op == "ne":
+        return a != b
+    if op == "gt":
+        return a > b
+    if op == "gte":
+        return a >= b
+    if op == "lt":
+        return a < b
+    return a <= b
+
+
+# =====================================================
+#  聚合累加器
+# =====================================================
+
+class _Accumulator:
+    """单个聚合函数在一个分组内的累加状态"""
+
+    __slots__ = ("func", "count", "total", "best", "best_key")
+
+    def __init__(self, func: str):
+        self.func = func
+        self.count = 0
+        self.total = 0
+        self.best = None
+        self.best_key = None
+
+    def add(self, value: Any) -> None:
+        func = self.func
+        if func == "count":
+            if value is not None and value != "":
+                self.count += 1
+        elif func in ("sum", "avg"):
+            number = _as_number(value)
+            if number is not None:
+                self.total += number
+                self.count += 1
+        elif value is not None and value != "":
+            key = _sort_key(value)
+            if self.best_key is None or (key < self.best_key if func == "min" else key > self.best_key):
+                self.best, self.best_key = value, key
+
+    def result(self) -> Any:
+        if self.func == "count":
+            return self.count
+        if self.func == "sum":
+            return self.total
+        if self.func == "avg":
+            return self.total / self.count if self.count else None
+        return self.best
+
+
+# =====================================================
+#  查询计划
+# =====================================================
+
+class ExcelQuery:
+    """
+    针对一组表头编译好的查询。列名按表头匹配，找不到时也接受列字母（相对提取区域的第一列）。
+
+    Args:
+        headers:    提取区域的表头
+        select:     投影列；None 表示全部列（无聚合时）
+        where:      过滤条件 [{"column", "op", "value"}]，多个条件为 AND
+        group_by:   分组列
+        aggregates: 聚合 [{"func", "column", "alias"}]，count 可不指定 column（统计行数）
+        limit:      最多返回的结果行数
+    """
+
+    def __init__(
+        self,
+        headers: list[str],
+        select: Optional[list[str]] = None,
+        where: Optional[list[dict]] = None,
+        group_by: Optional[list[str]] = None,
+        aggregates: Optional[list[dict]] = None,
+        limit: int = 10000,
+    ):
+        self.headers = headers
+        self.limit = limit
+        self.where = [
+            (self._column(cond["column"]), self._operator(cond), cond.get("value"))
+            for cond in where or []
+        ]
+        self.group_cols = [self._column(name) for name in group_by or []]
+        self.aggregates = [self._aggregate(agg) for agg in aggregates or []]
+        self.grouped = bool(self.group_cols or self.aggregates)
+
+        if self.grouped:
+            if select:
+                raise ValueError("使用 group_by / aggregates 时结果列由分组列与聚合列决定，请勿同时指定 select")
+            self.columns = [headers[i] for i in self.group_cols] + [alias for alias, _, _ in self.aggregates]
+        else:
+            self.select_cols = [self._column(name) for name in select] if select else list(range(len(headers)))
+            self.columns = [headers[i] for i in self.select_cols]
+
+    def _column(self, name: str) -> int:
+        if name in self.headers:
+            return self.headers.index(name)
+        from openpyxl.utils import column_index_from_string
+        try:
+            index = column_index_from_string(name) - 1
+        except ValueError:
+            index = -1
+        if 0 <= index < len(self.headers):
+            return index
+        available = ", ".join(h for h in self.headers if h)
+        raise ValueError(f"列 '{name}' 不存在。可用的表头: {available}")
+
+    @staticmethod
+    def _operator(cond: dict) -> str:
+        op = cond.get("op", "eq")
+        if op not in OPERATORS:
+            raise ValueError(f"不支持的过滤运算符 '{op}'，可选: {', '.join(sorted(OPERATORS))}")
+        if op in ("is_null", "not_null"):
+            return op
+        if cond.get("value") is None:
+            raise ValueError(f"列 '{cond.get('column')}' 的过滤条件缺少 value（运算符 {op}）；判断空值请用 is_null / not_null")
+        if op == "in" and not isinstance(cond["value"], list):
+            raise ValueError("运算符 in 的 value 必须是数组")
+        return op
+
+    def _aggregate(self, agg: dict) -> tuple[str, str, Optional[int]]:
+        func = agg.get("func")
+        if func not in AGGREGATES:
+            raise ValueError(f"不支持的聚合函数 '{func}'，可选: {', '.join(sorted(AGGREGATES))}")
+        column = agg.get("column")
+        if column is None and func != "count":
+            raise ValueError(f"聚合函数 {func} 需要指定 column")
+        index = self._column(column) if column is not None else None
+        alias = agg.get("alias") or f"{func}({column if column is not None else '*'})"
+        return alias, func, index
+
+    def run(self, rows: Iterable[tuple]) -> dict:
+        """
+        一次遍历数据行，返回:
+            {"columns", "column_types", "rows", "total_rows", "scanned_rows", "truncated"}
+        """
+        where = self.where
+        scanned = 0
+        result_rows: list[list[Any]] = []
+        groups: dict[tuple, list[_Accumulator]] = {}
+        width = len(self.headers)
+
+        for row in rows:
+            scanned += 1
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            if where and not all(_match(op, row[col], value) for col, op, value in where):
+                continue
+            if not self.grouped:
+                result_rows.append([row[i] for i in self.select_cols])
+                if len(result_rows) > self.limit:
+                    break  # 已能判定结果被截断，不再读取后续行
+                continue
+            key = tuple(row[i] for i in self.group_cols)
+            accs = groups.get(key)
+            if accs is None:
+                accs = groups[key] = [_Accumulator(func) for _, func, _ in self.aggregates]
+            for acc, (_, _, col) in zip(accs, self.aggregates):
+                acc.add(row[col] if col is not None else 1)
+
+        if self.grouped:
+            if not groups and not self.group_cols:
+                # 无分组的整体聚合：即使没有匹配行也返回一行（count 为 0）
+                groups[()] = [_Accumulator(func) for _, func, _ in self.aggregates]
+            result_rows = [list(key) + [acc.result() for acc in accs] for key, accs in groups.items()]
+
+        truncated = len(result_rows) > self.limit
+        del result_rows[self.limit:]
+        return {
+            "columns": self.columns,
+            "column_types": self._column_types(result_rows),
+            "rows": result_rows,
+            "total_rows": len(result_rows),
+            "scanned_rows": scanned,
+            "truncated": truncated,
+        }
+
+    def _column_types(self, rows: list[list[Any]]) -> list[str]:
+        """各结果列的类型: number / datetime / string / boolean，全空为 empty，多种类型为 mixed"""
+        types = []
+        for i in range(len(self.columns)):
+            kinds = {_value_type(row[i]) for row in rows} - {None}
+            types.append(kinds.pop() if len(kinds) == 1 else ("mixed" if kinds else "empty"))
+        return types
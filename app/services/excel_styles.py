@@ -0,0 +1,122 @@
+"""
+Excel 工作簿级样式注册表。
+
+EXC 系列产物中的单元格外观只有少数几种（标题、表头、正文、合计行、交替行、分组行、甘特条），
+但逐单元格创建 Font / Alignment / PatternFill 会让 openpyxl 在赋值和保存时反复哈希去重。
+注册表为每个工作簿把每种外观注册为一个 NamedStyle（首次使用时注册一次），
+单元格只通过样式名引用，样式对象的构造与去重从 O(单元格数) 降为 O(样式种类数)。
+
+普通工作簿与 write-only 工作簿均可使用；对已有工作簿（EXC-02 追加）会复用同名样式。
+"""
+
+from typing import Any, Callable, Optional
+
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+THIN_BORDER = Border(
+    left=Side(style="thin"),
+    right=Side(style="thin"),
+    top=Side(style="thin"),
+    bottom=Side(style="thin"),
+)
+CENTER_WRAP = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+HEADER_BG = "F2F2F2"   # 默认表头背景
+SUMMARY_BG = "E6F3FF"  # 合计行背景
+
+
+def solid_fill(hex_color: str) -> PatternFill:
+    return PatternFill(start_color=hex_color, end_color=hex_color, fill_type="solid")
+
+
+class ExcelStyleRegistry:
+    """
+    单个工作簿的命名样式注册表。
+    各方法返回样式名，调用方以 cell.style = name 引用。
+    """
+
+    PREFIX = "SGA"
+
+    def __init__(self, wb):
+        self.wb = wb
+        self._registered: set[str] = set(wb.named_styles)
+
+    def _get(self, name: str, build: Callable[[], dict[str, Any]]) -> str:
+        """返回完整样式名；首次使用时调用 build() 构造样式属性并注册"""
+        name = f"{self.PREFIX} {name}"
+        if name not in self._registered:
+            attrs = build()
+            self.wb.add_named_style(NamedStyle(
+                name=name,
+                font=attrs.get("font") or DEFAULT_FONT,
+                fill=attrs.get("fill") or DEFAULT_EMPTY_FILL,
+                border=attrs.get("border") or DEFAULT_BORDER,
+                alignment=attrs.get("alignment"),
+            ))
+            self._registered.add(name)
+        return name
+
+    # ---------- 标题 / 表头 ----------
+
+    def title(self, size: int) -> str:
+        """EXC-01 首行标题：加粗、居中换行、无边框"""
+        return self._get(f"Title {size}", lambda: {
+            "font": Font(size=size, bold=True),
+            "alignment": CENTER_WRAP,
+        })
+
+    def header(self, theme=None) -> str:
+        """表头：默认浅灰底加粗；传入主题时使用主题表头底色与字体色"""
+        if theme is None:
+            return self._get("Header", lambda: {
+                "font": Font(bold=True, size=11),
+                "fill": solid_fill(HEADER_BG),
+                "border": THIN_BORDER,
+                "alignment": CENTER_WRAP,
+            })
+        return self._get(f"Header {theme.name}", lambda: {
+            "font": Font(bold=True, size=11, color=theme.table_header_font),
+            "fill": solid_fill(theme.table_header_bg),
+            "border": THIN_BORDER,
+            "alignment": CENTER_WRAP,
+        })
+
+    # ---------- 数据行 ----------
+
+    def body(self, fill: Optional[str] = None, summary: bool = False) -> str:
+        """
+        数据单元格：居中换行 + 细边框。
+        Args:
+            fill:    行底色（交替行 / 分组色），None 时合计行用默认合计底色、普通行无底色
+            summary: 是否合计行（加粗）
+        """
+        if fill is None and summary:
+            fill = SUMMARY_BG
+        name = "Summary" if summary else "Body"
+        if fill is not None:
+            name = f"{name} {fill}"
+        return self._get(name, lambda: {
+            "font": Font(bold=True, size=11) if summary else None,
+            "fill": solid_fill(fill) if fill else None,
+            "border": THIN_BORDER,
+            "alignment": CENTER_WRAP,
+        })
+
+    def fill_only(self, fill: str) -> str:
+        """短行补齐的空白单元格：只有行底色"""
+        return self._get(f"Fill {fill}", lambda: {"fill": solid_fill(fill)})
+
+    # ---------- 甘特时间轴 ----------
+
+    def gantt_header(self) -> str:
+        return self._get("Gantt Header", lambda: {
+            "font": Font(bold=True, size=9),
+            "border": THIN_BORDER,
+            "alignment": CENTER_WRAP,
+        })
+
+    def gantt_bar(self, color: str) -> str:
+        return self._get(f"Gantt Bar {color}", lambda: {"fill": solid_fill(color), "border": THIN_BORDER})
@@ -0,0 +1,168 @@
+"""
+DOC-01 图片转码与转码结果缓存（进程内）。
+
+Word 中图片的显示宽度不超过约 8.4 cm，按源分辨率嵌入时一张 4000px 的截图就有数 MB，
+拖慢 doc.save 和后续的 soffice 转换。本模块按显示尺寸与目标打印 DPI 下采样后再嵌入：
+
+- 显示尺寸沿用原有版式：宽 14 cm、高 18 cm 的框内等比放大/缩小，再乘 0.6；
+- 源像素超过 显示尺寸 × DPI 时用 LANCZOS 下采样，不放大；
+- 颜色数少的图（图表、线稿、截图）保存为 PNG：JPEG 对锐利边缘既更大又更糊；
+  照片类（源为 JPEG 或颜色丰富）保存为 JPEG；
+- 转码结果以 (源内容 sha256, 目标像素尺寸) 为键缓存，按字节数做 LRU 淘汰，
+  同一张图（Logo、重复插入的示意图）在同一文档或后续文档中只转码一次。
+
+键只取源内容而不含 URL，换了链接的同一张图也能命中；缓存随 DOC-01 渲染进程存在，
+内存上限 docx_image_cache_mb 按每个执行渲染的进程计。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, NamedTuple, Optional
+
+from PIL import Image
+
+from app.core.config import get_settings
+
+_BOX_WIDTH_CM = 14
+_BOX_HEIGHT_CM = 18
+_DISPLAY_SCALE = 0.6
+_CM_PER_INCH = 2.54
+_PNG_MAX_COLORS = 4096   # 下采样后颜色数不超过此值时按线稿/图表保存为 PNG
+_JPEG_QUALITY = 95
+
+
+class TranscodedImage(NamedTuple):
+    data: bytes
+    format: str        # "PNG" / "JPEG"
+    width_cm: float    # 文档中的显示宽度
+
+
+def display_width_cm(width_px: int, height_px: int) -> float:
+    """按原有版式计算图片在文档中的显示宽度（cm）"""
+    aspect_ratio = width_px / height_px if height_px > 0 else 1
+    final_width_cm = _BOX_WIDTH_CM
+    if _BOX_WIDTH_CM / aspect_ratio > _BOX_HEIGHT_CM:
+        final_width_cm = _BOX_HEIGHT_CM * aspect_ratio
+    return final_width_cm * _DISPLAY_SCALE
+
+
+def target_size(width_px: int, height_px: int, width_cm: float, dpi: int) -> tuple[int, int]:
+    """按显示宽度与打印 DPI 计算嵌入的像素尺寸（只缩小不放大）"""
+    target_width = max(1, round(width_cm / _CM_PER_INCH * dpi))
+    if dpi <= 0 or width_px <= target_width:
+        return width_px, height_px
+    return target_width, max(1, round(height_px * target_width / width_px))
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """透明背景铺白，统一为 RGB（灰度图保留 L）"""
+    if img.mode in ('P', 'LA', 'PA', 'RGBA'):
+        img = img.convert('RGBA')
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[-1])
+        return rgb_img
+    if img.mode in ('RGB', 'L'):
+        return img
+    return img.convert('RGB')
+
+
+def transcode_image(data: bytes, dpi: int) -> TranscodedImage:
+    """
+    将源图片转码为适合嵌入 docx 的尺寸与格式；启用缓存时先查缓存。
+
+    Raises:
+        PIL.UnidentifiedImageError 等：源数据不是可识别的图片
+    """
+    img = Image.open(BytesIO(data))
+    width_cm = display_width_cm(*img.size)
+    size = target_size(*img.size, width_cm, dpi)
+
+    cache = get_image_transcode_cache()
+    key = (hashlib.sha256(data).hexdigest(), size)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    photo = img.format == 'JPEG'
+    if photo and img.size != size:
+        img.draft(img.mode, size)  # JPEG 解码时按 1/2、1/4、1/8 直接缩小，不解码全尺寸
+    img = _flatten(img)
+    if img.size != size:
+        img = img.resize(size, Image.LANCZOS)
+
+    output = BytesIO()
+    if not photo and img.getcolors(maxcolors=_PNG_MAX_COLORS) is not None:
+        img.save(output, format='PNG')
+        result = TranscodedImage(output.getvalue(), 'PNG', width_cm)
+    else:
+        img.save(output, format='JPEG', quality=_JPEG_QUALITY)
+        result = TranscodedImage(output.getvalue(), 'JPEG', width_cm)
+
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+# =====================================================
+#  缓存
+# =====================================================
+
+class ImageTranscodeCache:
+    """按 (源内容摘要, 目标像素尺寸) 缓存转码结果，按字节数做 LRU 淘汰，线程安全"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, TranscodedImage]" = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: tuple) -> Optional[TranscodedImage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry
+
+    def put(self, key: tuple, entry: TranscodedImage) -> None:
+        size = len(entry.data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.data)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.data)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "memory_bytes": self._bytes}
+
+
+# 模块级单例 (惰性初始化)
+_transcode_cache: ImageTranscodeCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_image_transcode_cache() -> Optional[ImageTranscodeCache]:
+    """获取转码结果缓存单例，docx_image_cache_mb 为 0 时返回 None"""
+    global _transcode_cache
+    settings = get_settings()
+    if settings.docx_image_cache_mb <= 0:
+        return None
+    if _transcode_cache is None:
+        with _cache_lock:
+            if _transcode_cache is None:
+                _transcode_cache = ImageTranscodeCache(max_bytes=settings.docx_image_cache_mb * 1024 * 1024)
+    return _transcode_cache
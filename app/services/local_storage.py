@@ -0,0 +1,97 @@
+"""
+本地磁盘 / 共享卷存储后端（存储后端 "local"）。
+
+产物写入 Settings.local_storage_root，对外 URL 为
+{local_storage_public_url}/{key}，由 /api/v1/files 路由提供下载（支持 Range）。
+同集群内的调用方无需经过公网往返；也可作为压测时排除 COS 延迟的零网络后端。
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Optional
+from urllib.parse import unquote
+
+from app.core.config import get_settings
+from app.services.storage_backend import StorageBackend, UploadData
+
+
+class LocalStorageService(StorageBackend):
+    """本地目录存储"""
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None, public_url: Optional[str] = None):
+        settings = get_settings()
+        self.root = os.path.realpath(root or settings.local_storage_root)
+        self._public_url = (public_url or settings.local_storage_public_url).rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def base_url(self) -> str:
+        return self._public_url
+
+    def resolve_path(self, cos_key: str) -> str:
+        """存储键 → 本地绝对路径，拒绝跳出根目录的键"""
+        path = os.path.realpath(os.path.join(self.root, cos_key.lstrip("/")))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"非法的存储路径: {cos_key}")
+        return path
+
+    def path_for_url(self, file_url: str) -> Optional[str]:
+        """本后端生成的 URL → 本地路径；其他 URL 返回 None"""
+        prefix = f"{self.base_url}/"
+        if not file_url.startswith(prefix):
+            return None
+        return self.resolve_path(unquote(file_url[len(prefix):].split("?", 1)[0]))
+
+    def upload_bytes(self, data: UploadData, cos_key: str) -> str:
+        """
+        写入内存数据。先写同目录临时文件再原子替换，读者不会看到半个文件。
+        Args:
+            data: bytes / memoryview，或可 seek 的文件对象
+            cos_key: 存储路径键名
+        Returns:
+            文件的访问 URL
+        """
+        with _AtomicWriter(self.resolve_path(cos_key)) as f:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                data.seek(0)
+                shutil.copyfileobj(data, f)
+        return self.url_for(cos_key)
+
+    def upload_file(self, local_path: str, cos_key: str) -> str:
+        """复制本地文件到存储目录"""
+        with _AtomicWriter(self.resolve_path(cos_key)) as f, open(local_path, "rb") as src:
+            shutil.copyfileobj(src, f)
+        return self.url_for(cos_key)
+
+    def exists(self, file_url: str) -> bool:
+        path = self.path_for_url(file_url)
+        if path is None:
+            return self._remote_exists(file_url)
+        return os.path.isfile(path)
+
+
+class _AtomicWriter:
+    """写临时文件，正常退出时 os.replace 到目标路径，异常时删除临时文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.chmod(self._tmp_path, 0o644)  # mkstemp 默认 0600，共享卷上的其他进程需要可读
+            os.replace(self._tmp_path, self.path)
+        else:
+            os.unlink(self._tmp_path)
+        return False
@@ -0,0 +1,282 @@
+"""
+VIS 系列渲染结果缓存（内容寻址）。
+
+QR 码、条形码、统计图表、词云、Mermaid 图都是请求参数的纯函数。
+以"端点名 + 校验后请求模型的规范化 JSON"的 sha256 作为键，缓存上一次上传得到的
+file_url / filename，命中时既不渲染也不上传。
+
+- 内存层：OrderedDict 实现的 LRU，按条目数限制
+- 磁盘层：每个键一个 JSON 文件，按总字节数限制，超出时淘汰最久未访问的文件
+- 失效：命中时若距上次确认已超过 render_cache_verify_seconds，
+  向存储确认对象仍然存在，不存在则删除条目并按未命中处理
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+from app.core.executor import run_io_bound
+from app.services.storage_backend import active_backend_name
+
+logger = logging.getLogger(__name__)
+
+
+def _storage_exists(file_url: str) -> bool:
+    from app.services.cos_storage import get_cos_service
+    return get_cos_service().exists(file_url)
+
+
+class RenderCache:
+    """两级渲染结果缓存，线程安全"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        memory_entries: int = 1024,
+        disk_max_bytes: int = 64 * 1024 * 1024,
+        verify_seconds: float = 300,
+        exists: Callable[[str], bool] = _storage_exists,
+    ):
+        self.cache_dir = cache_dir
+        self.memory_entries = max(1, memory_entries)
+        self.disk_max_bytes = disk_max_bytes
+        self.verify_seconds = verify_seconds
+        self._exists = exists
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+        self._counters = {
+            "hits_memory": 0,
+            "hits_disk": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "evictions_memory": 0,
+            "evictions_disk": 0,
+        }
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    # ---------- 键 ----------
+
+    @staticmethod
+    def make_key(endpoint: str, req: BaseModel) -> str:
+        """端点名 + 请求模型的规范化 JSON → sha256"""
+        canonical = json.dumps(
+            {"endpoint": endpoint, "request": req.model_dump(mode="json")},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    # ---------- 读写 ----------
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """查找缓存结果，未命中或存储对象已消失时返回 None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        tier = "hits_memory"
+
+        if entry is None:
+            entry = self._read_disk(key)
+            tier = "hits_disk"
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None:
+            self._count("misses")
+            return None
+
+        if time.time() - entry["verified_at"] > self.verify_seconds:
+            if not self._still_exists(entry["result"]):
+                self.invalidate(key)
+                self._count("invalidations")
+                self._count("misses")
+                return None
+            entry["verified_at"] = time.time()
+
+        self._count(tier)
+        return dict(entry["result"])
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        """写入一次成功渲染的结果（两层同时写）"""
+        entry = {"result": dict(result), "verified_at": time.time()}
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def invalidate(self, key: str) -> None:
+        """删除一个条目"""
+        with self._lock:
+            self._memory.pop(key, None)
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def stats(self) -> dict[str, Any]:
+        """命中/未命中计数与两层占用"""
+        with self._lock:
+            stats: dict[str, Any] = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+        lookups = stats["hits_memory"] + stats["hits_disk"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    # ---------- 内部 ----------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _still_exists(self, result: dict[str, Any]) -> bool:
+        file_url = result.get("file_url")
+        if not file_url:
+            return True
+        try:
+            return self._exists(file_url)
+        except Exception as e:
+            # 存储暂时不可达时保留条目，下次命中再校验
+            logger.warning(f"渲染缓存校验存储对象失败，暂按存在处理: {e}")
+            return True
+
+    def _remember(self, key: str, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self._counters["evictions_memory"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # 以 mtime 作为磁盘层的最近访问时间
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"渲染缓存文件损坏，已忽略: {path} ({e})")
+            self.invalidate(key)
+            return None
+
+    def _write_disk(self, key: str, entry: dict[str, Any]) -> None:
+        path = self._path(key)
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"渲染缓存写入磁盘失败: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += len(data) - old_size
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._evict_disk()
+
+    def _scan_disk(self) -> list[tuple[float, int, str]]:
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _evict_disk(self) -> None:
+        """按 mtime 从旧到新删除，直到总体积回到上限以内"""
+        files = sorted(self._scan_disk())
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["evictions_disk"] += evicted
+
+
+async def cached_render(
+    endpoint: str,
+    req: BaseModel,
+    render: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """
+    路由层使用的包装：命中直接返回缓存结果，否则执行 render 并写入缓存。
+    缓存关闭时等价于 await render()。
+    """
+    cache = get_render_cache()
+    if cache is None:
+        return await render()
+
+    # 不同存储后端的产物 URL 不能互相复用
+    key = cache.make_key(f"{endpoint}@{active_backend_name()}", req)
+    hit = await run_io_bound(cache.get, key)
+    if hit is not None:
+        return hit
+
+    result = await render()
+    await run_io_bound(cache.put, key, result)
+    return result
+
+
+# 模块级单例 (惰性初始化)
+_render_cache: RenderCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """获取渲染缓存单例，未启用时返回 None"""
+    global _render_cache
+    settings = get_settings()
+    if not settings.render_cache_enabled:
+        return None
+    if _render_cache is None:
+        with _cache_lock:
+            if _render_cache is None:
+                _render_cache = RenderCache(
+                    cache_dir=os.path.join(settings.temp_dir, "render_cache"),
+                    memory_entries=settings.render_cache_memory_entries,
+                    disk_max_bytes=settings.render_cache_disk_mb * 1024 * 1024,
+                    verify_seconds=settings.render_cache_verify_seconds,
+                )
+    return _render_cache
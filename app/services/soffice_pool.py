@@ -0,0 +1,363 @@
+"""
+LibreOffice 常驻转换池 (PDF-01)。
+
+每次转换都冷启动 `soffice --headless` 要付出数秒启动成本，且并发调用会争用同一个
+默认用户配置目录。本模块维护若干常驻 headless 实例：
+- 每个实例独占一个用户配置目录 (-env:UserInstallation) 和一个 UNO 管道；
+- 转换请求从队列领取空闲实例，用完归还；
+- 领取时做健康检查，进程退出或卡死的实例会被重启；
+- 每个实例完成 N 次转换后回收重启，防止内存泄漏累积。
+
+常驻模式依赖 Python UNO 绑定 (python3-uno)。它只安装在发行版自带的 python3 中，
+应用所用的解释器无法 import uno：每个实例另起一个 UNO 辅助进程（见 app.services.uno_bridge），
+由 soffice_uno_python 指定的解释器运行，经管道逐行收发 JSON 驱动实例。
+找不到可 import uno 的解释器时退化为"冷启动"模式：仍按实例槽位隔离配置目录并限制并发，
+但每次转换都启动一次 `soffice --convert-to`。当前模式见启动日志与 /health 的 soffice_mode。
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+_BRIDGE_SCRIPT = str(Path(__file__).with_name("uno_bridge.py"))
+_PING_TIMEOUT = 10
+
+
+def _find_uno_python(configured: Optional[str]) -> Optional[str]:
+    """依次检查配置的解释器与当前解释器，返回第一个可 import uno 的，都不可用时返回 None"""
+    for candidate in dict.fromkeys(filter(None, (configured, sys.executable))):
+        if shutil.which(candidate) is None:
+            continue
+        try:
+            probe = subprocess.run([candidate, "-c", "import uno"], capture_output=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if probe.returncode == 0:
+            return candidate
+    return None
+
+
+class ConversionTimeout(RuntimeError):
+    """单次转换超时"""
+
+
+class _SofficeInstance:
+    """单个 headless LibreOffice 实例槽位"""
+
+    def __init__(self, slot: int, binary: str, profile_dir: Path, pipe_name: str, uno_python: Optional[str] = None):
+        self.slot = slot
+        self.binary = binary
+        self.profile_dir = profile_dir
+        self.pipe_name = pipe_name
+        self.uno_python = uno_python
+        self.process: Optional[subprocess.Popen] = None
+        self.bridge: Optional[subprocess.Popen] = None   # UNO 辅助进程
+        self.conversions = 0
+
+    @property
+    def profile_url(self) -> str:
+        return self.profile_dir.as_uri()
+
+    @property
+    def uno_url(self) -> str:
+        return f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+
+    # ---------- 进程生命周期 ----------
+
+    def start(self, startup_timeout: float) -> None:
+        """启动常驻监听进程与 UNO 辅助进程，并等待 UNO 管道就绪"""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        cmd = [
+            self.binary,
+            f"-env:UserInstallation={self.profile_url}",
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nodefault",
+            "--norestore",
+            "--nolockcheck",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+        ]
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise RuntimeError(
+                "LibreOffice 未安装或不在 PATH 中。"
+                "请确保 Docker 镜像已安装 libreoffice。"
+            )
+        self.conversions = 0
+        self.bridge = subprocess.Popen(
+            [self.uno_python, _BRIDGE_SCRIPT, self.uno_url],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+
+        deadline = time.monotonic() + startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                code = self.process.returncode
+                self.stop()
+                raise RuntimeError(f"LibreOffice 实例 #{self.slot} 启动后立即退出 (code={code})")
+            if self._ping():
+                logger.info(f"LibreOffice 实例 #{self.slot} 已就绪 (pid={self.process.pid})")
+                return
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"LibreOffice 实例 #{self.slot} 启动超时（{startup_timeout:.0f} 秒）")
+
+    def stop(self) -> None:
+        """终止 UNO 辅助进程与 LibreOffice 进程（先 terminate，超时再 kill）"""
+        bridge, self.bridge = self.bridge, None
+        proc, self.process = self.process, None
+        for p in (bridge, proc):
+            if p is None or p.poll() is not None:
+                continue
+            p.terminate()
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait(timeout=5)
+
+    def is_healthy(self) -> bool:
+        """进程与 UNO 辅助进程存活且 UNO 管道可连接"""
+        if self.process is None or self.process.poll() is not None:
+            return False
+        if self.bridge is None or self.bridge.poll() is not None:
+            return False
+        return self._ping()
+
+    def _ping(self) -> bool:
+        try:
+            return self._request({"cmd": "ping"}, _PING_TIMEOUT)["ok"]
+        except Exception:
+            return False
+
+    def _request(self, payload: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """
+        向 UNO 辅助进程发送一条请求并等待回复。
+
+        Raises:
+            ConversionTimeout: timeout 秒内没有回复（LibreOffice 与辅助进程均已被杀掉）
+            RuntimeError:      辅助进程已退出
+        """
+        bridge = self.bridge
+        if bridge is None:
+            raise RuntimeError(f"LibreOffice 实例 #{self.slot} 未启动")
+
+        # UNO 调用本身不支持超时：由看门狗杀掉进程来打断卡死的转换
+        timed_out = threading.Event()
+
+        def on_timeout() -> None:
+            timed_out.set()
+            for proc in (self.process, bridge):
+                if proc is not None:
+                    proc.kill()
+
+        watchdog = threading.Timer(timeout, on_timeout)
+        watchdog.start()
+        try:
+            bridge.stdin.write(json.dumps(payload) + "\n")
+            bridge.stdin.flush()
+            line = bridge.stdout.readline()
+        except (OSError, ValueError):
+            line = ""
+        finally:
+            watchdog.cancel()
+
+        if timed_out.is_set():
+            raise ConversionTimeout(f"LibreOffice 转换超时（{timeout:.0f} 秒）。文档可能过大或过于复杂。")
+        if not line:
+            raise RuntimeError(f"LibreOffice 实例 #{self.slot} 的 UNO 辅助进程已退出")
+        return json.loads(line)
+
+    # ---------- 转换 ----------
+
+    def convert_warm(self, docx_path: str, pdf_path: str, timeout: float) -> None:
+        """经 UNO 辅助进程让常驻实例加载文档并导出 PDF"""
+        reply = self._request(
+            {"cmd": "convert", "src": os.path.abspath(docx_path), "dst": os.path.abspath(pdf_path)},
+            timeout,
+        )
+        if not reply["ok"]:
+            raise RuntimeError(f"LibreOffice 转换失败: {reply['error'][:500]}")
+
+    def convert_cold(self, docx_path: str, out_dir: str, timeout: float) -> None:
+        """无 UNO 时的退化路径：使用本槽位独占的配置目录冷启动一次转换"""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        cmd = [
+            self.binary,
+            f"-env:UserInstallation={self.profile_url}",
+            "--headless",
+            "--norestore",
+            "--convert-to", "pdf",
+            "--outdir", out_dir,
+            docx_path,
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except FileNotFoundError:
+            raise RuntimeError(
+                "LibreOffice 未安装或不在 PATH 中。"
+                "请确保 Docker 镜像已安装 libreoffice。"
+            )
+        except subprocess.TimeoutExpired:
+            raise ConversionTimeout(f"LibreOffice 转换超时（{timeout:.0f} 秒）。文档可能过大或过于复杂。")
+
+        if result.returncode != 0:
+            logger.error("soffice stderr: %s", result.stderr)
+            raise RuntimeError(f"LibreOffice 转换失败: {result.stderr[:500]}")
+
+
+class SofficePool:
+    """LibreOffice 实例池，线程安全"""
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_conversions: int = 50,
+        convert_timeout: float = 120,
+        startup_timeout: float = 30,
+        acquire_timeout: float = 300,
+        binary: str = "soffice",
+        profile_root: str = "/tmp/sga-office/soffice",
+        uno_python: Optional[str] = "/usr/bin/python3",
+    ):
+        self.max_conversions = max(1, max_conversions)
+        self.convert_timeout = convert_timeout
+        self.startup_timeout = startup_timeout
+        self.acquire_timeout = acquire_timeout
+        self.uno_python = _find_uno_python(uno_python)
+        self.warm = self.uno_python is not None
+
+        # 管道名与配置目录带上 pid，避免多个 uvicorn worker 之间冲突
+        pid = os.getpid()
+        self._instances = [
+            _SofficeInstance(
+                slot=i,
+                binary=binary,
+                profile_dir=Path(profile_root) / f"{pid}_{i}",
+                pipe_name=f"sga_soffice_{pid}_{i}",
+                uno_python=self.uno_python,
+            )
+            for i in range(max(1, size))
+        ]
+        self._idle: "queue.Queue[_SofficeInstance]" = queue.Queue()
+        for inst in self._instances:
+            self._idle.put(inst)
+
+        if self.warm:
+            logger.info(f"PDF-01 转换模式: 常驻实例 ×{len(self._instances)}（UNO 辅助进程: {self.uno_python}）")
+        else:
+            logger.warning(f"未找到可 import uno 的解释器（{uno_python}），PDF-01 将以冷启动模式运行")
+
+    @property
+    def mode(self) -> str:
+        """当前转换模式：warm（常驻实例）/ cold（每次冷启动）"""
+        return "warm" if self.warm else "cold"
+
+    def warm_up(self) -> None:
+        """预先启动所有实例（仅常驻模式有效，失败只记录日志）"""
+        if not self.warm or shutil.which(self._instances[0].binary) is None:
+            return
+        for inst in self._instances:
+            try:
+                if not inst.is_healthy():
+                    inst.start(self.startup_timeout)
+            except Exception as e:
+                logger.warning(f"LibreOffice 实例 #{inst.slot} 预热失败: {e}")
+
+    def convert(self, docx_path: str, out_dir: str) -> str:
+        """
+        将 docx 转换为 PDF，返回输出 PDF 路径。
+        空闲实例不足时排队等待，最长 acquire_timeout 秒。
+        """
+        try:
+            inst = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise RuntimeError("LibreOffice 转换队列繁忙，请稍后重试。")
+
+        pdf_path = os.path.join(out_dir, Path(docx_path).stem + ".pdf")
+        try:
+            if self.warm:
+                if not inst.is_healthy():
+                    if inst.process is not None:
+                        logger.warning(f"LibreOffice 实例 #{inst.slot} 无响应，正在重启")
+                    inst.stop()
+                    inst.start(self.startup_timeout)
+                inst.convert_warm(docx_path, pdf_path, self.convert_timeout)
+            else:
+                inst.convert_cold(docx_path, out_dir, self.convert_timeout)
+            inst.conversions += 1
+        except Exception:
+            # 出错的实例直接停掉，下次领取时重新启动
+            inst.stop()
+            raise
+        else:
+            if inst.conversions >= self.max_conversions:
+                logger.info(f"LibreOffice 实例 #{inst.slot} 已完成 {inst.conversions} 次转换，回收重启")
+                inst.stop()
+        finally:
+            self._idle.put(inst)
+
+        if not os.path.exists(pdf_path):
+            raise RuntimeError("LibreOffice 转换后未找到 PDF 文件。")
+        return pdf_path
+
+    def shutdown(self) -> None:
+        """停止所有实例并清理配置目录"""
+        for inst in self._instances:
+            inst.stop()
+            shutil.rmtree(inst.profile_dir, ignore_errors=True)
+
+
+# 模块级单例 (惰性初始化)
+_soffice_pool: SofficePool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_soffice_pool() -> SofficePool:
+    """获取 LibreOffice 转换池单例"""
+    global _soffice_pool
+    if _soffice_pool is None:
+        with _pool_lock:
+            if _soffice_pool is None:
+                settings = get_settings()
+                _soffice_pool = SofficePool(
+                    size=settings.soffice_pool_size,
+                    max_conversions=settings.soffice_max_conversions,
+                    convert_timeout=settings.soffice_convert_timeout,
+                    startup_timeout=settings.soffice_startup_timeout,
+                    binary=settings.soffice_binary,
+                    profile_root=os.path.join(settings.temp_dir, "soffice"),
+                    uno_python=settings.soffice_uno_python,
+                )
+    return _soffice_pool
+
+
+def shutdown_soffice_pool() -> None:
+    """关闭转换池（应用退出时调用）"""
+    global _soffice_pool
+    with _pool_lock:
+        if _soffice_pool is not None:
+            _soffice_pool.shutdown()
+            _soffice_pool = None
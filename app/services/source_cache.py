@@ -0,0 +1,347 @@
+"""
+源文件本地缓存（条件 GET）。
+
+DOC-02 模板、PDF-02 图章、EXC-02/04 源表格、Markdown 图片等远程文件会被反复下载。
+本模块把下载结果按 URL 缓存在本地磁盘：
+
+- 服务端返回 ETag / Last-Modified 时，每次使用前发送 If-None-Match / If-Modified-Since，
+  304 直接复用本地副本；
+- 服务端不提供校验器时，在 source_cache_ttl_seconds 内直接复用，过期后重新下载；
+- 同一进程内对同一 URL 的并发请求合并为一次网络请求；
+- 磁盘总体积受 source_cache_mb 限制，超出时淘汰最久未访问的文件；
+- Cache-Control: no-store 或超过总容量的文件不入缓存；
+- source_version 给出 URL 当前版本的标识（ETag / Last-Modified），供按版本缓存解析结果的调用方
+  在不读取内容的情况下判断文件是否变化。
+
+磁盘上每个 URL 对应 {sha256}.bin（内容）与 {sha256}.json（校验器元数据），
+多个 worker 进程共享同一目录。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Iterator, Optional
+
+from app.core.config import get_settings
+from app.core.http_client import Timeout, download_spooled, http_get, http_head, spool_response, write_response_body
+
+logger = logging.getLogger(__name__)
+
+
+class SourceCache:
+    """按 URL 缓存远程源文件，线程安全"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: float = 300,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._inflight: dict[str, tuple[threading.Lock, int]] = {}
+        self._counters = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    def open(self, url: str, timeout: Optional[Timeout] = None) -> BinaryIO:
+        """
+        返回远程文件内容的只读文件对象（已位于开头，调用方负责 close）。
+
+        Raises:
+            DownloadTooLargeError: 文件超过 max_upload_size_mb
+            requests.HTTPError:    非 2xx/304 响应
+        """
+        return self._open(url, timeout)[0]
+
+    def version(self, url: str, timeout: Optional[Timeout] = None) -> Optional[str]:
+        """
+        校验本地副本（内容有变化时顺带下载入缓存），返回其 ETag / Last-Modified 标识。
+        服务端不提供校验器或文件未入缓存时返回 None。
+        """
+        f, meta = self._open(url, timeout)
+        f.close()
+        if meta is None:
+            return None
+        return validator_token(meta.get("etag"), meta.get("last_modified"))
+
+    def _open(self, url: str, timeout: Optional[Timeout]) -> tuple[BinaryIO, Optional[dict[str, Any]]]:
+        """返回 (文件对象, 该内容对应的元数据)，未入缓存时元数据为 None"""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        requested_at = time.time()
+
+        with self._url_lock(key):
+            meta = self._read_meta(key)
+            if meta is not None and self._is_fresh(meta, requested_at):
+                f = self._open_body(key)
+                if f is not None:
+                    self._count("hits")
+                    return f, meta
+            return self._fetch(url, key, meta, timeout)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "disk_bytes": self._disk_bytes}
+
+    # ---------- 新鲜度 ----------
+
+    def _is_fresh(self, meta: dict[str, Any], requested_at: float) -> bool:
+        # 等锁期间已有其他请求完成下载/校验，直接复用
+        if meta["validated_at"] >= requested_at:
+            return True
+        if meta.get("etag") or meta.get("last_modified"):
+            return False
+        return time.time() - meta["validated_at"] < self.ttl_seconds
+
+    # ---------- 下载 ----------
+
+    def _fetch(
+        self,
+        url: str,
+        key: str,
+        meta: Optional[dict[str, Any]],
+        timeout: Optional[Timeout],
+    ) -> tuple[BinaryIO, Optional[dict[str, Any]]]:
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with http_get(url, timeout=timeout, headers=headers or None, stream=True) as response:
+            if response.status_code == 304 and meta is not None:
+                f = self._open_body(key)
+                if f is not None:
+                    meta["validated_at"] = time.time()
+                    self._write_json(self._meta_path(key), meta)
+                    self._count("revalidated")
+                    return f, meta
+                # 元数据还在但内容已被淘汰：放弃条件请求
+                return self._fetch(url, key, None, timeout)
+
+            response.raise_for_status()
+            self._count("misses")
+
+            cacheable = "no-store" not in response.headers.get("Cache-Control", "").lower()
+            declared = response.headers.get("Content-Length", "")
+            if declared.isdigit() and int(declared) > self.max_bytes:
+                cacheable = False
+            if not cacheable:
+                return spool_response(response), None
+
+            body_path = self._body_path(key)
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(body_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    size = write_response_body(response, tmp)
+                f = open(tmp_path, "rb")
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            if size > self.max_bytes:
+                os.unlink(tmp_path)  # 已打开的句柄仍然可读
+                return f, None
+
+            try:
+                old_size = os.path.getsize(body_path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, body_path)
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": size,
+                "validated_at": time.time(),
+            }
+            self._write_json(self._meta_path(key), meta)
+
+        with self._lock:
+            self._disk_bytes += size - old_size
+            over = self._disk_bytes > self.max_bytes
+        if over:
+            self._evict()
+        return f, meta
+
+    # ---------- 磁盘 ----------
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_meta(self, key: str) -> Optional[dict[str, Any]]:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"源文件缓存元数据损坏，已忽略: {key} ({e})")
+            return None
+
+    def _open_body(self, key: str) -> Optional[BinaryIO]:
+        path = self._body_path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # 以 mtime 作为最近访问时间
+        except OSError:
+            pass
+        return f
+
+    @staticmethod
+    def _write_json(path: str, data: dict[str, Any]) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _scan_disk(self) -> list[tuple[float, int, str]]:
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".bin"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _evict(self) -> None:
+        """按 mtime 从旧到新删除，直到总体积回到上限以内"""
+        files = sorted(self._scan_disk())
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                os.unlink(path[:-len(".bin")] + ".json")
+            except OSError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["evictions"] += evicted
+
+    # ---------- 并发 ----------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @contextmanager
+    def _url_lock(self, key: str) -> Iterator[None]:
+        """同一 URL 的请求串行执行，后到者复用先到者的下载结果"""
+        with self._lock:
+            lock, waiters = self._inflight.get(key, (threading.Lock(), 0))
+            self._inflight[key] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, waiters = self._inflight[key]
+                if waiters == 1:
+                    del self._inflight[key]
+                else:
+                    self._inflight[key] = (lock, waiters - 1)
+
+
+def validator_token(etag: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+    """由 ETag / Last-Modified 组成的版本标识，两者都没有时返回 None"""
+    if etag:
+        return f"etag:{etag}"
+    if last_modified:
+        return f"last-modified:{last_modified}"
+    return None
+
+
+def _local_storage_path(url: str) -> Optional[str]:
+    """本地存储后端生成的 URL 直接映射为磁盘路径，不走网络"""
+    from app.services.storage_backend import get_storage_backend
+    return get_storage_backend("local").path_for_url(url)
+
+
+def open_source(url: str, timeout: Optional[Timeout] = None) -> BinaryIO:
+    """
+    打开远程源文件：本地存储的文件直接打开；缓存启用时走 SourceCache，否则直接流式下载。
+    返回的文件对象由调用方负责 close。
+    """
+    local_path = _local_storage_path(str(url))
+    if local_path is not None:
+        try:
+            return open(local_path, "rb")
+        except FileNotFoundError:
+            raise ValueError(f"本地存储中不存在该文件: {url}")
+
+    cache = get_source_cache()
+    if cache is None:
+        return download_spooled(str(url), timeout=timeout)
+    return cache.open(str(url), timeout=timeout)
+
+
+def source_version(url: str, timeout: Optional[Timeout] = None) -> Optional[str]:
+    """
+    源文件当前版本的标识，不读取内容：本地存储的文件取 mtime 与大小；
+    远程文件取 ETag / Last-Modified（缓存启用时来自 SourceCache 的条件 GET，未启用时发 HEAD）。
+    服务端不提供校验器时返回 None，调用方应退回按内容摘要判断。
+    """
+    local_path = _local_storage_path(str(url))
+    if local_path is not None:
+        try:
+            st = os.stat(local_path)
+        except FileNotFoundError:
+            raise ValueError(f"本地存储中不存在该文件: {url}")
+        return f"mtime:{st.st_mtime_ns}:{st.st_size}"
+
+    cache = get_source_cache()
+    if cache is not None:
+        return cache.version(str(url), timeout=timeout)
+    response = http_head(str(url), timeout=timeout)
+    if not response.ok:
+        return None
+    return validator_token(response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+
+# 模块级单例 (惰性初始化)
+_source_cache: SourceCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_source_cache() -> Optional[SourceCache]:
+    """获取源文件缓存单例，未启用时返回 None"""
+    global _source_cache
+    settings = get_settings()
+    if not settings.source_cache_enabled:
+        return None
+    if _source_cache is None:
+        with _cache_lock:
+            if _source_cache is None:
+                _source_cache = SourceCache(
+                    cache_dir=os.path.join(settings.temp_dir, "source_cache"),
+                    max_bytes=settings.source_cache_mb * 1024 * 1024,
+                    ttl_seconds=settings.source_cache_ttl_seconds,
+                )
+    return _source_cache
@@ -0,0 +1,159 @@
+"""
+可插拔存储后端。
+
+所有产物上传、源文件下载都通过 StorageBackend 接口完成，目前提供两种实现：
+- cos:   腾讯云 COS 对象存储（默认，app.services.cos_storage）
+- local: 本地磁盘/共享卷（app.services.local_storage），经 /api/v1/files 路由对外提供下载
+
+后端选择：
+- 按部署：Settings.storage_backend
+- 按请求：请求头 X-Storage-Backend（由中间件写入 app.core.request_context）
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import BinaryIO, Optional, Union
+from urllib.parse import quote
+
+from app.core.config import get_settings
+from app.core.http_client import default_timeout, get_http_session
+from app.core.request_context import storage_backend_var
+from app.services.source_cache import open_source
+
+UploadData = Union[bytes, bytearray, memoryview, BinaryIO]
+
+STORAGE_BACKENDS = ("cos", "local")
+
+
+def guess_content_type(key: str) -> str:
+    """根据文件后缀推断 Content-Type"""
+    ext = key.rsplit(".", 1)[-1].lower() if "." in key else ""
+    mapping = {
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "pdf": "application/pdf",
+        "png": "image/png",
+        "svg": "image/svg+xml",
+        "jpg": "image/jpeg",
+        "jpeg": "image/jpeg",
+    }
+    return mapping.get(ext, "application/octet-stream")
+
+
+class StorageBackend(ABC):
+    """存储后端接口：上传产物、判断对象是否存在；下载逻辑各后端共享"""
+
+    name: str = ""
+
+    @property
+    @abstractmethod
+    def base_url(self) -> str:
+        """已上传文件 URL 的公共前缀"""
+
+    @abstractmethod
+    def upload_bytes(self, data: UploadData, cos_key: str) -> str:
+        """上传内存数据（bytes / memoryview / 可 seek 的文件对象），返回文件 URL"""
+
+    @abstractmethod
+    def upload_file(self, local_path: str, cos_key: str) -> str:
+        """上传本地文件，返回文件 URL"""
+
+    @abstractmethod
+    def exists(self, file_url: str) -> bool:
+        """判断已上传的文件是否仍然存在"""
+
+    def url_for(self, cos_key: str) -> str:
+        return f"{self.base_url}/{quote(cos_key)}"
+
+    # ---------- 下载（任意 URL，经源文件缓存） ----------
+
+    def download_to_bytes(self, url: str) -> bytes:
+        """
+        从 URL 下载文件到内存。支持本服务产物链接和任意外部 URL。
+        仅适用于小文件（图章、模板等），大文件请使用 download_to_file。
+        """
+        with open_source(url) as f:
+            return f.read()
+
+    def download_to_file(self, url: str) -> BinaryIO:
+        """
+        打开远程文件（经源文件缓存，未启用时流式下载到 SpooledTemporaryFile）。
+        返回已 seek(0) 的文件对象 (调用方需负责 close)。
+        """
+        return open_source(url)
+
+    def download_to_tempfile(self, url: str, suffix: str = "", dir: Optional[str] = None) -> str:
+        """
+        从 URL 流式下载文件到临时文件，不在内存中保留完整内容。
+        返回临时文件的本地路径 (调用方需负责清理)。
+        """
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=dir)
+        try:
+            with os.fdopen(fd, "wb") as f, open_source(url) as src:
+                shutil.copyfileobj(src, f)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return temp_path
+
+    @staticmethod
+    def _remote_exists(file_url: str) -> bool:
+        """外部 URL：发 HEAD 请求，仅 404/410 视为不存在"""
+        response = get_http_session().head(file_url, timeout=default_timeout(), allow_redirects=True)
+        return response.status_code not in (404, 410)
+
+    @staticmethod
+    def generate_cos_key(prefix: str, filename: str, ext: str) -> str:
+        """
+        生成标准化的存储路径。
+        格式: {prefix}/{清理后文件名}_{日期}_{短UUID}.{ext}
+        """
+        clean_name = re.sub(r'[\\/:*?"<>|\s]', '', filename)[:30]
+        if not clean_name:
+            clean_name = "unnamed"
+        date_str = datetime.now().strftime("%Y%m%d")
+        short_id = uuid.uuid4().hex[:8]
+        return f"{prefix}/{clean_name}_{date_str}_{short_id}.{ext}"
+
+
+# =====================================================
+#  后端选择
+# =====================================================
+
+_backends: dict[str, StorageBackend] = {}
+_lock = threading.Lock()
+
+
+def active_backend_name() -> str:
+    """当前请求生效的后端名称（请求头优先，其次部署配置）"""
+    return storage_backend_var.get() or get_settings().storage_backend
+
+
+def get_storage_backend(name: Optional[str] = None) -> StorageBackend:
+    """
+    获取存储后端单例。
+    Args:
+        name: 后端名称 (cos / local)，默认取当前请求生效的后端
+    """
+    name = name or active_backend_name()
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"未知的存储后端: {name}（可选: {', '.join(STORAGE_BACKENDS)}）")
+    backend = _backends.get(name)
+    if backend is None:
+        with _lock:
+            backend = _backends.get(name)
+            if backend is None:
+                if name == "cos":
+                    from app.services.cos_storage import CosStorageService
+                    backend = CosStorageService()
+                else:
+                    from app.services.local_storage import LocalStorageService
+                    backend = LocalStorageService()
+                _backends[name] = backend
+    return backend
@@ -0,0 +1,280 @@
+"""
+进程内异步任务队列（架构文档中的"模式 B"：202 Accepted + 轮询）。
+
+长耗时渲染（PDF-01 / EXC-03 / VIS-02）可选择不占用 HTTP 连接：
+网关登记任务后立即返回 task_id，任务在当前进程的事件循环中后台执行，
+实际计算仍通过 app.core.executor 派发到线程/进程池。
+
+状态机: queued → running → succeeded | failed
+
+任务状态存储可插拔：
+- memory: 进程内字典（默认，单 worker 部署）
+- sqlite: 本地 SQLite 文件，多个 uvicorn worker 共享同一文件即可互查任务状态
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TaskStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+# 合法的状态迁移
+_TRANSITIONS: dict[TaskStatus, set[TaskStatus]] = {
+    TaskStatus.QUEUED: {TaskStatus.RUNNING, TaskStatus.FAILED},
+    TaskStatus.RUNNING: {TaskStatus.SUCCEEDED, TaskStatus.FAILED},
+    TaskStatus.SUCCEEDED: set(),
+    TaskStatus.FAILED: set(),
+}
+
+
+@dataclass
+class TaskRecord:
+    """单个后台任务的状态快照"""
+    task_id: str
+    kind: str
+    status: TaskStatus = TaskStatus.QUEUED
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    error_code: Optional[int] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (TaskStatus.SUCCEEDED, TaskStatus.FAILED)
+
+    def transition(self, new_status: TaskStatus) -> None:
+        if new_status not in _TRANSITIONS[self.status]:
+            raise ValueError(f"非法的任务状态迁移: {self.status.value} → {new_status.value}")
+        self.status = new_status
+        self.updated_at = time.time()
+
+
+# =====================================================
+#  存储后端
+# =====================================================
+
+class TaskBackend(ABC):
+    """任务状态存储接口"""
+
+    @abstractmethod
+    def save(self, record: TaskRecord) -> None:
+        """新增或覆盖一条任务记录"""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        """按 task_id 查询，不存在返回 None"""
+
+    @abstractmethod
+    def purge(self, finished_before: float) -> int:
+        """删除在指定时间之前已结束的任务，返回删除条数"""
+
+
+class MemoryTaskBackend(TaskBackend):
+    """进程内字典存储"""
+
+    def __init__(self):
+        self._records: dict[str, TaskRecord] = {}
+        self._lock = threading.Lock()
+
+    def save(self, record: TaskRecord) -> None:
+        with self._lock:
+            self._records[record.task_id] = record
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        with self._lock:
+            return self._records.get(task_id)
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            expired = [
+                tid for tid, r in self._records.items()
+                if r.finished and r.updated_at < finished_before
+            ]
+            for tid in expired:
+                del self._records[tid]
+        return len(expired)
+
+
+class SqliteTaskBackend(TaskBackend):
+    """
+    SQLite 文件存储。多个 worker 进程指向同一文件即可共享任务状态，
+    作为引入 Redis 之前的轻量替代。
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " task_id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " error_code INTEGER,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def save(self, record: TaskRecord) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.task_id,
+                    record.kind,
+                    record.status.value,
+                    json.dumps(record.result, ensure_ascii=False) if record.result is not None else None,
+                    record.error,
+                    record.error_code,
+                    record.created_at,
+                    record.updated_at,
+                ),
+            )
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT task_id, kind, status, result, error, error_code, created_at, updated_at"
+                " FROM tasks WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return TaskRecord(
+            task_id=row[0],
+            kind=row[1],
+            status=TaskStatus(row[2]),
+            result=json.loads(row[3]) if row[3] else None,
+            error=row[4],
+            error_code=row[5],
+            created_at=row[6],
+            updated_at=row[7],
+        )
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM tasks WHERE status IN (?, ?) AND updated_at < ?",
+                (TaskStatus.SUCCEEDED.value, TaskStatus.FAILED.value, finished_before),
+            )
+        return cur.rowcount
+
+
+# =====================================================
+#  任务队列
+# =====================================================
+
+class TaskQueue:
+    """在当前事件循环中调度后台任务，并发数受 max_concurrency 限制"""
+
+    def __init__(self, backend: TaskBackend, max_concurrency: int = 4, result_ttl: int = 3600):
+        self.backend = backend
+        self._max_concurrency = max(1, max_concurrency)
+        self._result_ttl = result_ttl
+        # asyncio.Semaphore 绑定事件循环，按循环分别创建
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # 持有后台 Task 引用，防止被 GC 提前回收
+        self._running: set[asyncio.Task] = set()
+
+    def submit(self, kind: str, work: Callable[[], Awaitable[dict[str, Any]]]) -> TaskRecord:
+        """
+        登记并调度一个后台任务，必须在事件循环中调用。
+
+        Args:
+            kind: 任务类别，如 "PDF-01"
+            work: 无参协程工厂，返回结果 dict（如 {"file_url", "filename"}）
+
+        Returns:
+            状态为 queued 的 TaskRecord
+        """
+        self.backend.purge(time.time() - self._result_ttl)
+
+        record = TaskRecord(task_id=str(uuid.uuid4()), kind=kind)
+        self.backend.save(record)
+
+        task = asyncio.get_running_loop().create_task(self._execute(record, work))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+        return record
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        return self.backend.get(task_id)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self._max_concurrency)
+            self._semaphores[loop] = sem
+        return sem
+
+    async def _execute(self, record: TaskRecord, work: Callable[[], Awaitable[dict[str, Any]]]) -> None:
+        async with self._semaphore():
+            record.transition(TaskStatus.RUNNING)
+            self.backend.save(record)
+            try:
+                record.result = await work()
+                record.transition(TaskStatus.SUCCEEDED)
+            except ValueError as e:
+                record.error, record.error_code = str(e), 422
+                record.transition(TaskStatus.FAILED)
+            except Exception as e:
+                logger.exception(f"后台任务 {record.kind} ({record.task_id}) 失败")
+                record.error, record.error_code = str(e), 500
+                record.transition(TaskStatus.FAILED)
+            finally:
+                self.backend.save(record)
+
+
+def _create_backend() -> TaskBackend:
+    settings = get_settings()
+    if settings.task_backend == "sqlite":
+        return SqliteTaskBackend(settings.task_sqlite_path)
+    if settings.task_backend != "memory":
+        logger.warning(f"未知的任务存储后端 '{settings.task_backend}'，回退到 memory")
+    return MemoryTaskBackend()
+
+
+# 模块级单例 (惰性初始化)
+_task_queue: TaskQueue | None = None
+
+
+def get_task_queue() -> TaskQueue:
+    """获取任务队列单例"""
+    global _task_queue
+    if _task_queue is None:
+        settings = get_settings()
+        _task_queue = TaskQueue(
+            backend=_create_backend(),
+            max_concurrency=settings.task_max_concurrency,
+            result_ttl=settings.task_result_ttl_seconds,
+        )
+    return _task_queue
+
@@ -0,0 +1,67 @@
+"""
+PDF-01 UNO 辅助进程（由 soffice_pool 启动，应用本身不导入本模块）。
+
+python3-uno 只安装在发行版自带的 python3 中，应用所用的 pip 解释器无法 import uno。
+soffice_pool 为每个常驻实例以该解释器启动本脚本，经 stdin / stdout 逐行收发 JSON：
+
+- {"cmd": "ping"}                            → 连接实例的 UNO 管道
+- {"cmd": "convert", "src": ..., "dst": ...} → 加载 docx 并导出 PDF
+
+每条请求回复一行 {"ok": true} 或 {"ok": false, "error": "..."}。
+本脚本只能依赖标准库与 uno，不能导入 app 包。
+
+用法: python3 uno_bridge.py <uno_url>
+"""
+
+import json
+import sys
+
+import uno
+from com.sun.star.beans import PropertyValue  # 由 uno 模块注册的导入钩子提供
+
+
+def _prop(name, value):
+    p = PropertyValue()
+    p.Name, p.Value = name, value
+    return p
+
+
+def _connect(uno_url):
+    """连接实例的 UNO ComponentContext"""
+    local_ctx = uno.getComponentContext()
+    resolver = local_ctx.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_ctx
+    )
+    return resolver.resolve(uno_url)
+
+
+def _convert(uno_url, src, dst):
+    ctx = _connect(uno_url)
+    desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    doc = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(src), "_blank", 0, (_prop("Hidden", True),),
+    )
+    try:
+        doc.storeToURL(uno.systemPathToFileUrl(dst), (_prop("FilterName", "writer_pdf_Export"),))
+    finally:
+        doc.close(True)
+
+
+def main():
+    uno_url = sys.argv[1]
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            if request["cmd"] == "ping":
+                _connect(uno_url)
+            else:
+                _convert(uno_url, request["src"], request["dst"])
+            reply = {"ok": True}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
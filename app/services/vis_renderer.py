@@ -13,8 +13,7 @@ import logging
 from io import BytesIO
 from typing import Any, Optional
 
-import requests
-
+from app.core.http_client import http_get
 from app.services.cos_storage import get_cos_service
 
 logger = logging.getLogger(__name__)
@@ -57,11 +56,7 @@ def render_mermaid_to_image(
         ext = "png"
 
     # 请求渲染
-    response = requests.get(
-        render_url,
-        timeout=30,
-        headers={"User-Agent": "SGA-Office/1.0"},
-    )
+    response = http_get(render_url, timeout=30)
     if response.status_code != 200:
         raise ValueError(
             f"Mermaid 渲染失败 (HTTP {response.status_code})。"
@@ -140,7 +135,7 @@ def render_chart_from_data(
     # 上传
     cos = get_cos_service()
     cos_key = cos.generate_cos_key("vis_charts", f"chart_{chart_type}", ext)
-    file_url = cos.upload_bytes(buf.getvalue(), cos_key)
+    file_url = cos.upload_bytes(buf, cos_key)
 
     return {
         "file_url": file_url,
@@ -277,7 +272,7 @@ def generate_qrcode(
 
     cos = get_cos_service()
     cos_key = cos.generate_cos_key("vis_qrcode", "qrcode", "png")
-    file_url = cos.upload_bytes(buf.getvalue(), cos_key)
+    file_url = cos.upload_bytes(buf, cos_key)
 
     return {
         "file_url": file_url,
@@ -314,7 +309,7 @@ def generate_barcode(
 
     cos = get_cos_service()
     cos_key = cos.generate_cos_key("vis_barcode", f"barcode_{barcode_type}", "png")
-    file_url = cos.upload_bytes(buf.getvalue(), cos_key)
+    file_url = cos.upload_bytes(buf, cos_key)
 
     return {
         "file_url": file_url,
@@ -379,7 +374,7 @@ def generate_wordcloud(
 
     cos = get_cos_service()
     cos_key = cos.generate_cos_key("vis_wordcloud", "wordcloud", "png")
-    file_url = cos.upload_bytes(buf.getvalue(), cos_key)
+    file_url = cos.upload_bytes(buf, cos_key)
 
     return {
         "file_url": file_url,
@@ -0,0 +1,16 @@
+"""
+SGA-Office 服务层基准测试套件。
+
+对每个服务入口函数构造合成负载，在独立子进程中运行并记录：
+- wall_seconds:  墙钟耗时（多次运行取最小值）
+- peak_rss_mb:   负载运行期间的进程峰值常驻内存
+- peak_alloc_mb: tracemalloc 统计的 Python 分配峰值（单独一轮运行，不影响计时）
+
+存储后端固定为 local（临时目录），远程源文件由本机 HTTP 替身服务提供，
+测量结果不含 COS 与公网延迟。
+
+用法:
+    python -m benchmarks.run                    # 运行全部负载并与 baseline.json 比较
+    python -m benchmarks.run --only excel_array # 只跑指定负载
+    python -m benchmarks.run --update-baseline  # 重新生成基线
+"""
@@ -0,0 +1,248 @@
+"""
+基准测试运行器。
+
+每个负载在全新的子进程中执行两次：
+- time 模式: 预热一轮后运行 --repeat 轮，记录最小墙钟耗时与运行期间峰值 RSS
+- alloc 模式: 开启 tracemalloc 运行一轮，记录 Python 分配峰值
+
+结果与 baseline.json 比较，任一指标同时超过相对阈值 (--threshold) 与绝对噪声下限时
+视为性能回退，进程以退出码 1 结束。
+
+    python -m benchmarks.run [--only NAME ...] [--scale 1.0] [--repeat 3]
+                             [--threshold 0.2] [--update-baseline] [--output result.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+METRICS = ("wall_seconds", "peak_rss_mb", "peak_alloc_mb")
+
+# 绝对差值低于噪声下限的变化不计为回退（小负载的相对抖动很大）
+NOISE_FLOOR = {
+    "wall_seconds": 0.05,
+    "peak_rss_mb": 8.0,
+    "peak_alloc_mb": 2.0,
+}
+
+
+# =====================================================
+#  子进程: 执行单个负载
+# =====================================================
+
+def _reset_peak_rss() -> bool:
+    """Linux 下重置进程的 VmHWM，使峰值 RSS 只反映负载运行期间"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，Linux 为 KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(name: str, mode: str, scale: float, repeat: int) -> dict[str, float]:
+    """在当前进程中运行一个负载并返回指标（由子进程调用）"""
+    from benchmarks.workloads import WORKLOADS
+
+    run = WORKLOADS[name].prepare(scale)
+    # 预热：首轮包含惰性 import、字体缓存等一次性开销
+    run()
+    gc.collect()
+
+    if mode == "alloc":
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"peak_alloc_mb": peak / (1024 * 1024)}
+
+    _reset_peak_rss()
+    timings = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        gc.collect()
+    return {"wall_seconds": min(timings), "peak_rss_mb": _peak_rss_mb()}
+
+
+# =====================================================
+#  父进程: 调度、比较、报告
+# =====================================================
+
+def _run_worker(name: str, mode: str, scale: float, repeat: int, env: dict[str, str]) -> dict[str, float]:
+    cmd = [
+        sys.executable, "-m", "benchmarks.run",
+        "--worker", name, "--mode", mode,
+        "--scale", str(scale), "--repeat", str(repeat),
+    ]
+    proc = subprocess.run(cmd, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"负载 {name} ({mode}) 运行失败:\n{proc.stderr[-4000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_workloads(names: list[str], scale: float, repeat: int) -> dict[str, dict[str, float]]:
+    """启动本地替身并逐个运行负载，返回 {负载名: 指标}"""
+    from benchmarks.standins import AssetServer, standin_env
+
+    results: dict[str, dict[str, float]] = {}
+    with AssetServer() as server, tempfile.TemporaryDirectory(prefix="sga-bench-") as work_dir:
+        env = standin_env(work_dir, server.base_url)
+        for name in names:
+            metrics: dict[str, float] = {}
+            metrics.update(_run_worker(name, "time", scale, repeat, env))
+            metrics.update(_run_worker(name, "alloc", scale, repeat, env))
+            results[name] = {k: round(metrics[k], 4) for k in METRICS}
+            print(
+                f"  {name:<16} {results[name]['wall_seconds']:>9.3f}s"
+                f" {results[name]['peak_rss_mb']:>9.1f}MB rss"
+                f" {results[name]['peak_alloc_mb']:>9.1f}MB alloc",
+                flush=True,
+            )
+    return results
+
+
+def machine_info() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(
+    baseline: dict[str, dict[str, float]],
+    current: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[dict[str, Any]]:
+    """
+    比较当前结果与基线，返回回退列表。
+    回退条件: current > baseline × (1 + threshold) 且差值超过该指标的噪声下限。
+    基线中没有的负载或指标跳过。
+    """
+    regressions = []
+    for name, metrics in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in METRICS:
+            if metric not in metrics or metric not in base:
+                continue
+            old, new = base[metric], metrics[metric]
+            if new > old * (1 + threshold) and new - old > NOISE_FLOOR[metric]:
+                regressions.append({
+                    "workload": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": round(new / old, 3) if old else float("inf"),
+                })
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_report(path: str, scale: float, results: dict[str, dict[str, float]]) -> None:
+    report = {
+        "version": 1,
+        "scale": scale,
+        "machine": machine_info(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from benchmarks.workloads import WORKLOADS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="SGA-Office 服务层基准测试")
+    parser.add_argument("--only", nargs="+", choices=sorted(WORKLOADS), help="只运行指定负载")
+    parser.add_argument("--scale", type=float, default=1.0, help="负载规模系数 (默认 1.0)")
+    parser.add_argument("--repeat", type=int, default=3, help="计时轮数，取最小值 (默认 3)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的相对退化比例 (默认 0.2 即 20%%)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--output", help="另存本次结果的 JSON 路径")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=("time", "alloc"), default="time", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.mode, args.scale, args.repeat)))
+        return 0
+
+    names = args.only or list(WORKLOADS)
+    baseline = None if args.update_baseline else load_baseline(args.baseline)
+    if baseline is not None and baseline.get("scale") != args.scale:
+        print(f"基线规模为 {baseline.get('scale')}，与本次 --scale {args.scale} 不一致，无法比较", file=sys.stderr)
+        return 2
+
+    print(f"运行 {len(names)} 个负载 (scale={args.scale}, repeat={args.repeat})", flush=True)
+    results = run_workloads(names, args.scale, args.repeat)
+
+    if args.output:
+        write_report(args.output, args.scale, results)
+
+    if args.update_baseline:
+        if args.only and os.path.exists(args.baseline):
+            # 只更新指定负载，保留其余基线
+            merged = load_baseline(args.baseline) or {}
+            results = {**merged.get("results", {}), **results}
+        write_report(args.baseline, args.scale, results)
+        print(f"基线已写入 {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"未找到基线 {args.baseline}，请先运行 --update-baseline", file=sys.stderr)
+        return 2
+
+    regressions = compare(baseline.get("results", {}), results, args.threshold)
+    if not regressions:
+        print(f"未发现超过 {args.threshold:.0%} 的性能回退")
+        return 0
+    print(f"发现 {len(regressions)} 项性能回退:", file=sys.stderr)
+    for r in regressions:
+        print(
+            f"  {r['workload']}.{r['metric']}: {r['baseline']} -> {r['current']} (x{r['ratio']})",
+            file=sys.stderr,
+        )
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
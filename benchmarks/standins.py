@@ -0,0 +1,172 @@
+"""
+基准测试用的本地替身：
+- AssetServer: 127.0.0.1 上的 HTTP 服务，按需生成并缓存合成的 PNG / PDF 源文件
+- standin_env: 子进程环境变量，把存储后端切到临时目录下的 local 后端
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Callable, Optional
+
+
+# =====================================================
+#  合成源文件
+# =====================================================
+
+def make_png(index: int, width: int = 640, height: int = 400) -> bytes:
+    """生成一张带渐变和色块的 PNG（内容随 index 变化，避免各图片完全相同）"""
+    from PIL import Image, ImageDraw
+
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    hue = (index * 47) % 255
+    for i in range(8):
+        x0 = (i * 73 + index * 31) % (width - 80)
+        y0 = (i * 41 + index * 17) % (height - 80)
+        draw.rectangle([x0, y0, x0 + 80, y0 + 80], fill=(hue, 255 - hue, (hue * 3) % 255))
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_pdf(index: int, pages: int = 4) -> bytes:
+    """生成一份多页文本 PDF"""
+    import fitz
+
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Benchmark source #{index} - page {p + 1}", fontsize=18)
+        body = "\n".join(
+            f"Line {line:03d}: synthetic content for merge workload {index}/{p}"
+            for line in range(40)
+        )
+        page.insert_textbox(fitz.Rect(72, 100, 540, 780), body, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+_GENERATORS: dict[str, tuple[Callable[[int], bytes], str]] = {
+    "img": (make_png, "image/png"),
+    "pdf": (make_pdf, "application/pdf"),
+}
+
+
+# =====================================================
+#  HTTP 替身
+# =====================================================
+
+class AssetServer:
+    """
+    本机源文件服务。路径格式 /{kind}/{index}.{ext}，如 /img/3.png、/pdf/12.pdf。
+    内容按路径生成一次后常驻内存，带 ETag 与 Content-Length。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._assets: dict[str, tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(with_body=True)
+
+            def do_HEAD(self):
+                self._respond(with_body=False)
+
+            def _respond(self, with_body: bool):
+                asset = server.asset(self.path)
+                if asset is None:
+                    self.send_error(404)
+                    return
+                body, content_type = asset
+                etag = f'"{len(body):x}-{hash(body) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                if with_body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def asset(self, path: str) -> Optional[tuple[bytes, str]]:
+        """按请求路径取（必要时生成）源文件内容"""
+        path = path.split("?", 1)[0]
+        with self._lock:
+            cached = self._assets.get(path)
+        if cached is not None:
+            return cached
+        parts = path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in _GENERATORS:
+            return None
+        stem = parts[1].split(".", 1)[0]
+        if not stem.isdigit():
+            return None
+        generate, content_type = _GENERATORS[parts[0]]
+        asset = (generate(int(stem)), content_type)
+        with self._lock:
+            self._assets.setdefault(path, asset)
+        return asset
+
+    def start(self) -> "AssetServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "AssetServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# =====================================================
+#  存储替身
+# =====================================================
+
+def standin_env(work_dir: str, asset_url: str) -> dict[str, str]:
+    """
+    基准子进程的环境变量：local 存储后端写入 work_dir，临时文件也落在 work_dir。
+    源文件缓存关闭，保证每轮运行都真实经过一次（本机）HTTP 下载；EXC-04 解析结果缓存同样关闭。
+    """
+    env = dict(os.environ)
+    env.update({
+        "COS_SECRET_ID": env.get("COS_SECRET_ID", "bench"),
+        "COS_SECRET_KEY": env.get("COS_SECRET_KEY", "bench"),
+        "COS_REGION": env.get("COS_REGION", "ap-bench"),
+        "COS_BUCKET_NAME": env.get("COS_BUCKET_NAME", "bench-0000000000"),
+        "STORAGE_BACKEND": "local",
+        "LOCAL_STORAGE_ROOT": os.path.join(work_dir, "files"),
+        "LOCAL_STORAGE_PUBLIC_URL": "http://127.0.0.1:9/api/v1/files",
+        "TEMP_DIR": os.path.join(work_dir, "tmp"),
+        "SOURCE_CACHE_ENABLED": "false",
+        "RENDER_CACHE_ENABLED": "false",
+        "EXCEL_PARSE_CACHE_MB": "0",
+        "SGA_BENCH_ASSET_URL": asset_url,
+        "MPLBACKEND": "Agg",
+    })
+    return env
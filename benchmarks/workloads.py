@@ -0,0 +1,293 @@
+"""
+合成负载定义。
+
+每个负载的 prepare(scale) 在计时之外构造输入数据，返回一个无参可调用对象，
+该对象执行一次完整的服务调用（含上传到 local 存储后端）。
+scale=1.0 为标准规模；测试或快速冒烟时可用更小的 scale。
+"""
+
+import os
+import random
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class Workload:
+    """一个基准负载"""
+    name: str
+    description: str
+    prepare: Callable[[float], Callable[[], Any]]
+
+
+def _scaled(n: int, scale: float, minimum: int = 1) -> int:
+    return max(minimum, int(n * scale))
+
+
+def _asset_url(path: str) -> str:
+    return f"{os.environ['SGA_BENCH_ASSET_URL']}/{path}"
+
+
+def _rng() -> random.Random:
+    # 固定种子，保证每次生成的输入完全一致
+    return random.Random(20240601)
+
+
+# =====================================================
+#  EXC-01 / EXC-03
+# =====================================================
+
+def _prepare_excel_array(scale: float) -> Callable[[], Any]:
+    from app.services.cos_storage import get_cos_service
+    from app.services.excel_handler import create_excel_from_array
+
+    rng = _rng()
+    regions = ["华东", "华南", "华北", "西南", "西北", "东北"]
+    data: list[list[Any]] = [["序号", "日期", "区域", "产品", "数量", "单价", "金额", "备注"]]
+    for i in range(_scaled(100_000, scale)):
+        qty = rng.randint(1, 500)
+        price = round(rng.uniform(1, 999), 2)
+        data.append([
+            i + 1,
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            rng.choice(regions),
+            f"SKU-{rng.randint(1000, 9999)}",
+            qty,
+            price,
+            round(qty * price, 2),
+            "加急" if i % 17 == 0 else "",
+        ])
+    data.append(["合计", "", "", "", "", "", "", ""])
+
+    def run():
+        output = create_excel_from_array("年度销售明细", data, sheet_name="明细")
+        cos = get_cos_service()
+        return cos.upload_bytes(output, cos.generate_cos_key("bench", "excel_array", "xlsx"))
+
+    return run
+
+
+def _prepare_complex_excel(scale: float) -> Callable[[], Any]:
+    from app.services.cos_storage import get_cos_service
+    from app.services.excel_handler import generate_complex_excel
+
+    rng = _rng()
+    rows = _scaled(2_000, scale)
+    sheets_def = []
+    for s in range(20):
+        data: list[list[Any]] = []
+        for r in range(rows):
+            data.append([
+                f"部门{s:02d}-{r % 50:02d}",
+                rng.randint(0, 10_000),
+                rng.randint(0, 10_000),
+                rng.randint(0, 10_000),
+                f"=SUM(B{r + 2}:D{r + 2})",
+                rng.choice(["正常", "预警", "超支"]),
+            ])
+        data.append(["合计", f"=SUM(B2:B{rows + 1})", f"=SUM(C2:C{rows + 1})",
+                     f"=SUM(D2:D{rows + 1})", f"=SUM(E2:E{rows + 1})", ""])
+        sheet: dict[str, Any] = {
+            "sheet_name": f"分表{s + 1:02d}",
+            "headers": ["部门", "一季度", "二季度", "三季度", "合计", "状态"],
+            "data": data,
+            "merge_cells": [f"F{rows + 2}:F{rows + 2}"] if s % 2 else [],
+        }
+        if s % 4 == 0:
+            sheet["style"] = {"theme": "business_blue", "freeze_panes": "A2", "auto_filter": True}
+        sheets_def.append(sheet)
+
+    def run():
+        output = generate_complex_excel("多部门预算汇总", sheets_def, style={"alternating_rows": True})
+        cos = get_cos_service()
+        return cos.upload_bytes(output, cos.generate_cos_key("bench", "complex_excel", "xlsx"))
+
+    return run
+
+
+def _prepare_excel_extract(scale: float) -> Callable[[], Any]:
+    from io import BytesIO
+
+    import openpyxl
+
+    from app.services.cos_storage import get_cos_service
+    from app.services.excel_handler import extract_excel_range
+
+    rng = _rng()
+    wb = openpyxl.Workbook(write_only=True)
+    wb.create_sheet("封面").append(["年度经营数据"])
+    ws = wb.create_sheet("明细")
+    ws.append(["区域汇总"])
+    ws.append(["区域", "收入", "成本"])
+    for region in ["华东", "华南", "华北", "西南", "西北", "东北"]:
+        ws.append([region, rng.randint(1_000, 9_999), rng.randint(1_000, 9_999)])
+    ws.append([])
+    ws.append(["序号", "日期", "区域", "产品", "数量", "单价", "金额", "备注"])
+    for i in range(_scaled(100_000, scale)):
+        ws.append([
+            i + 1,
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            rng.choice(["华东", "华南", "华北"]),
+            f"SKU-{rng.randint(1000, 9999)}",
+            rng.randint(1, 500),
+            round(rng.uniform(1, 999), 2),
+            round(rng.uniform(1, 99_999), 2),
+            f"备注{i}",
+        ])
+    buf = BytesIO()
+    wb.save(buf)
+    cos = get_cos_service()
+    source_url = cos.upload_bytes(buf, cos.generate_cos_key("bench", "excel_extract_source", "xlsx"))
+
+    def run():
+        return [
+            extract_excel_range(source_url, sheet_name="明细", cell_range="A10:H60"),
+            extract_excel_range(source_url, sheet_name="明细", keyword="区域汇总"),
+        ]
+
+    return run
+
+
+def _prepare_excel_append(scale: float) -> Callable[[], Any]:
+    from io import BytesIO
+
+    import openpyxl
+
+    from app.services.cos_storage import get_cos_service
+    from app.services.excel_handler import append_rows_to_excel
+
+    rng = _rng()
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("流水")
+    ws.append(["序号", "日期", "摘要", "金额"])
+    for i in range(_scaled(100_000, scale)):
+        ws.append([i + 1, f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", f"交易{i}",
+                   round(rng.uniform(-9_999, 9_999), 2)])
+    buf = BytesIO()
+    wb.save(buf)
+    cos = get_cos_service()
+    source_url = cos.upload_bytes(buf, cos.generate_cos_key("bench", "excel_append_source", "xlsx"))
+    rows = [[f"新增{i}", "2025-01-01", "追加记录", round(rng.uniform(0, 999), 2)] for i in range(100)]
+
+    def run():
+        output = append_rows_to_excel(source_url, rows, sheet_name="流水")
+        return cos.upload_bytes(output, cos.generate_cos_key("bench", "excel_append", "xlsx"))
+
+    return run
+
+
+# =====================================================
+#  DOC-01
+# =====================================================
+
+def _prepare_markdown_docx(scale: float) -> Callable[[], Any]:
+    from app.services.cos_storage import get_cos_service
+    from app.services.doc_builder import render_markdown_to_docx
+
+    rng = _rng()
+    pages = _scaled(300, scale)
+    parts = [
+        "---\ntheme: business_blue\ncover:\n  title: 基准测试长文档\n  subtitle: 300 页表格与图片\n"
+        "toc: true\nheader: SGA-Office Benchmark\n---\n",
+    ]
+    for p in range(pages):
+        parts.append(f"## 第 {p + 1} 节 经营数据\n")
+        parts.append(
+            "本节汇总了**各区域**的季度经营情况，包含收入、成本与利润率，"
+            "并对异常波动给出说明。数据均为合成数据，仅用于性能测试。\n"
+        )
+        parts.append("| 区域 | 收入 | 成本 | 利润 | 利润率 |\n|---|---|---|---|---|")
+        for r in range(12):
+            income = rng.randint(1000, 9000)
+            cost = rng.randint(500, income)
+            parts.append(
+                f"| 区域{r + 1} | {income} | {cost} | {income - cost} | "
+                f"{(income - cost) / income:.1%} |"
+            )
+        parts.append("")
+        if p % 3 == 0:
+            parts.append(f"![第 {p + 1} 节示意图]({_asset_url(f'img/{p % 20}.png')})\n")
+        parts.append("> 注：利润率低于 10% 的区域需在下期重点跟进。\n")
+    markdown = "\n".join(parts)
+
+    def run():
+        output = render_markdown_to_docx(markdown)
+        cos = get_cos_service()
+        return cos.upload_bytes(output, cos.generate_cos_key("bench", "markdown_docx", "docx"))
+
+    return run
+
+
+# =====================================================
+#  PDF-03
+# =====================================================
+
+def _prepare_pdf_merge(scale: float) -> Callable[[], Any]:
+    from app.services.pdf_manipulator import merge_and_split_pdf
+
+    urls = [_asset_url(f"pdf/{i}.pdf") for i in range(_scaled(50, scale, minimum=2))]
+
+    def run():
+        return merge_and_split_pdf(urls, output_filename="bench_merged")
+
+    return run
+
+
+# =====================================================
+#  VIS-03 / VIS-04
+# =====================================================
+
+def _prepare_chart(scale: float) -> Callable[[], Any]:
+    from app.services.vis_renderer import render_chart_from_data
+
+    rng = _rng()
+    n = _scaled(24, scale, minimum=3)
+    categories = [f"{m + 1}月" for m in range(n)]
+    series = [
+        {"name": f"产品线{s + 1}", "values": [rng.randint(10, 200) for _ in range(n)]}
+        for s in range(4)
+    ]
+    chart_types = ["bar", "line", "pie", "scatter", "radar"]
+
+    def run():
+        return [
+            render_chart_from_data(chart_type, categories, series, title="月度销量")
+            for chart_type in chart_types
+        ]
+
+    return run
+
+
+def _prepare_wordcloud(scale: float) -> Callable[[], Any]:
+    from app.services.vis_renderer import generate_wordcloud
+
+    rng = _rng()
+    vocabulary = [
+        "数据", "智能", "文档", "表格", "报告", "分析", "增长", "效率", "客户", "市场",
+        "产品", "运营", "协作", "自动化", "Agent", "Office", "workflow", "pipeline",
+    ]
+    sentences = []
+    for _ in range(_scaled(5_000, scale)):
+        words = rng.choices(vocabulary, k=6)
+        sentences.append("我们的" + "与".join(words) + "持续提升。")
+    text = "".join(sentences)
+
+    def run():
+        return generate_wordcloud(text, width=800, height=600, max_words=200)
+
+    return run
+
+
+WORKLOADS: dict[str, Workload] = {
+    w.name: w
+    for w in [
+        Workload("excel_array", "EXC-01 create_excel_from_array，100k 行 × 8 列", _prepare_excel_array),
+        Workload("complex_excel", "EXC-03 generate_complex_excel，20 个 Sheet（含公式）", _prepare_complex_excel),
+        Workload("excel_append", "EXC-02 append_rows_to_excel，向 10 万行源表追加 100 行", _prepare_excel_append),
+        Workload("excel_extract", "EXC-04 extract_excel_range，10 万行源表的局部窗口与关键字区域", _prepare_excel_extract),
+        Workload("markdown_docx", "DOC-01 render_markdown_to_docx，300 节表格 + 图片", _prepare_markdown_docx),
+        Workload("pdf_merge", "PDF-03 merge_and_split_pdf，50 份源 PDF", _prepare_pdf_merge),
+        Workload("chart", "VIS-03a render_chart_from_data，5 种图表", _prepare_chart),
+        Workload("wordcloud", "VIS-04 generate_wordcloud，jieba 分词", _prepare_wordcloud),
+    ]
+}
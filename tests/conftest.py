@@ -17,6 +17,14 @@ os.environ.setdefault("COS_SECRET_ID", "fake_id_for_test")
 os.environ.setdefault("COS_SECRET_KEY", "fake_key_for_test")
 os.environ.setdefault("COS_REGION", "ap-test")
 os.environ.setdefault("COS_BUCKET_NAME", "test-bucket-123")
+# CPU 任务在线程池内执行，使 mock 对测试可见（进程池无法 pickle MagicMock）
+os.environ.setdefault("CPU_POOL_WORKERS", "0")
+# 渲染缓存跨测试持久化会让相同请求直接命中，默认关闭（缓存测试中单独构造）
+os.environ.setdefault("RENDER_CACHE_ENABLED", "false")
+# EXC-02 追加合并的链头跨测试持久化会改变后续追加的源文件，默认关闭（合并测试中单独构造）
+os.environ.setdefault("EXCEL_APPEND_COMBINE_ENABLED", "false")
+# EXC-04 解析结果缓存需要查询源文件版本（条件 GET / HEAD），默认关闭（缓存测试中单独构造）
+os.environ.setdefault("EXCEL_PARSE_CACHE_MB", "0")
 
 
 def _make_mock_cos():
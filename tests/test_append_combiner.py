@@ -0,0 +1,158 @@
+"""EXC-02 追加合并测试"""
+
+import asyncio
+
+
+class _FakeStore:
+    """记录每次读-改-写的源 URL 与追加内容，结果 URL 依次编号"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls: list[tuple[str, list]] = []
+        self.delay = delay
+
+    async def apply(self, source_url, appends):
+        self.calls.append((source_url, appends))
+        file_url = f"https://example.com/v{len(self.calls)}.xlsx"
+        await asyncio.sleep(self.delay)
+        if any(row == ["bad"] for _, rows in appends for row in rows):
+            raise ValueError("非法数据")
+        return file_url
+
+
+class TestAppendCombiner:
+
+    def test_concurrent_appends_share_one_cycle(self):
+        from app.services.append_combiner import AppendCombiner
+
+        async def scenario():
+            combiner, store = AppendCombiner(window_seconds=0.01), _FakeStore()
+            return store, await asyncio.gather(
+                combiner.submit("https://example.com/log.xlsx", "Sheet1", [["a"]], store.apply),
+                combiner.submit("https://example.com/log.xlsx", "Sheet1", [["b"]], store.apply),
+                combiner.submit("https://example.com/other.xlsx", "Sheet1", [["c"]], store.apply),
+            )
+
+        store, results = asyncio.run(scenario())
+        assert len(store.calls) == 2
+        assert store.calls[0] == ("https://example.com/log.xlsx", [("Sheet1", [["a"]]), ("Sheet1", [["b"]])])
+        assert results[0] == results[1] == {"file_url": "https://example.com/v1.xlsx", "batch_size": 2}
+        assert results[2]["batch_size"] == 1
+
+    def test_batches_are_serialized_and_chained(self):
+        from app.services.append_combiner import AppendCombiner
+
+        async def scenario():
+            combiner, store = AppendCombiner(window_seconds=0), _FakeStore(delay=0.02)
+            first = asyncio.ensure_future(combiner.submit("https://example.com/log.xlsx", "S", [[1]], store.apply))
+            await asyncio.sleep(0.005)  # 第一批执行中
+            queued = await asyncio.gather(
+                combiner.submit("https://example.com/log.xlsx", "S", [[2]], store.apply),
+                combiner.submit("https://example.com/log.xlsx", "S", [[3]], store.apply),
+            )
+            return store, queued
+
+        store, queued = asyncio.run(scenario())
+        assert [source for source, _ in store.calls] == [
+            "https://example.com/log.xlsx", "https://example.com/v1.xlsx",
+        ]
+        assert queued[0] == queued[1] == {"file_url": "https://example.com/v2.xlsx", "batch_size": 2}
+
+    def test_result_url_joins_live_chain_only(self):
+        from app.services.append_combiner import AppendCombiner
+
+        async def scenario():
+            combiner, store = AppendCombiner(window_seconds=0), _FakeStore(delay=0.02)
+            first = asyncio.ensure_future(combiner.submit("https://example.com/log.xlsx", "S", [[1]], store.apply))
+            await asyncio.sleep(0.005)  # 第一批执行中
+            second = asyncio.ensure_future(combiner.submit("https://example.com/log.xlsx", "S", [[2]], store.apply))
+            await asyncio.sleep(0.025)  # 第一批已完成，第二批执行中
+            # 链进行中：传入第一批的结果 URL 并入同一条链
+            joined = await combiner.submit((await first)["file_url"], "S", [[3]], store.apply)
+            await second
+            # 链已结束：按调用方传入的 URL 原样追加，不重定向到最新版本
+            later = await combiner.submit("https://example.com/log.xlsx", "S", [[4]], store.apply)
+            return store, joined, later
+
+        store, joined, later = asyncio.run(scenario())
+        assert [source for source, _ in store.calls] == [
+            "https://example.com/log.xlsx", "https://example.com/v1.xlsx",
+            "https://example.com/v2.xlsx", "https://example.com/log.xlsx",
+        ]
+        assert joined["file_url"] == "https://example.com/v3.xlsx"
+        assert later["file_url"] == "https://example.com/v4.xlsx"
+
+    def test_storage_backends_not_combined(self):
+        from app.core.request_context import storage_backend_var
+        from app.services.append_combiner import AppendCombiner
+
+        async def scenario():
+            combiner, store = AppendCombiner(window_seconds=0.01), _FakeStore()
+            backends = []
+
+            async def apply(source_url, appends):
+                backends.append(storage_backend_var.get())
+                return await store.apply(source_url, appends)
+
+            async def submit(backend, row):
+                storage_backend_var.set(backend)
+                return await combiner.submit("https://example.com/log.xlsx", "S", [[row]], apply)
+
+            results = await asyncio.gather(submit("local", 1), submit("cos", 2), submit("local", 3))
+            return backends, results
+
+        backends, results = asyncio.run(scenario())
+        assert sorted(backends) == ["cos", "local"]
+        assert results[0] == results[2] and results[0]["batch_size"] == 2
+        assert results[1]["batch_size"] == 1 and results[1]["file_url"] != results[0]["file_url"]
+
+    def test_failed_batch_retried_individually(self):
+        from app.services.append_combiner import AppendCombiner
+
+        async def scenario():
+            combiner, store = AppendCombiner(window_seconds=0.01), _FakeStore()
+            return store, await asyncio.gather(
+                combiner.submit("https://example.com/log.xlsx", "S", [["ok"]], store.apply),
+                combiner.submit("https://example.com/log.xlsx", "S", [["bad"]], store.apply),
+                return_exceptions=True,
+            )
+
+        store, (good, bad) = asyncio.run(scenario())
+        assert good == {"file_url": "https://example.com/v2.xlsx", "batch_size": 1}
+        assert isinstance(bad, ValueError)
+        assert len(store.calls) == 3
+
+    def test_disabled_calls_apply_directly(self):
+        from unittest.mock import patch
+        from app.core.config import get_settings
+        from app.services.append_combiner import combined_append
+
+        store = _FakeStore()
+        with patch.object(get_settings(), "excel_append_combine_enabled", False):
+            result = asyncio.run(combined_append("https://example.com/log.xlsx", "S", [[1]], store.apply))
+        assert result == {"file_url": "https://example.com/v1.xlsx", "batch_size": 1}
+
+
+class TestAppendRowsBatch:
+
+    def test_appends_merged_in_submission_order(self):
+        from io import BytesIO
+        from unittest.mock import patch
+        from openpyxl import Workbook, load_workbook
+        from app.services.excel_handler import append_rows_batch
+
+        wb = Workbook()
+        wb.active.title = "日志"
+        wb.active.append(["事件"])
+        wb.create_sheet("汇总").append(["合计"])
+        buf = BytesIO()
+        wb.save(buf)
+        raw = buf.getvalue()
+
+        with patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(raw)):
+            out = append_rows_batch("https://example.com/a.xlsx", [
+                ("日志", [["a"]]), ("汇总", [[1]]), ("日志", [["b"], ["c"]]),
+            ])
+        result = load_workbook(out)
+        assert [row[0] for row in result["日志"].iter_rows(values_only=True)] == ["事件", "a", "b", "c"]
+        assert [row[0] for row in result["汇总"].iter_rows(values_only=True)] == ["合计", 1]
+
@@ -0,0 +1,95 @@
+"""基准测试套件（benchmarks/）的比较逻辑与本地替身测试"""
+
+import json
+from unittest.mock import patch
+
+
+BASE = {"excel_array": {"wall_seconds": 2.0, "peak_rss_mb": 200.0, "peak_alloc_mb": 50.0}}
+
+
+class TestCompare:
+
+    def test_within_threshold_passes(self):
+        from benchmarks.run import compare
+        current = {"excel_array": {"wall_seconds": 2.3, "peak_rss_mb": 210.0, "peak_alloc_mb": 55.0}}
+        assert compare(BASE, current, threshold=0.2) == []
+
+    def test_regression_reported(self):
+        from benchmarks.run import compare
+        current = {"excel_array": {"wall_seconds": 3.0, "peak_rss_mb": 200.0, "peak_alloc_mb": 50.0}}
+        regressions = compare(BASE, current, threshold=0.2)
+        assert len(regressions) == 1
+        assert regressions[0]["metric"] == "wall_seconds"
+        assert regressions[0]["ratio"] == 1.5
+
+    def test_noise_floor_ignores_tiny_absolute_changes(self):
+        from benchmarks.run import compare
+        baseline = {"chart": {"wall_seconds": 0.01, "peak_rss_mb": 1.0, "peak_alloc_mb": 0.5}}
+        current = {"chart": {"wall_seconds": 0.03, "peak_rss_mb": 3.0, "peak_alloc_mb": 1.5}}
+        assert compare(baseline, current, threshold=0.2) == []
+
+    def test_unknown_workload_skipped(self):
+        from benchmarks.run import compare
+        current = {"new_workload": {"wall_seconds": 100.0, "peak_rss_mb": 1.0, "peak_alloc_mb": 1.0}}
+        assert compare(BASE, current, threshold=0.2) == []
+
+
+class TestMain:
+
+    def _write_baseline(self, tmp_path, scale=1.0):
+        path = tmp_path / "baseline.json"
+        path.write_text(json.dumps({"version": 1, "scale": scale, "results": BASE}))
+        return str(path)
+
+    def test_regression_exits_nonzero(self, tmp_path):
+        from benchmarks.run import main
+        slow = {"excel_array": {"wall_seconds": 5.0, "peak_rss_mb": 200.0, "peak_alloc_mb": 50.0}}
+        with patch("benchmarks.run.run_workloads", return_value=slow):
+            assert main(["--baseline", self._write_baseline(tmp_path), "--only", "excel_array"]) == 1
+
+    def test_no_regression_exits_zero(self, tmp_path):
+        from benchmarks.run import main
+        with patch("benchmarks.run.run_workloads", return_value=BASE):
+            assert main(["--baseline", self._write_baseline(tmp_path), "--only", "excel_array"]) == 0
+
+    def test_scale_mismatch_refused(self, tmp_path):
+        from benchmarks.run import main
+        with patch("benchmarks.run.run_workloads") as run:
+            assert main(["--baseline", self._write_baseline(tmp_path), "--scale", "0.1"]) == 2
+        run.assert_not_called()
+
+    def test_update_baseline_merges_partial_run(self, tmp_path):
+        from benchmarks.run import main
+        path = self._write_baseline(tmp_path)
+        chart = {"chart": {"wall_seconds": 1.0, "peak_rss_mb": 100.0, "peak_alloc_mb": 3.0}}
+        with patch("benchmarks.run.run_workloads", return_value=chart):
+            assert main(["--baseline", path, "--only", "chart", "--update-baseline"]) == 0
+        saved = json.loads(open(path, encoding="utf-8").read())
+        assert set(saved["results"]) == {"excel_array", "chart"}
+        assert "python" in saved["machine"]
+
+
+class TestAssetServer:
+
+    def test_serves_generated_assets(self):
+        import requests
+        from benchmarks.standins import AssetServer
+
+        with AssetServer() as server:
+            png = requests.get(f"{server.base_url}/img/1.png", timeout=10)
+            assert png.status_code == 200
+            assert png.content.startswith(b"\x89PNG")
+            etag = png.headers["ETag"]
+            again = requests.get(f"{server.base_url}/img/1.png", headers={"If-None-Match": etag}, timeout=10)
+            assert again.status_code == 304
+
+            pdf = requests.get(f"{server.base_url}/pdf/0.pdf", timeout=10)
+            assert pdf.content.startswith(b"%PDF")
+            assert requests.get(f"{server.base_url}/other/1.bin", timeout=10).status_code == 404
+
+    def test_standin_env_uses_local_backend(self, tmp_path):
+        from benchmarks.standins import standin_env
+        env = standin_env(str(tmp_path), "http://127.0.0.1:1234")
+        assert env["STORAGE_BACKEND"] == "local"
+        assert env["LOCAL_STORAGE_ROOT"].startswith(str(tmp_path))
+        assert env["SGA_BENCH_ASSET_URL"] == "http://127.0.0.1:1234"
@@ -0,0 +1,92 @@
+"""COS 上传路径测试（分片上传、零拷贝输入）"""
+
+from io import BytesIO
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def service():
+    from app.services.cos_storage import CosStorageService
+    svc = CosStorageService.__new__(CosStorageService)
+    svc._client = MagicMock()
+    svc._client.create_multipart_upload.return_value = {"UploadId": "up-1"}
+    svc._client.upload_part.side_effect = lambda **kw: {"ETag": f'"etag-{kw["PartNumber"]}"'}
+    svc._bucket = "test-bucket-123"
+    svc._region = "ap-test"
+    return svc
+
+
+@pytest.fixture
+def small_parts():
+    """阈值 1 MB、分片 1 MB，便于用小数据触发分片上传"""
+    from app.core.config import get_settings
+    settings = get_settings()
+    with patch.object(settings, "upload_multipart_threshold_mb", 1), \
+         patch.object(settings, "upload_part_size_mb", 1), \
+         patch.object(settings, "upload_part_retries", 2):
+        yield
+
+
+MB = 1024 * 1024
+
+
+class TestSmallUpload:
+
+    def test_bytesio_passed_as_stream(self, service):
+        buf = BytesIO(b"docx bytes")
+        buf.seek(5)
+        url = service.upload_bytes(buf, "documents/a.docx")
+        body = service._client.put_object.call_args.kwargs["Body"]
+        assert body is buf and buf.tell() == 0
+        assert url.endswith("/documents/a.docx")
+        assert service._client.put_object.call_args.kwargs["ContentType"] == (
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        )
+        service._client.create_multipart_upload.assert_not_called()
+
+
+class TestMultipartUpload:
+
+    def test_parts_cover_payload_in_order(self, service, small_parts):
+        data = bytes(range(256)) * (10 * 1024) + b"tail"   # 2.5 MB + 4
+        service.upload_bytes(BytesIO(data), "pdf_documents/merged.pdf")
+
+        calls = service._client.upload_part.call_args_list
+        bodies = {c.kwargs["PartNumber"]: c.kwargs["Body"] for c in calls}
+        assert b"".join(bodies[n] for n in sorted(bodies)) == data
+        parts = service._client.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Part"]
+        assert [p["PartNumber"] for p in parts] == [1, 2, 3]
+        assert parts[0]["ETag"] == '"etag-1"'
+        assert service._client.create_multipart_upload.call_args.kwargs["ContentType"] == "application/pdf"
+
+    def test_memoryview_accepted(self, service, small_parts):
+        data = bytearray(b"x" * (2 * MB))
+        service.upload_bytes(memoryview(data), "excel/big.xlsx")
+        assert service._client.upload_part.call_count == 2
+
+    def test_failed_part_retried(self, service, small_parts):
+        attempts = {"n": 0}
+
+        def flaky(**kw):
+            if kw["PartNumber"] == 2 and attempts["n"] == 0:
+                attempts["n"] += 1
+                raise ConnectionError("reset")
+            return {"ETag": "e"}
+
+        service._client.upload_part.side_effect = flaky
+        with patch("app.services.cos_storage.time.sleep"):
+            service.upload_bytes(b"y" * (2 * MB), "excel/big.xlsx")
+        assert service._client.upload_part.call_count == 3
+        service._client.complete_multipart_upload.assert_called_once()
+
+    def test_exhausted_retries_abort(self, service, small_parts):
+        service._client.upload_part.side_effect = ConnectionError("down")
+        with patch("app.services.cos_storage.time.sleep"):
+            with pytest.raises(ConnectionError):
+                service.upload_bytes(b"z" * (2 * MB), "excel/big.xlsx")
+        service._client.abort_multipart_upload.assert_called_once_with(
+            Bucket="test-bucket-123", Key="excel/big.xlsx", UploadId="up-1"
+        )
+        service._client.complete_multipart_upload.assert_not_called()
@@ -0,0 +1,86 @@
+"""EXC-02 zip 级增量追加测试"""
+
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+
+def _workbook_bytes(build) -> bytes:
+    wb = Workbook()
+    build(wb)
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _append(raw: bytes, rows, sheet_name="Sheet"):
+    from app.services.excel_handler import append_rows_to_excel
+    with patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(raw)):
+        return append_rows_to_excel("https://example.com/a.xlsx", rows, sheet_name)
+
+
+class TestZipAppend:
+
+    def test_rows_appended_after_last_row(self):
+        def build(wb):
+            wb.active.append(["名称", "数量"])
+            wb.active.append(["a", 1])
+        out = _append(_workbook_bytes(build), [["b", 2.5], [None, True], ["<&> ", "=B2*2"]])
+        ws = load_workbook(out).active
+        assert [[c.value for c in row] for row in ws.iter_rows()] == [
+            ["名称", "数量"], ["a", 1], ["b", 2.5], [None, True], ["<&> ", "=B2*2"],
+        ]
+        assert ws.dimensions == "A1:B5"
+        assert ws["A3"].style == "SGA Body"
+        assert ws["A3"].border.left.style == "thin"
+
+    def test_untouched_members_copied_verbatim(self):
+        def build(wb):
+            wb.active.append(["x"])
+            wb.create_sheet("Other").append(["y"])
+        raw = _workbook_bytes(build)
+        out = _append(raw, [["z"]])
+        src, dst = zipfile.ZipFile(BytesIO(raw)), zipfile.ZipFile(out)
+        assert dst.testzip() is None
+        assert dst.namelist() == src.namelist()
+        for name in src.namelist():
+            if name in ("xl/worksheets/sheet1.xml", "xl/styles.xml"):
+                continue
+            assert dst.getinfo(name).compress_size == src.getinfo(name).compress_size
+            assert dst.read(name) == src.read(name)
+
+    def test_existing_named_style_reused(self):
+        from app.services.excel_handler import create_excel_from_array
+        raw = create_excel_from_array("t", [["a"], [1]]).getvalue()
+        out = _append(raw, [[2]], sheet_name="Sheet1")
+        assert zipfile.ZipFile(out).read("xl/styles.xml") == zipfile.ZipFile(BytesIO(raw)).read("xl/styles.xml")
+        ws = load_workbook(out).active
+        assert ws["A4"].value == 2 and ws["A4"].style == "SGA Body"
+
+    def test_merged_cells_count_as_occupied(self):
+        def build(wb):
+            wb.active.append(["a"])
+            wb.active.merge_cells("A1:A3")
+        ws = load_workbook(_append(_workbook_bytes(build), [["b"]])).active
+        assert ws["A4"].value == "b"
+
+    def test_formula_sets_full_calc_on_load(self):
+        from app.services.excel_append import _ensure_full_calc
+        assert b'fullCalcOnLoad="1"' in _ensure_full_calc(b'<workbook><sheets/><calcPr calcId="1"/></workbook>')
+        added = _ensure_full_calc(b"<workbook><sheets/><extLst/></workbook>")
+        assert added == b'<workbook><sheets/><calcPr fullCalcOnLoad="1"/><extLst/></workbook>'
+
+    def test_illegal_characters_rejected(self):
+        raw = _workbook_bytes(lambda wb: wb.active.append(["a"]))
+        with pytest.raises(ValueError):
+            _append(raw, [["bad\x01value"]])
+
+    def test_unsupported_source_falls_back(self):
+        from app.services.excel_append import ZipAppendUnsupported
+        raw = _workbook_bytes(lambda wb: wb.active.append(["a"]))
+        with patch("app.services.excel_handler.append_rows_zip", side_effect=ZipAppendUnsupported("test")):
+            ws = load_workbook(_append(raw, [["b"]])).active
+        assert ws["A2"].value == "b"
@@ -0,0 +1,140 @@
+"""EXC-04 解析结果缓存测试"""
+
+from datetime import datetime, time
+from io import BytesIO
+from unittest.mock import patch
+
+ROWS = [
+    ("名称", "数量", None, "备注"),
+    (),
+    ("a", 1, 2.5, True, datetime(2024, 1, 2)),
+    (None, 2 ** 60, False),
+    ("a", -3, None, time(8, 30)),
+]
+
+
+def _workbook_bytes(rows, title="明细") -> bytes:
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
+    for row in rows:
+        ws.append(list(row))
+    wb.create_sheet("其他").append(["x"])
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+class TestColumnarSheet:
+
+    def test_rows_round_trip(self):
+        from app.services.excel_cache import ColumnarSheet
+        sheet = ColumnarSheet.from_rows("S", 4, iter(ROWS))
+        assert list(sheet.iter_rows()) == ROWS
+        assert [type(v) for v in list(sheet.iter_rows(min_row=3, max_row=3))[0]] == [str, int, float, bool, datetime]
+        assert sheet.strings == ["名称", "数量", "备注", "a"]
+
+    def test_window_is_padded_and_bounded(self):
+        from app.services.excel_cache import ColumnarSheet
+        sheet = ColumnarSheet.from_rows("S", 4, iter(ROWS))
+        window = list(sheet.iter_rows(min_row=2, max_row=9, min_col=2, max_col=6))
+        assert window == [
+            (None,) * 5,
+            (1, 2.5, True, datetime(2024, 1, 2), None),
+            (2 ** 60, False, None, None, None),
+            (-3, None, time(8, 30), None, None),
+        ]
+
+
+class TestExcelParseCache:
+
+    def _extract(self, cache, raw, version=None, opened=None, **kwargs):
+        from app.services.excel_handler import extract_excel_range
+
+        def fake_open(url):
+            if opened is not None:
+                opened.append(url)
+            return BytesIO(raw)
+
+        with patch("app.services.excel_handler.get_excel_parse_cache", return_value=cache), \
+                patch("app.services.excel_handler.source_version", return_value=version), \
+                patch("app.services.excel_handler.open_source", side_effect=fake_open):
+            return extract_excel_range("https://example.com/a.xlsx", **kwargs)
+
+    def test_second_access_builds_then_hits(self):
+        from app.services.excel_cache import ExcelParseCache
+        cache = ExcelParseCache()
+        raw = _workbook_bytes(ROWS)
+        results = [
+            self._extract(cache, raw, sheet_name="明细", cell_range="A1:D3"),
+            self._extract(cache, raw, sheet_name="明细", keyword="名称"),
+            self._extract(cache, raw, sheet_name="不存在", cell_range="A1:D3"),
+        ]
+        stats = cache.stats()
+        assert (stats["misses"], stats["builds"], stats["hits"]) == (2, 1, 1)
+        assert results[0]["data"] == results[2]["data"] == [[None] * 4, ["a", 1, 2.5, True]]
+        assert results[2]["sheet_name"] == "明细"
+        assert results[1]["data"] == []  # 表头下一行为空行，区域到此结束
+
+    def test_validator_hit_does_not_open_source(self):
+        from app.services.excel_cache import ExcelParseCache
+        cache = ExcelParseCache()
+        raw = _workbook_bytes(ROWS)
+        opened = []
+        for _ in range(3):
+            result = self._extract(cache, raw, version='etag:"v1"', opened=opened, sheet_name="明细")
+        assert len(opened) == 2 and cache.stats()["hits"] == 1
+        assert result["data"][1] == ["a", 1, 2.5, True, datetime(2024, 1, 2)]
+        # ETag 变化即视为新版本，不命中旧条目
+        self._extract(cache, raw, version='etag:"v2"', opened=opened, sheet_name="明细")
+        assert len(opened) == 3 and cache.stats()["hits"] == 1
+
+    def test_changed_source_is_not_served_from_cache(self):
+        from app.services.excel_cache import ExcelParseCache
+        cache = ExcelParseCache()
+        for _ in range(2):
+            self._extract(cache, _workbook_bytes(ROWS), sheet_name="明细")
+        changed = self._extract(cache, _workbook_bytes([("名称",), ("b",)]), sheet_name="明细")
+        assert changed["data"] == [["b"]]
+        assert cache.stats()["hits"] == 0
+
+    def test_memory_budget_evicts_least_recent(self):
+        from app.services.excel_cache import ColumnarSheet, ExcelParseCache
+        sheet = ColumnarSheet.from_rows("S", 1, ((f"row{i}",) for i in range(100)))
+        cache = ExcelParseCache(max_bytes=sheet.nbytes * 2)
+        for url in ("u1", "u2"):
+            cache.put(url, "d", ["S"], "S", sheet)
+        cache.get("u1", "d", "S")
+        cache.put("u3", "d", ["S"], "S", sheet)
+        assert cache.get("u2", "d", "S") is None
+        assert cache.get("u1", "d", "S") is sheet and cache.get("u3", "d", "S") is sheet
+        assert cache.stats()["evictions"] == 1
+
+
+class TestCachedExcelRead:
+
+    def test_hits_served_without_cpu_pool(self):
+        import asyncio
+        from app.services import excel_cache
+        from app.services.excel_cache import ExcelParseCache, cached_excel_read
+        from app.services.excel_handler import extract_excel_range
+        cache = ExcelParseCache()
+        raw = _workbook_bytes(ROWS)
+        kwargs = dict(source_excel_url="https://example.com/a.xlsx", sheet_name="明细", cell_range="A1:D3")
+        with patch("app.services.excel_cache.get_excel_parse_cache", return_value=cache), \
+                patch("app.services.excel_handler.get_excel_parse_cache", return_value=cache), \
+                patch("app.services.excel_handler.source_version", return_value='etag:"v1"'), \
+                patch("app.services.excel_handler.source_digest") as digest, \
+                patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(raw)) as opened, \
+                patch("app.services.excel_cache.run_cpu_bound", wraps=excel_cache.run_cpu_bound) as cpu:
+            results = [asyncio.run(cached_excel_read(extract_excel_range, **kwargs)) for _ in range(3)]
+        # 第一次只解析窗口，第二次在"进程池"中整表解析并交回本进程入缓存，第三次直接命中
+        assert cpu.call_count == 2
+        assert [call.args[1:3] for call in cpu.call_args_list] == [(False, 'etag:"v1"'), (True, 'etag:"v1"')]
+        # 每次未命中只在子进程中打开一次源文件；有校验器时不计算内容摘要
+        assert opened.call_count == 2
+        digest.assert_not_called()
+        assert results[0] == results[1] == results[2]
+        stats = cache.stats()
+        assert (stats["misses"], stats["builds"], stats["hits"]) == (2, 1, 1)
@@ -0,0 +1,116 @@
+"""EXC-04 查询下推引擎测试"""
+
+from datetime import datetime
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+HEADERS = ["日期", "区域", "产品", "数量", "金额"]
+ROWS = [
+    (datetime(2024, 1, 5), "华东", "A", 3, 300.0),
+    (datetime(2024, 2, 1), "华南", "B", 1, 120.5),
+    (datetime(2024, 2, 9), "华东", "B", "2", 200.0),   # 以文本存储的数字
+    (datetime(2024, 3, 3), "华北", "A", 5, None),
+    (datetime(2024, 3, 20), "华东", "C", 4, 410.0),
+]
+
+
+class TestExcelQuery:
+
+    def _run(self, rows=ROWS, **kwargs):
+        from app.services.excel_query import ExcelQuery
+        return ExcelQuery(HEADERS, **kwargs).run(iter(rows))
+
+    def test_projection_and_filter(self):
+        result = self._run(
+            select=["产品", "金额"],
+            where=[{"column": "区域", "op": "eq", "value": "华东"}, {"column": "金额", "op": "gt", "value": 250}],
+        )
+        assert result["columns"] == ["产品", "金额"]
+        assert result["rows"] == [["A", 300.0], ["C", 410.0]]
+        assert result["column_types"] == ["string", "number"]
+
+    def test_typed_comparisons(self):
+        by_date = self._run(select=["产品"], where=[{"column": "日期", "op": "gte", "value": "2024-02-09"}])
+        assert by_date["rows"] == [["B"], ["A"], ["C"]]
+        numeric_text = self._run(select=["产品"], where=[{"column": "数量", "op": "eq", "value": 2}])
+        assert numeric_text["rows"] == [["B"]]
+        nulls = self._run(select=["产品"], where=[{"column": "E", "op": "is_null"}])
+        assert nulls["rows"] == [["A"]]
+
+    def test_timezone_aware_value_against_naive_cell(self):
+        offset = self._run(select=["产品"], where=[{"column": "日期", "op": "gt", "value": "2024-03-03T00:00:00+08:00"}])
+        assert offset["rows"] == [["C"]]
+        utc = self._run(select=["产品"], where=[{"column": "日期", "op": "lte", "value": "2024-01-05T00:00:00Z"}])
+        assert utc["rows"] == [["A"]]
+
+    def test_group_by_aggregates(self):
+        result = self._run(
+            group_by=["区域"],
+            aggregates=[
+                {"func": "sum", "column": "数量", "alias": "总数量"},
+                {"func": "count"},
+                {"func": "avg", "column": "金额"},
+                {"func": "max", "column": "日期"},
+            ],
+        )
+        assert result["columns"] == ["区域", "总数量", "count(*)", "avg(金额)", "max(日期)"]
+        assert result["rows"][0] == ["华东", 9, 3, 910.0 / 3, datetime(2024, 3, 20)]
+        assert result["rows"][2] == ["华北", 5, 1, None, datetime(2024, 3, 3)]
+        assert result["column_types"][4] == "datetime"
+
+    def test_global_aggregate_without_matches(self):
+        result = self._run(
+            where=[{"column": "区域", "op": "eq", "value": "西北"}],
+            aggregates=[{"func": "count"}, {"func": "sum", "column": "金额"}],
+        )
+        assert result["rows"] == [[0, 0]]
+
+    def test_limit_stops_reading(self):
+        consumed = []
+
+        def rows():
+            for row in ROWS:
+                consumed.append(row)
+                yield row
+
+        result = self._run(rows=rows(), limit=2)
+        assert result["total_rows"] == 2 and result["truncated"]
+        assert len(consumed) == 3
+
+    def test_invalid_query_rejected(self):
+        from app.services.excel_query import ExcelQuery
+        with pytest.raises(ValueError, match="不存在"):
+            ExcelQuery(HEADERS, select=["客户"])
+        with pytest.raises(ValueError):
+            ExcelQuery(HEADERS, aggregates=[{"func": "median", "column": "金额"}])
+        with pytest.raises(ValueError):
+            ExcelQuery(HEADERS, select=["区域"], aggregates=[{"func": "count"}])
+        with pytest.raises(ValueError, match="缺少 value"):
+            ExcelQuery(["name"], where=[{"column": "name"}])
+        with pytest.raises(ValueError, match="缺少 value"):
+            ExcelQuery(HEADERS, where=[{"column": "金额", "op": "gt", "value": None}])
+
+
+class TestQueryExcelRange:
+
+    def test_keyword_region_query(self):
+        from openpyxl import Workbook
+        from app.services.excel_handler import query_excel_range
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Data"
+        for row in [["月度明细"], [], ["区域", "金额"], ["华东", 10], ["华南", 5], ["华东", 7], [], ["备注"]]:
+            ws.append(row)
+        buf = BytesIO()
+        wb.save(buf)
+
+        with patch("app.services.excel_handler.open_source", return_value=BytesIO(buf.getvalue())):
+            result = query_excel_range(
+                "https://example.com/a.xlsx", sheet_name="Data", keyword="区域",
+                group_by=["区域"], aggregates=[{"func": "sum", "column": "金额"}],
+            )
+        assert result["rows"] == [["华东", 17], ["华南", 5]]
+        assert result["scanned_rows"] == 3
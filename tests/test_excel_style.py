@@ -1,6 +1,7 @@
 """Excel 样式引擎测试"""
 
 import pytest
+from unittest.mock import patch
 from io import BytesIO
 from openpyxl import load_workbook
 
@@ -157,3 +158,188 @@ class TestGanttRendering:
         wb = load_workbook(result)
         ws = wb.active
         assert ws.max_column == 2
+
+
+def _snapshot(output: BytesIO) -> list:
+    """工作簿中与样式相关的可见效果，用于比较普通模式与流式模式的输出"""
+    wb = load_workbook(output)
+    sheets = []
+    for ws in wb.worksheets:
+        cells = {}
+        for row in ws.iter_rows():
+            for c in row:
+                if c.value is None and not c.has_style:
+                    continue
+                cells[c.coordinate] = (
+                    c.value,
+                    c.font.b,
+                    c.font.color.rgb if c.font.color else None,
+                    c.fill.fgColor.rgb if c.fill.fill_type else None,
+                    c.border.left.style,
+                    c.alignment.horizontal,
+                )
+        sheets.append((
+            ws.title,
+            sorted(str(r) for r in ws.merged_cells.ranges),
+            ws.freeze_panes,
+            ws.auto_filter.ref,
+            {k: v.width for k, v in ws.column_dimensions.items() if v.width},
+            ws.row_dimensions[1].height,
+            cells,
+        ))
+    return sheets
+
+
+def _normal_and_streaming(func, *args, **kwargs):
+    from app.core.config import get_settings
+    settings = get_settings()
+    with patch.object(settings, "excel_streaming_row_threshold", 10 ** 9):
+        normal = _snapshot(func(*args, **kwargs))
+    with patch.object(settings, "excel_streaming_row_threshold", 0):
+        streaming = _snapshot(func(*args, **kwargs))
+    return normal, streaming
+
+
+class TestStreamingWrite:
+    """超过行数阈值时的 write-only 流式写入"""
+
+    GANTT_STYLE = {
+        "theme": "business_blue",
+        "freeze_panes": "A3",
+        "auto_filter": True,
+        "row_groups": {"group_column": "B"},
+        "gantt": {
+            "date_columns": ["C", "D"],
+            "timeline_start": "2026-03-01",
+            "timeline_end": "2026-04-30",
+            "granularity": "week",
+            "bar_color_column": "B",
+        },
+    }
+
+    def test_threshold_selects_write_only(self):
+        from app.core.config import get_settings
+        from app.services.excel_handler import _use_streaming
+        settings = get_settings()
+        with patch.object(settings, "excel_streaming_row_threshold", 100):
+            assert not _use_streaming(100)
+            assert _use_streaming(101)
+
+    def test_exc01_matches_normal_mode(self):
+        from app.services.excel_handler import create_excel_from_array
+        data = [
+            ["任务", "组", "开始", "结束"],
+            ["需求评审", "产品", "2026-03-02", "2026-03-20"],
+            ["接口开发", "研发", "2026-03-10", "2026-04-10"],
+            ["短行"],
+            ["合计", "", "", ""],
+        ]
+        normal, streaming = _normal_and_streaming(
+            create_excel_from_array, "项目排期", data, style=self.GANTT_STYLE,
+        )
+        assert streaming == normal
+        assert streaming[0][1] == ["A1:D1"]
+
+    def test_exc01_alternating_rows_and_width_override(self):
+        from app.services.excel_handler import create_excel_from_array
+        data = [["A", "B"]] + [[i, f"值{i}"] for i in range(6)]
+        style = {"theme": "tech_dark", "header_style": "minimal", "column_widths": {"A": 30}}
+        normal, streaming = _normal_and_streaming(create_excel_from_array, "t", data, style=style)
+        assert streaming == normal
+
+    def test_exc03_merges_formulas_and_sheet_styles(self):
+        from app.services.excel_handler import generate_complex_excel
+        sheets = [
+            {
+                "sheet_name": "汇总",
+                "headers": ["部门", "金额"],
+                "data": [["A", 1], ["A", 2], ["总计", "=SUM(B2:B3)"]],
+                "merge_cells": ["A2:A3", "not-a-range"],
+            },
+            {
+                "sheet_name": "明细",
+                "headers": ["x", "y", "z"],
+                "data": [[1, 2, 3]],
+                "style": {"theme": "government_red"},
+            },
+        ]
+        normal, streaming = _normal_and_streaming(
+            generate_complex_excel, "报表", sheets, style={"theme": "minimal", "auto_filter": True},
+        )
+        assert streaming == normal
+        cells = streaming[0][6]
+        assert cells["A3"][0] is None  # 被合并覆盖的单元格值被清空
+        assert cells["B4"][0] == "=SUM(B2:B3)"
+
+
+class TestStyleRegistry:
+    """工作簿级命名样式注册表"""
+
+    def test_each_style_registered_once(self):
+        from app.services.excel_handler import create_excel_from_array
+        data = [["组", "值"]] + [[g, i] for i in range(200) for g in ("甲", "乙")] + [["合计", 0]]
+        result = create_excel_from_array(
+            "t", data, style={"theme": "business_blue", "row_groups": {"group_column": "A"}},
+        )
+        wb = load_workbook(result)
+        sga = [name for name in wb.named_styles if name.startswith("SGA ")]
+        assert len(sga) == len(set(sga))
+        # 标题 + 表头 + 两个分组色的正文/补齐 + 合计行，与数据行数无关
+        assert len(sga) <= 8
+        ws = wb.active
+        assert ws["A2"].style == "SGA Header business_blue"
+        assert ws["A3"].style.startswith("SGA Body ")
+        assert ws.cell(row=ws.max_row, column=1).style.startswith("SGA Summary ")
+
+    def test_registry_reuses_existing_names(self):
+        import openpyxl
+        from app.services.excel_styles import ExcelStyleRegistry
+        wb = openpyxl.Workbook()
+        first = ExcelStyleRegistry(wb).body()
+        second = ExcelStyleRegistry(wb).body()  # 例如 EXC-02 重新打开已生成的工作簿
+        assert first == second
+        assert wb.named_styles.count(first) == 1
+
+    def test_default_font_kept_for_body_cells(self):
+        from app.services.excel_handler import create_excel_from_array
+        wb = load_workbook(create_excel_from_array("t", [["A"], [1]]))
+        font = wb.active["A3"].font
+        assert font.name == "Calibri" and font.sz == 11 and not font.b
+
+
+class TestColumnWidthEstimate:
+
+    def test_display_width_east_asian(self):
+        from app.services.excel_handler import _display_width
+        assert _display_width("abc") == 3
+        assert _display_width("中文") == 4
+        assert _display_width("ｆｕｌｌ") == 8   # 全角字母
+        assert _display_width("café") == 4     # 带重音的拉丁字母按窄字符计
+
+    def test_min_and_max_width(self):
+        from app.services.excel_handler import _estimate_column_widths
+        widths = _estimate_column_widths([["a", "x" * 200, None]])
+        assert widths == {1: 8, 2: 60, 3: 8}
+
+    def test_title_counts_toward_first_column(self):
+        from app.services.excel_handler import _estimate_column_widths
+        assert _estimate_column_widths([["a"]], title="季度销售报表")[1] == 15
+
+    def test_override_columns_not_measured(self):
+        from app.services.excel_handler import _estimate_column_widths
+        widths = _estimate_column_widths([["a", "很长很长的内容"]], skip_columns=frozenset({2}))
+        assert 2 not in widths
+
+    def test_non_string_values_sampled(self):
+        from app.services.excel_handler import _estimate_column_widths
+        rows = [[1]] * 1001 + [[10 ** 20]]  # 第 1002 行不在抽样范围内
+        assert _estimate_column_widths(rows) == {1: 8}
+        rows = [[1]] * 1000 + [[10 ** 20]]  # 第 1001 行按步长抽样
+        assert _estimate_column_widths(rows) == {1: 24}
+
+    def test_manual_widths_applied_to_workbook(self):
+        from app.services.excel_handler import create_excel_from_array
+        data = [["名称", "说明"], ["甲", "一段很长很长很长很长的说明文字"]]
+        ws = load_workbook(create_excel_from_array("t", data, style={"column_widths": {"B": 12}})).active
+        assert ws.column_dimensions["B"].width == 12
+        assert ws.column_dimensions["A"].width == 8
@@ -0,0 +1,44 @@
+"""阻塞任务调度层测试"""
+
+import asyncio
+import math
+import threading
+import time
+from unittest.mock import patch
+
+from app.core import executor
+from app.core.config import Settings
+
+
+class TestExecutor:
+
+    def test_io_bound_runs_in_worker_thread(self):
+        result = asyncio.run(executor.run_io_bound(lambda: threading.current_thread().name))
+        assert result.startswith("sga-io")
+
+    def test_cpu_bound_falls_back_to_threads_when_disabled(self):
+        # conftest 中 CPU_POOL_WORKERS=0
+        result = asyncio.run(executor.run_cpu_bound(lambda x, y=1: x + y, 2, y=3))
+        assert result == 5
+
+    def test_event_loop_not_blocked(self):
+        """慢调用在池中执行时，其他协程应能立即完成"""
+        async def scenario():
+            slow = asyncio.ensure_future(executor.run_io_bound(time.sleep, 0.3))
+            started = time.monotonic()
+            await asyncio.sleep(0.01)
+            elapsed = time.monotonic() - started
+            await slow
+            return elapsed
+
+        assert asyncio.run(scenario()) < 0.2
+
+    def test_process_pool_dispatch(self):
+        settings = Settings(cpu_pool_workers=1)
+        with patch("app.core.executor.get_settings", return_value=settings):
+            try:
+                result = asyncio.run(executor.run_cpu_bound(math.factorial, 10))
+                assert result == 3628800
+                assert isinstance(executor._cpu_executor, executor.ProcessPoolExecutor)
+            finally:
+                executor.shutdown_executors()
@@ -0,0 +1,123 @@
+"""共享出站 HTTP 客户端测试"""
+
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    from app.core.http_client import close_http_session
+    close_http_session()
+    yield
+    close_http_session()
+
+
+class TestSharedSession:
+
+    def test_session_is_singleton(self):
+        from app.core.http_client import get_http_session
+        assert get_http_session() is get_http_session()
+
+    def test_adapter_pool_configured(self):
+        from app.core.config import get_settings
+        from app.core.http_client import get_http_session
+        adapter = get_http_session().get_adapter("https://example.com/a.png")
+        assert adapter._pool_maxsize == get_settings().http_pool_maxsize
+        assert adapter._pool_block is True
+        assert adapter.max_retries.total == get_settings().http_max_retries
+
+    def test_default_user_agent(self):
+        from app.core.http_client import get_http_session
+        assert get_http_session().headers["User-Agent"].startswith("SGA-Office/1.0")
+
+
+class TestHttpGet:
+
+    def test_scalar_timeout_expanded(self):
+        from app.core.http_client import http_get, get_http_session
+        with patch.object(get_http_session(), "get", return_value=MagicMock()) as get:
+            http_get("https://example.com/x", timeout=30)
+        connect, read = get.call_args.kwargs["timeout"]
+        assert read == 30 and connect <= 30
+
+    def test_default_timeout_from_settings(self):
+        from app.core.config import get_settings
+        from app.core.http_client import http_get, get_http_session
+        settings = get_settings()
+        with patch.object(get_http_session(), "get", return_value=MagicMock()) as get:
+            http_get("https://example.com/x")
+        assert get.call_args.kwargs["timeout"] == (
+            settings.http_connect_timeout, settings.http_read_timeout
+        )
+
+    def test_async_variant(self):
+        import asyncio
+        from app.core.http_client import async_http_get
+        resp = MagicMock(status_code=200)
+        with patch("app.core.http_client.http_get", return_value=resp) as get:
+            result = asyncio.run(async_http_get("https://example.com/x", timeout=5))
+        assert result is resp
+        get.assert_called_once_with("https://example.com/x", timeout=5)
+
+
+def _fake_response(chunks, content_length=None):
+    resp = MagicMock()
+    resp.__enter__.return_value = resp
+    resp.headers = {} if content_length is None else {"Content-Length": str(content_length)}
+    resp.iter_content.return_value = iter(chunks)
+    return resp
+
+
+class TestStreamingDownload:
+
+    def test_rejects_by_content_length(self):
+        from io import BytesIO
+        from app.core.http_client import stream_download, DownloadTooLargeError
+        resp = _fake_response([b"x" * 10], content_length=10_000)
+        dest = BytesIO()
+        with patch("app.core.http_client.http_get", return_value=resp):
+            with pytest.raises(DownloadTooLargeError):
+                stream_download("https://example.com/big.pdf", dest, max_bytes=100)
+        resp.iter_content.assert_not_called()
+        assert dest.getvalue() == b""
+
+    def test_rejects_by_running_count(self):
+        from io import BytesIO
+        from app.core.http_client import stream_download, DownloadTooLargeError
+        resp = _fake_response([b"x" * 60, b"x" * 60])
+        with patch("app.core.http_client.http_get", return_value=resp):
+            with pytest.raises(DownloadTooLargeError):
+                stream_download("https://example.com/big.pdf", BytesIO(), max_bytes=100)
+
+    def test_too_large_is_value_error(self):
+        from app.core.http_client import DownloadTooLargeError
+        assert issubclass(DownloadTooLargeError, ValueError)
+
+    def test_spooled_rolls_over_to_disk(self):
+        from app.core.config import get_settings
+        from app.core.http_client import download_spooled
+        threshold = get_settings().download_spool_threshold_mb * 1024 * 1024
+        chunk = b"x" * (1024 * 1024)
+        count = threshold // len(chunk) + 1
+        resp = _fake_response([chunk] * count)
+        with patch("app.core.http_client.http_get", return_value=resp):
+            f = download_spooled("https://example.com/a.xlsx")
+        try:
+            assert f._rolled
+            assert f.tell() == 0
+            assert len(f.read()) == len(chunk) * count
+        finally:
+            f.close()
+
+    def test_tempfile_removed_on_failure(self, tmp_path):
+        from app.core.http_client import DownloadTooLargeError
+        from app.services.cos_storage import CosStorageService
+        svc = CosStorageService.__new__(CosStorageService)
+        with patch(
+            "app.services.storage_backend.open_source",
+            side_effect=DownloadTooLargeError("too large"),
+        ):
+            with pytest.raises(DownloadTooLargeError):
+                svc.download_to_tempfile("https://example.com/a.pdf", dir=str(tmp_path))
+        assert list(tmp_path.iterdir()) == []
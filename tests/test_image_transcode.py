@@ -0,0 +1,99 @@
+"""DOC-01 图片转码与转码结果缓存测试"""
+
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image, ImageDraw
+
+
+def _image_bytes(img: Image.Image, fmt: str) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _chart(width=2000, height=1250) -> bytes:
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    for k in range(20):
+        draw.rectangle([100 + k * 90, height - 100 - k * 45, 150 + k * 90, height - 100], fill=(30, 90, 200))
+    return _image_bytes(img, "PNG")
+
+
+def _photo(width=1500, height=1000) -> bytes:
+    img = Image.radial_gradient("L").resize((width, height)).convert("RGB")
+    img = Image.merge("RGB", (img.getchannel(0), img.getchannel(0).rotate(90), Image.effect_noise((width, height), 60)))
+    return _image_bytes(img, "JPEG")
+
+
+class TestTranscodeImage:
+
+    def test_chart_downsampled_to_print_size_as_png(self):
+        from app.services.image_transcode import transcode_image
+        result = transcode_image(_chart(), dpi=150)
+        assert result.format == "PNG"
+        assert abs(result.width_cm - 8.4) < 1e-9
+        # 8.4 cm @ 150 DPI ≈ 496 px
+        assert Image.open(BytesIO(result.data)).size == (496, 310)
+
+    def test_photo_kept_as_jpeg(self):
+        from app.services.image_transcode import transcode_image
+        result = transcode_image(_photo(), dpi=150)
+        assert result.format == "JPEG"
+        assert Image.open(BytesIO(result.data)).size == (496, 331)
+
+    def test_small_image_not_upscaled_and_transparency_flattened(self):
+        from app.services.image_transcode import transcode_image
+        img = Image.new("RGBA", (40, 80), (0, 0, 0, 0))
+        result = transcode_image(_image_bytes(img, "PNG"), dpi=150)
+        out = Image.open(BytesIO(result.data))
+        assert out.size == (40, 80) and out.mode == "RGB"
+        assert out.getpixel((0, 0)) == (255, 255, 255)
+        # 高度受 18 cm 限制：宽 = 18 × 0.5 × 0.6
+        assert abs(result.width_cm - 5.4) < 1e-9
+
+    def test_zero_dpi_keeps_source_resolution(self):
+        from app.services.image_transcode import transcode_image
+        result = transcode_image(_chart(800, 500), dpi=0)
+        assert Image.open(BytesIO(result.data)).size == (800, 500)
+
+
+class TestImageTranscodeCache:
+
+    def test_same_source_and_size_transcoded_once(self):
+        from app.services.image_transcode import ImageTranscodeCache, transcode_image
+        cache = ImageTranscodeCache()
+        raw = _chart()
+        with patch("app.services.image_transcode.get_image_transcode_cache", return_value=cache):
+            first = transcode_image(raw, dpi=150)
+            second = transcode_image(raw, dpi=150)
+            transcode_image(raw, dpi=300)
+        assert second is first
+        assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 2
+
+    def test_memory_budget_evicts_least_recent(self):
+        from app.services.image_transcode import ImageTranscodeCache, TranscodedImage
+        entry = TranscodedImage(b"x" * 100, "PNG", 1.0)
+        cache = ImageTranscodeCache(max_bytes=200)
+        cache.put("a", entry)
+        cache.put("b", entry)
+        cache.get("a")
+        cache.put("c", entry)
+        assert cache.get("b") is None
+        assert cache.get("a") is entry and cache.get("c") is entry
+        assert cache.stats()["evictions"] == 1
+
+
+class TestRenderedImages:
+
+    def test_docx_embeds_transcoded_images(self):
+        import zipfile
+        from app.services.doc_builder import render_markdown_to_docx
+        images = {"http://x/chart.png": _chart(), "http://x/photo.jpg": _photo()}
+        md = "![图表](http://x/chart.png)\n\n![照片](http://x/photo.jpg)"
+        with patch("app.services.doc_builder.open_source", side_effect=lambda url, timeout=None: BytesIO(images[url])):
+            output = render_markdown_to_docx(md)
+        package = zipfile.ZipFile(output)
+        media = [n for n in package.namelist() if n.startswith("word/media/")]
+        assert sorted(n.rsplit(".", 1)[1] for n in media) == ["jpg", "png"]
+        assert all(Image.open(BytesIO(package.read(n))).width == 496 for n in media)
@@ -0,0 +1,108 @@
+"""VIS 渲染结果缓存测试"""
+
+import os
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    from app.services.render_cache import RenderCache
+
+    def _make(**kwargs):
+        kwargs.setdefault("exists", lambda url: True)
+        return RenderCache(cache_dir=str(tmp_path / "cache"), **kwargs)
+    return _make
+
+
+def _qr_req(content="https://www.example.com"):
+    from app.schemas.payload_vis import GenerateQRCodeRequest
+    return GenerateQRCodeRequest(content=content, size=10, error_correction="M")
+
+
+RESULT = {"file_url": "https://cos.test/qr.png", "filename": "qr.png"}
+
+
+class TestCacheKey:
+
+    def test_same_payload_same_key(self):
+        from app.services.render_cache import RenderCache
+        assert RenderCache.make_key("VIS-03a", _qr_req()) == RenderCache.make_key("VIS-03a", _qr_req())
+
+    def test_endpoint_and_payload_in_key(self):
+        from app.services.render_cache import RenderCache
+        key = RenderCache.make_key("VIS-03a", _qr_req())
+        assert key != RenderCache.make_key("VIS-03b", _qr_req())
+        assert key != RenderCache.make_key("VIS-03a", _qr_req("other"))
+
+
+class TestRenderCache:
+
+    def test_memory_and_disk_hits(self, make_cache):
+        cache = make_cache()
+        assert cache.get("k" * 64) is None
+        cache.put("k" * 64, RESULT)
+        assert cache.get("k" * 64) == RESULT
+
+        # 新实例只能从磁盘层命中
+        fresh = make_cache()
+        assert fresh.get("k" * 64) == RESULT
+        assert fresh.stats()["hits_disk"] == 1
+        assert cache.stats()["hits_memory"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_memory_lru_eviction(self, make_cache):
+        cache = make_cache(memory_entries=2)
+        for key in ("a1", "b2", "c3"):
+            cache.put(key, RESULT)
+        assert list(cache._memory) == ["b2", "c3"]
+        assert cache.stats()["evictions_memory"] == 1
+
+    def test_disk_size_eviction(self, make_cache):
+        cache = make_cache(disk_max_bytes=250)
+        for i, key in enumerate(("a1", "b2", "c3")):
+            cache.put(key, RESULT)
+            path = cache._path(key)
+            os.utime(path, (1000 + i, 1000 + i))
+        assert cache.stats()["disk_bytes"] <= 250
+        assert not os.path.exists(cache._path("a1"))
+        assert os.path.exists(cache._path("c3"))
+
+    def test_missing_object_invalidates(self, make_cache):
+        exists = {"value": True}
+        cache = make_cache(verify_seconds=0, exists=lambda url: exists["value"])
+        cache.put("k1", RESULT)
+        assert cache.get("k1") == RESULT
+        exists["value"] = False
+        assert cache.get("k1") is None
+        assert not os.path.exists(cache._path("k1"))
+        assert cache.stats()["invalidations"] == 1
+
+    def test_storage_error_keeps_entry(self, make_cache):
+        def boom(url):
+            raise ConnectionError("cos down")
+        cache = make_cache(verify_seconds=0, exists=boom)
+        cache.put("k1", RESULT)
+        assert cache.get("k1") == RESULT
+
+
+class TestCachedRoutes:
+
+    def test_second_request_skips_render(self, client, make_cache):
+        cache = make_cache()
+        payload = {"content": "https://www.example.com", "size": 10, "error_correction": "M"}
+        with patch("app.services.render_cache.get_render_cache", return_value=cache), \
+             patch("app.api.endpoints.vis_routes.get_render_cache", return_value=cache), \
+             patch("app.api.endpoints.vis_routes.generate_qrcode", return_value=RESULT) as render:
+            first = client.post("/api/v1/vis/generate_qrcode", json=payload)
+            second = client.post("/api/v1/vis/generate_qrcode", json=payload)
+            stats = client.get("/api/v1/vis/cache/stats").json()["data"]
+        assert first.json()["data"] == second.json()["data"] == RESULT
+        assert render.call_count == 1
+        assert stats["hits_memory"] == 1 and stats["misses"] == 1
+
+    def test_stats_when_disabled(self, client):
+        resp = client.get("/api/v1/vis/cache/stats")
+        assert resp.status_code == 200
+        assert resp.json()["data"] == {"enabled": False}
@@ -105,6 +105,20 @@ class TestExcelRoutes:
         })
         assert resp.status_code == 422
 
+    @patch("app.api.endpoints.excel_routes.append_rows_batch")
+    def test_exc02_append_rows(self, mock_append, client):
+        """EXC-02: 追加行后上传，返回合并批次大小"""
+        mock_append.return_value = BytesIO(b"PK\x03\x04fake_xlsx")
+        resp = client.post("/api/v1/excel/append_rows", json={
+            "source_excel_url": "https://example.com/log.xlsx",
+            "sheet_name": "日志",
+            "rows": [["a", 1], ["b", 2]],
+        })
+        assert resp.status_code == 200
+        data = resp.json()["data"]
+        assert data["rows_appended"] == 2 and data["batch_size"] == 1
+        assert mock_append.call_args.kwargs["appends"] == [("日志", [["a", 1], ["b", 2]])]
+
     @patch("app.api.endpoints.excel_routes.generate_complex_excel")
     def test_exc03_generate_complex(self, mock_gen, client):
         """EXC-03: 复杂 Excel"""
@@ -120,6 +134,88 @@ class TestExcelRoutes:
         assert resp.status_code == 200
 
 
+    def test_exc04_stream_csv(self, client):
+        """EXC-04: csv 格式流式返回，分页游标放在响应头"""
+        from openpyxl import Workbook
+        wb = Workbook()
+        for row in [["Name", "Score"], ["Alice", 95], ["Bob", 87]]:
+            wb.active.append(row)
+        buf = BytesIO()
+        wb.save(buf)
+        with patch("app.services.excel_handler.open_source", return_value=BytesIO(buf.getvalue())):
+            resp = client.post("/api/v1/excel/extract_range", json={
+                "source_excel_url": "https://example.com/a.xlsx",
+                "limit": 1,
+                "output_format": "csv",
+            })
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert resp.text == "Name,Score\nAlice,95\n"
+        assert resp.headers["X-Next-Cursor"]
+
+    def test_exc04_bad_cursor_rejected(self, client):
+        """EXC-04: 无效游标返回 422"""
+        resp = client.post("/api/v1/excel/extract_range", json={
+            "source_excel_url": "https://example.com/a.xlsx",
+            "cursor": "bogus",
+        })
+        assert resp.status_code == 422
+
+    @patch("app.api.endpoints.excel_routes.query_excel_range")
+    def test_exc04_query_range(self, mock_query, client):
+        """EXC-04: 查询下推，条件与聚合以普通 dict 传给 service"""
+        mock_query.return_value = {
+            "sheet_name": "Sheet1", "columns": ["区域", "sum(金额)"], "column_types": ["string", "number"],
+            "rows": [["华东", 17]], "total_rows": 1, "scanned_rows": 3, "truncated": False,
+        }
+        resp = client.post("/api/v1/excel/query_range", json={
+            "source_excel_url": "https://example.com/a.xlsx",
+            "where": [{"column": "金额", "op": "gt", "value": 0}],
+            "group_by": ["区域"],
+            "aggregates": [{"func": "sum", "column": "金额"}],
+        })
+        assert resp.status_code == 200
+        assert resp.json()["data"]["rows"] == [["华东", 17]]
+        kwargs = mock_query.call_args.kwargs
+        assert kwargs["where"] == [{"column": "金额", "op": "gt", "value": 0}]
+        assert kwargs["aggregates"] == [{"func": "sum", "column": "金额", "alias": None}]
+
+    def test_exc04_query_unknown_aggregate_rejected(self, client):
+        resp = client.post("/api/v1/excel/query_range", json={
+            "source_excel_url": "https://example.com/a.xlsx",
+            "aggregates": [{"func": "median", "column": "金额"}],
+        })
+        assert resp.status_code == 422
+
+    def test_exc04_extract_ranges(self, client):
+        """EXC-04: 多区域提取，结果按 key 返回"""
+        from openpyxl import Workbook
+        wb = Workbook()
+        for row in [["Name", "Score"], ["Alice", 95], ["Bob", 87]]:
+            wb.active.append(row)
+        buf = BytesIO()
+        wb.save(buf)
+        with patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(buf.getvalue())):
+            resp = client.post("/api/v1/excel/extract_ranges", json={
+                "source_excel_url": "https://example.com/a.xlsx",
+                "sheet_name": "Sheet",
+                "ranges": [
+                    {"key": "table", "keyword": "Name"},
+                    {"key": "best", "cell_range": "B2:B2"},
+                ],
+            })
+        assert resp.status_code == 200
+        results = resp.json()["data"]["results"]
+        assert results["table"]["data"] == [["Alice", 95], ["Bob", 87]]
+        assert results["best"]["value"] == 95
+
+    def test_exc04_extract_ranges_requires_one_selector(self, client):
+        resp = client.post("/api/v1/excel/extract_ranges", json={
+            "source_excel_url": "https://example.com/a.xlsx",
+            "ranges": [{"key": "a", "cell_range": "A1:B2", "keyword": "x"}],
+        })
+        assert resp.status_code == 422
+
 # =====================================================
 #  VIS 端点
 # =====================================================
@@ -7,6 +7,7 @@ Service 层单元测试。
 import pytest
 from io import BytesIO
 from docx import Document
+from docx.oxml.ns import qn
 
 
 # =====================================================
@@ -59,6 +60,196 @@ class TestRenderMarkdownToDocx:
         assert result.read(2) == b"PK"
 
 
+class TestImagePrefetch:
+
+    @staticmethod
+    def _png() -> bytes:
+        from PIL import Image
+        buf = BytesIO()
+        Image.new("RGBA", (4, 3), (255, 0, 0, 128)).save(buf, format="PNG")
+        return buf.getvalue()
+
+    def test_collects_block_images_in_order(self):
+        import mistune
+        from app.services.doc_builder import MarkdownToDocx
+        md = (
+            "![a](http://x/1.png)\n\n- ![b](http://x/2.png)\n\n行内 ![c](http://x/3.png) 图片\n\n"
+            "> ![d](http://x/4.png)\n\n![e](http://x/5.png)\n\n![a](http://x/1.png)"
+        )
+        ast = mistune.create_markdown(renderer=None, plugins=['table'])(md)
+        # 列表、块引用与行内的图片渲染时不插入，不预取
+        assert MarkdownToDocx.collect_image_urls(ast) == ["http://x/1.png", "http://x/5.png"]
+
+    def test_images_fetched_concurrently_once(self):
+        import threading
+        from unittest.mock import patch
+        from app.services.doc_builder import render_markdown_to_docx
+        png = self._png()
+        barrier = threading.Barrier(3, timeout=5)
+        calls = []
+
+        def fake_open(url, timeout=None):
+            calls.append(url)
+            barrier.wait()  # 三张图片全部同时在下载时才放行
+            return BytesIO(png)
+
+        md = "\n\n".join(f"![图{i}](http://x/{i}.png)" for i in (1, 2, 3, 1))
+        with patch("app.services.doc_builder.open_source", side_effect=fake_open):
+            doc = Document(render_markdown_to_docx(md))
+        assert sorted(calls) == ["http://x/1.png", "http://x/2.png", "http://x/3.png"]
+        assert len(doc.inline_shapes) == 0  # 上下型环绕：图片以 anchor 形式插入
+        assert len(doc.element.body.findall(".//{*}anchor")) == 4
+
+    def test_failed_and_late_images_get_placeholders(self):
+        import threading
+        import requests
+        from unittest.mock import MagicMock, patch
+        from app.core.config import get_settings
+        from app.services.doc_builder import render_markdown_to_docx
+        release = threading.Event()
+
+        def fake_open(url, timeout=None):
+            if url.endswith("404.png"):
+                raise requests.HTTPError(response=MagicMock(status_code=404))
+            release.wait(5)
+            return BytesIO(self._png())
+
+        md = "![a](http://x/404.png)\n\n![b](http://x/slow.png)"
+        try:
+            with patch("app.services.doc_builder.open_source", side_effect=fake_open), \
+                    patch.object(get_settings(), "docx_image_prefetch_timeout_seconds", 0.2):
+                doc = Document(render_markdown_to_docx(md))
+        finally:
+            release.set()
+        texts = [p.text for p in doc.paragraphs]
+        assert "[图片下载失败: HTTP 404]" in texts
+        assert "[图片下载失败: 超时]" in texts
+
+    def test_concurrent_renders_share_download_bound(self):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import patch
+        from app.core.config import get_settings
+        from app.services.doc_builder import _prefetch_images
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def fake_open(url, timeout=None):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return BytesIO(b"img")
+
+        docs = [[f"http://x/{d}/{i}.png" for i in range(4)] for d in range(3)]
+        with patch("app.services.doc_builder.open_source", side_effect=fake_open), \
+                patch("app.services.doc_builder._prefetch_executor", None), \
+                patch.object(get_settings(), "docx_image_prefetch_workers", 2):
+            with ThreadPoolExecutor(max_workers=3) as renders:
+                results = list(renders.map(_prefetch_images, docs))
+        assert all(len(images) == 4 for images in results)
+        assert peak[0] == 2
+
+
+class TestBaseDocument:
+
+    def test_clones_are_independent(self):
+        from app.core.themes import get_theme
+        from app.services.doc_builder import _new_document
+        theme = get_theme("business_blue")
+        first = _new_document(theme)
+        first.add_paragraph("只属于第一份")
+        first.styles['Normal'].font.size = None
+        second = _new_document(theme)
+        assert all(p.text != "只属于第一份" for p in second.paragraphs)
+        assert second.styles['Normal'].font.size is not None
+        assert second.sections[0].page_width == first.sections[0].page_width
+
+    def test_unused_styles_and_parts_dropped(self):
+        import re
+        import zipfile
+        from app.services.doc_builder import render_markdown_to_docx
+        md = "---\nheader: H\nfooter: page_number\ntoc: true\n---\n# 标题\n\n- a\n\n1. b\n\n```\ncode\n```"
+        package = zipfile.ZipFile(render_markdown_to_docx(md))
+        names = package.namelist()
+        assert "word/stylesWithEffects.xml" not in names and "docProps/thumbnail.jpeg" not in names
+        defined = set(re.findall(rb'w:styleId="([^"]+)"', package.read("word/styles.xml")))
+        referenced = set()
+        for name in names:
+            if name.startswith("word/") and name != "word/styles.xml" and name.endswith(".xml"):
+                referenced |= set(re.findall(rb'w:(?:pStyle|rStyle|tblStyle) w:val="([^"]+)"', package.read(name)))
+        assert referenced and referenced <= defined
+        assert len(defined) < 40
+        assert package.read("word/footer1.xml").count(b"<w:fldChar ") == 2
+
+
+class TestThemeStyles:
+
+    def _render(self, md):
+        import zipfile
+        from app.services.doc_builder import render_markdown_to_docx
+        output = render_markdown_to_docx(md)
+        xml = zipfile.ZipFile(output).read("word/document.xml").decode()
+        return xml, Document(output)
+
+    def test_runs_reference_styles_instead_of_direct_formatting(self):
+        xml, doc = self._render("# 标题\n\n正文 **粗体** *斜体*\n\n| a | b |\n|---|---|\n| 1 | 2 |\n| 3 | 4 |")
+        assert "w:rFonts" not in xml and "w:shd" not in xml and "w:color" not in xml
+        assert doc.paragraphs[0].style.name == "Heading 1"
+        assert [r.style.name for r in doc.paragraphs[1].runs] == ["Default Paragraph Font", "Strong", "Default Paragraph Font", "Emphasis"]
+        assert doc.tables[0].style.name == "SGA Table"
+        assert doc.tables[0].cell(2, 1).text == "4"
+
+    def test_styles_follow_theme(self):
+        from app.core.themes import get_theme
+        theme = get_theme("government_red")
+        _, doc = self._render("---\ntheme: government_red\n---\n## 小节\n\n| a |\n|---|\n| 1 |")
+        heading = doc.styles["Heading 2"]
+        assert str(heading.font.color.rgb) == theme.heading_color
+        assert heading.font.size.pt == 15 and heading.font.bold
+        normal_fonts = doc.styles["Normal"].element.rPr.rFonts
+        assert normal_fonts.get(qn("w:ascii")) == "Times New Roman" and normal_fonts.get(qn("w:eastAsia")) == "宋体"
+        table_style = doc.styles["SGA Table"].element
+        fills = {
+            p.get(qn("w:type")): p.find(f"{qn('w:tcPr')}/{qn('w:shd')}").get(qn("w:fill"))
+            for p in table_style.findall(qn("w:tblStylePr"))
+        }
+        assert fills == {"firstRow": theme.table_header_bg, "band2Horz": theme.table_alt_row_bg}
+
+
+class TestTableBuilder:
+
+    def test_large_table_structure(self):
+        from app.services.doc_builder import render_markdown_to_docx
+        rows = "\n".join(f"| r{i} | **{i}** | *备注* `c{i}` |" for i in range(500))
+        doc = Document(render_markdown_to_docx(f"| 名称 | 数值 | 说明 |\n|---|---|---|\n{rows}"))
+        table = doc.tables[0]
+        assert len(table.rows) == 501 and len(table.columns) == 3
+        assert table.cell(0, 0).text == "名称"
+        assert table.cell(500, 2).text == "备注 c499"
+        assert [r.style.name for r in table.cell(1, 1).paragraphs[0].runs] == ["Strong"]
+        section = doc.sections[0]
+        width = section.page_width - section.left_margin - section.right_margin
+        assert all(abs(col.width - width // 3) < 635 for col in table.columns)  # 取整到 twips
+
+    def test_matches_python_docx_table_xml(self):
+        from app.core.themes import get_theme
+        from app.services.doc_builder import MarkdownToDocx, _new_document
+        cells = [[{"children": [{"type": "text", "raw": v}]} for v in row] for row in (["a", " b "], ["1", "2"])]
+        doc = _new_document(get_theme())
+        built = MarkdownToDocx(doc)._build_table(cells, 2)
+        doc.element.body._insert_tbl(built)
+        expected = doc.add_table(rows=2, cols=2, style="SGA Table")
+        for i, row in enumerate(expected.rows):
+            for j, cell in enumerate(row.cells):
+                cell.paragraphs[0].add_run(cells[i][j]["children"][0]["raw"])
+        from lxml import etree
+        assert etree.tostring(built) == etree.tostring(expected._tbl)
+
+
 # =====================================================
 #  DOC-02: fill_docx_template
 # =====================================================
@@ -178,10 +369,212 @@ class TestGenerateComplexExcel:
         assert has_formula
 
 
+# =====================================================
+#  EXC-04: extract_excel_range
+# =====================================================
+
+class TestExtractExcelRange:
+
+    @staticmethod
+    def _source(rows, write_only=False):
+        from openpyxl import Workbook
+        wb = Workbook(write_only=write_only)
+        ws = wb.create_sheet("Data") if write_only else wb.active
+        ws.title = "Data"
+        for row in rows:
+            ws.append(row)
+        buf = BytesIO()
+        wb.save(buf)
+        return buf.getvalue()
+
+    def _extract(self, raw, **kwargs):
+        from unittest.mock import patch
+        from app.services.excel_handler import extract_excel_range
+        with patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(raw)):
+            return extract_excel_range("https://example.com/a.xlsx", sheet_name="Data", **kwargs)
+
+    def test_cell_range_window(self):
+        raw = self._source([["名称", "数量", "单价"], ["a", 1, 2.5], ["b", 2, 3.5]])
+        result = self._extract(raw, cell_range="A1:B2")
+        assert result["headers"] == ["名称", "数量"]
+        assert result["data"] == [["a", 1]]
+
+    def test_cell_range_beyond_sheet_padded(self):
+        raw = self._source([["名称", "数量"], ["a", 1]])
+        result = self._extract(raw, cell_range="A1:C4")
+        assert result["headers"] == ["名称", "数量", ""]
+        assert result["data"] == [["a", 1, None], [None, None, None], [None, None, None]]
+
+    def test_full_read_pads_ragged_rows(self):
+        raw = self._source([["说明"], ["名称", "数量", "备注"]], write_only=True)
+        result = self._extract(raw)
+        assert result["headers"] == ["说明", "", ""]
+        assert result["data"] == [["名称", "数量", "备注"]]
+
+    def test_keyword_block_ends_at_empty_row(self):
+        raw = self._source([["报表说明"], [], ["名称", "数量"], ["a", 1], ["b", 2], [], ["c", 3]])
+        result = self._extract(raw, keyword="数量")
+        assert result["headers"] == ["名称", "数量"]
+        assert result["data"] == [["a", 1], ["b", 2]]
+        assert self._extract(raw, keyword="不存在")["total_rows"] == 0
+
+    def test_parsing_stops_after_window(self):
+        from unittest.mock import patch
+        from openpyxl.worksheet._reader import WorkSheetParser
+        rows = [["名称", "数量"]] + [[f"r{i}", i] for i in range(500)]
+        raw = self._source(rows[:10] + [[]] + rows[10:], write_only=True)
+        # 关闭解析结果缓存：第二次访问同一 Sheet 时会整表解析入缓存
+        with patch("app.services.excel_handler.get_excel_parse_cache", return_value=None), \
+                patch.object(WorkSheetParser, "parse_row", autospec=True,
+                             side_effect=WorkSheetParser.parse_row) as parse_row:
+            assert self._extract(raw, cell_range="A1:B5")["total_rows"] == 4
+            assert parse_row.call_count <= 6
+            parse_row.reset_mock()
+            assert self._extract(raw, keyword="名称")["total_rows"] == 9
+            assert parse_row.call_count <= 12
+
+
+class TestExtractPagination:
+
+    RAW = None
+
+    @classmethod
+    def _raw(cls):
+        if cls.RAW is None:
+            rows = [["序号", "名称"]] + [[i, f"项目{i}"] for i in range(25)]
+            cls.RAW = TestExtractExcelRange._source(rows)
+        return cls.RAW
+
+    def _call(self, func, **kwargs):
+        from unittest.mock import patch
+        with patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(self._raw())):
+            return func("https://example.com/ledger.xlsx", sheet_name="Data", **kwargs)
+
+    def test_pages_follow_cursor(self):
+        from app.services.excel_handler import extract_excel_range
+        first = self._call(extract_excel_range, limit=10)
+        assert first["total_rows"] == 10 and first["has_more"]
+        assert first["data"][0] == [0, "项目0"]
+        seen = list(first["data"])
+        cursor = first["next_cursor"]
+        while cursor:
+            page = self._call(extract_excel_range, limit=10, cursor=cursor)
+            seen += page["data"]
+            cursor = page["next_cursor"]
+        assert [row[0] for row in seen] == list(range(25))
+        assert page["offset"] == 20 and not page["has_more"]
+
+    def test_cursor_is_stable_and_bound_to_query(self):
+        from app.services.excel_handler import extract_excel_range
+        cursor = self._call(extract_excel_range, limit=5)["next_cursor"]
+        assert self._call(extract_excel_range, limit=5, cursor=cursor) == \
+            self._call(extract_excel_range, limit=5, cursor=cursor)
+        with pytest.raises(ValueError):
+            self._call(extract_excel_range, cell_range="A1:B10", cursor=cursor)
+        with pytest.raises(ValueError):
+            self._call(extract_excel_range, cursor="not-a-cursor")
+
+    def test_exact_last_page_has_no_cursor(self):
+        from app.services.excel_handler import extract_excel_range
+        page = self._call(extract_excel_range, offset=15, limit=10)
+        assert page["total_rows"] == 10
+        assert not page["has_more"] and page["next_cursor"] is None
+
+    def test_columns_orient(self):
+        from app.services.excel_handler import extract_excel_range
+        result = self._call(extract_excel_range, cell_range="A1:B4", orient="columns")
+        assert result["columns"] == [[0, 1, 2], ["项目0", "项目1", "项目2"]]
+        assert "data" not in result
+
+    def test_stream_csv(self):
+        from app.services.excel_handler import stream_excel_range
+        body, next_cursor = self._call(stream_excel_range, offset=2, limit=3, output_format="csv")
+        assert b"".join(body).decode("utf-8") == "序号,名称\n2,项目2\n3,项目3\n4,项目4\n"
+        assert next_cursor is not None
+        _, last_cursor = self._call(stream_excel_range, offset=15, limit=10, output_format="csv")
+        assert last_cursor is None
+        _, empty_cursor = self._call(stream_excel_range, offset=30, limit=10, output_format="csv")
+        assert empty_cursor is None
+
+    def test_stream_ndjson_trailer(self):
+        import json
+        from app.services.excel_handler import stream_excel_range
+        body, _ = self._call(stream_excel_range, offset=20, limit=10, output_format="ndjson")
+        lines = [json.loads(line) for line in b"".join(body).decode("utf-8").splitlines()]
+        assert lines[0] == {"sheet_name": "Data", "headers": ["序号", "名称"]}
+        assert lines[1] == [20, "项目20"]
+        assert lines[-1] == {"total_rows": 5, "offset": 20, "has_more": False, "next_cursor": None}
+
+
 # =====================================================
 #  PDF helper: _hex_to_rgb
 # =====================================================
 
+class TestExtractExcelRanges:
+
+    @staticmethod
+    def _source() -> bytes:
+        from openpyxl import Workbook
+        from openpyxl.workbook.defined_name import DefinedName
+        wb = Workbook()
+        cover = wb.active
+        cover.title = "封面"
+        cover["B3"] = "2024年3月"
+        data = wb.create_sheet("明细")
+        for row in [["区域汇总"], ["区域", "收入"], ["华东", 10], ["华南", 5], [], ["序号", "金额"]] + [[i, i * 10] for i in range(1, 301)]:
+            data.append(row)
+        wb.defined_names["期间"] = DefinedName("期间", attr_text="封面!$B$3")
+        wb.defined_names["税率"] = DefinedName("税率", attr_text="0.13")
+        buf = BytesIO()
+        wb.save(buf)
+        return buf.getvalue()
+
+    def _extract(self, ranges, **kwargs):
+        from unittest.mock import patch
+        from app.services.excel_handler import extract_excel_ranges
+        raw = self._source()
+        with patch("app.services.excel_handler.open_source", side_effect=lambda url: BytesIO(raw)):
+            return extract_excel_ranges("https://example.com/a.xlsx", ranges, sheet_name="明细", **kwargs)
+
+    def test_ranges_keywords_and_names(self):
+        results = self._extract([
+            {"key": "summary", "keyword": "收入"},
+            {"key": "detail", "cell_range": "A6:B8"},
+            {"key": "period", "defined_name": "期间"},
+            {"key": "first", "keyword": "序号", "limit": 2},
+        ])["results"]
+        assert list(results) == ["summary", "detail", "period", "first"]
+        assert results["summary"]["headers"] == ["区域", "收入"]
+        assert results["summary"]["data"] == [["华东", 10], ["华南", 5]]
+        assert results["summary"]["ref"] == "A2:B4"
+        assert results["detail"]["data"] == [[1, 10], [2, 20]]
+        assert results["period"] == {
+            "sheet_name": "封面", "ref": "B3", "headers": [], "data": [["2024年3月"]],
+            "total_rows": 1, "has_more": False, "value": "2024年3月",
+        }
+        assert results["first"]["data"] == [[1, 10], [2, 20]] and results["first"]["has_more"]
+
+    def test_single_scan_stops_after_last_range(self):
+        from unittest.mock import patch
+        from openpyxl.worksheet._reader import WorkSheetParser
+        with patch("app.services.excel_handler.get_excel_parse_cache", return_value=None), \
+                patch.object(WorkSheetParser, "parse_row", autospec=True,
+                             side_effect=WorkSheetParser.parse_row) as parse_row:
+            self._extract([
+                {"key": "summary", "keyword": "区域汇总"},
+                {"key": "detail", "cell_range": "A6:B12"},
+                {"key": "period", "defined_name": "期间"},
+            ])
+        # 明细只解析到第 12 行，封面 3 行
+        assert parse_row.call_count <= 12 + 3
+
+    def test_unresolvable_defined_name(self):
+        with pytest.raises(ValueError, match="税率"):
+            self._extract([{"key": "rate", "defined_name": "税率"}])
+        with pytest.raises(ValueError, match="不存在"):
+            self._extract([{"key": "x", "defined_name": "不存在的名称"}])
+
+
 class TestHexToRgb:
 
     def test_black(self):
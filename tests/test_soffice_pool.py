@@ -0,0 +1,124 @@
+"""LibreOffice 转换池测试（不依赖真实 soffice）"""
+
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+from app.services.soffice_pool import SofficePool, ConversionTimeout
+
+
+def _fake_cold_run(cmd, **kwargs):
+    """模拟 soffice --convert-to：在 --outdir 下生成同名 PDF"""
+    out_dir = cmd[cmd.index("--outdir") + 1]
+    stem = os.path.splitext(os.path.basename(cmd[-1]))[0]
+    with open(os.path.join(out_dir, stem + ".pdf"), "wb") as f:
+        f.write(b"%PDF-1.4 fake")
+    return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+
+@pytest.fixture
+def docx_file(tmp_path):
+    path = tmp_path / "input.docx"
+    path.write_bytes(b"PK fake docx")
+    return str(path)
+
+
+class TestColdMode:
+
+    @patch("app.services.soffice_pool._find_uno_python", return_value=None)
+    def test_uses_slot_profile(self, _uno, tmp_path, docx_file):
+        pool = SofficePool(size=2, profile_root=str(tmp_path / "profiles"))
+        with patch("app.services.soffice_pool.subprocess.run", side_effect=_fake_cold_run) as run:
+            pdf_path = pool.convert(docx_file, str(tmp_path))
+        assert pdf_path.endswith("input.pdf")
+        cmd = run.call_args[0][0]
+        profile_args = [a for a in cmd if a.startswith("-env:UserInstallation=")]
+        assert profile_args and "profiles" in profile_args[0]
+
+    @patch("app.services.soffice_pool._find_uno_python", return_value=None)
+    def test_timeout_raises_runtime_error(self, _uno, tmp_path, docx_file):
+        pool = SofficePool(size=1, convert_timeout=1, profile_root=str(tmp_path))
+        with patch(
+            "app.services.soffice_pool.subprocess.run",
+            side_effect=subprocess.TimeoutExpired("soffice", 1),
+        ):
+            with pytest.raises(ConversionTimeout):
+                pool.convert(docx_file, str(tmp_path))
+        # 实例应被归还，队列仍可领取
+        assert pool._idle.qsize() == 1
+
+
+class TestWarmMode:
+
+    def _pool(self, tmp_path, **kwargs):
+        with patch("app.services.soffice_pool._find_uno_python", return_value="/usr/bin/python3"):
+            pool = SofficePool(profile_root=str(tmp_path), **kwargs)
+        inst = pool._instances[0]
+        inst.start = MagicMock()
+        inst.stop = MagicMock()
+        inst.convert_warm = MagicMock(
+            side_effect=lambda src, dst, timeout: open(dst, "wb").write(b"%PDF")
+        )
+        return pool, inst
+
+    def test_unhealthy_instance_restarted(self, tmp_path, docx_file):
+        pool, inst = self._pool(tmp_path, size=1)
+        inst.is_healthy = MagicMock(return_value=False)
+        pool.convert(docx_file, str(tmp_path))
+        inst.start.assert_called_once()
+        inst.convert_warm.assert_called_once()
+
+    def test_recycled_after_max_conversions(self, tmp_path, docx_file):
+        pool, inst = self._pool(tmp_path, size=1, max_conversions=2)
+        inst.is_healthy = MagicMock(return_value=True)
+        pool.convert(docx_file, str(tmp_path))
+        inst.stop.assert_not_called()
+        pool.convert(docx_file, str(tmp_path))
+        inst.stop.assert_called_once()
+
+    def test_failed_conversion_stops_instance(self, tmp_path, docx_file):
+        pool, inst = self._pool(tmp_path, size=1)
+        inst.is_healthy = MagicMock(return_value=True)
+        inst.convert_warm.side_effect = RuntimeError("bridge disposed")
+        with pytest.raises(RuntimeError):
+            pool.convert(docx_file, str(tmp_path))
+        inst.stop.assert_called_once()
+        assert pool._idle.qsize() == 1
+
+
+class TestUnoBridge:
+    """常驻实例经 UNO 辅助进程通信（以当前解释器运行假的辅助进程）"""
+
+    def _instance(self, tmp_path, script):
+        from app.services.soffice_pool import _SofficeInstance
+        inst = _SofficeInstance(0, "soffice", tmp_path, "pipe", uno_python=sys.executable)
+        inst.bridge = subprocess.Popen(
+            [sys.executable, "-c", script],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        return inst
+
+    def test_error_reply_raises(self, tmp_path, docx_file):
+        script = "import sys, json\nfor line in sys.stdin: print(json.dumps({'ok': False, 'error': 'IOException'}), flush=True)"
+        inst = self._instance(tmp_path, script)
+        try:
+            with pytest.raises(RuntimeError, match="IOException"):
+                inst.convert_warm(docx_file, str(tmp_path / "out.pdf"), timeout=10)
+            assert inst._ping() is False
+        finally:
+            inst.stop()
+
+    def test_stuck_conversion_times_out(self, tmp_path, docx_file):
+        inst = self._instance(tmp_path, "import time; time.sleep(60)")
+        with pytest.raises(ConversionTimeout):
+            inst.convert_warm(docx_file, str(tmp_path / "out.pdf"), timeout=0.5)
+        assert inst.bridge.wait(timeout=5) is not None
+        assert not inst.is_healthy()
+        inst.stop()
+
+    def test_mode_without_uno_interpreter(self, tmp_path):
+        with patch("app.services.soffice_pool.shutil.which", return_value=None):
+            pool = SofficePool(profile_root=str(tmp_path), uno_python="/nonexistent/python3")
+        assert pool.mode == "cold"
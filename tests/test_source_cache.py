@@ -0,0 +1,137 @@
+"""源文件条件 GET 缓存测试"""
+
+import hashlib
+import os
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+
+def _response(status=200, body=b"", headers=None):
+    resp = MagicMock()
+    resp.__enter__.return_value = resp
+    resp.status_code = status
+    resp.headers = dict(headers or {})
+    resp.iter_content.return_value = iter([body] if body else [])
+    return resp
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from app.services.source_cache import SourceCache
+    return SourceCache(cache_dir=str(tmp_path / "src"), max_bytes=1024, ttl_seconds=60)
+
+
+URL = "https://cos.test/templates/letterhead.docx"
+
+
+class TestConditionalGet:
+
+    def test_etag_revalidation_uses_304(self, cache):
+        first = _response(body=b"template-v1", headers={"ETag": '"v1"'})
+        not_modified = _response(status=304)
+        with patch("app.services.source_cache.http_get", side_effect=[first, not_modified]) as get:
+            with cache.open(URL) as f:
+                assert f.read() == b"template-v1"
+            with cache.open(URL) as f:
+                assert f.read() == b"template-v1"
+        assert get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert cache.stats()["revalidated"] == 1
+
+    def test_changed_object_replaced(self, cache):
+        first = _response(body=b"v1", headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        changed = _response(body=b"v2", headers={"Last-Modified": "Tue, 02 Jan 2024 00:00:00 GMT"})
+        with patch("app.services.source_cache.http_get", side_effect=[first, changed]) as get:
+            cache.open(URL).close()
+            with cache.open(URL) as f:
+                assert f.read() == b"v2"
+        assert "If-Modified-Since" in get.call_args_list[1].kwargs["headers"]
+
+    def test_ttl_without_validators(self, cache):
+        with patch("app.services.source_cache.http_get", return_value=_response(body=b"stamp")) as get:
+            cache.open(URL).close()
+            with cache.open(URL) as f:
+                assert f.read() == b"stamp"
+        assert get.call_count == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_ttl_expired_refetches(self, cache):
+        cache.ttl_seconds = 0
+        responses = [_response(body=b"a"), _response(body=b"b")]
+        with patch("app.services.source_cache.http_get", side_effect=responses):
+            cache.open(URL).close()
+            time.sleep(0.01)
+            with cache.open(URL) as f:
+                assert f.read() == b"b"
+
+    def test_no_store_not_cached(self, cache):
+        resp = _response(body=b"secret", headers={"Cache-Control": "no-store"})
+        with patch("app.services.source_cache.http_get", return_value=resp):
+            with cache.open(URL) as f:
+                assert f.read() == b"secret"
+        assert cache.stats()["disk_bytes"] == 0
+
+
+class TestBoundsAndDedupe:
+
+    def test_evicts_oldest_when_over_capacity(self, cache):
+        urls = [f"https://cos.test/{i}.png" for i in range(3)]
+        for i, url in enumerate(urls):
+            with patch("app.services.source_cache.http_get", return_value=_response(body=b"x" * 400)):
+                cache.open(url).close()
+            key = hashlib.sha256(url.encode()).hexdigest()
+            os.utime(cache._body_path(key), (1000 + i, 1000 + i))
+        assert cache.stats()["disk_bytes"] <= 1024
+        assert cache.stats()["evictions"] == 1
+
+    def test_concurrent_requests_share_one_fetch(self, cache):
+        started = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            started.set()
+            time.sleep(0.1)
+            return _response(body=b"img", headers={"ETag": '"e"'})
+
+        results = []
+        with patch("app.services.source_cache.http_get", side_effect=slow_get) as get:
+            def worker():
+                with cache.open(URL) as f:
+                    results.append(f.read())
+            first = threading.Thread(target=worker)
+            first.start()
+            started.wait()
+            others = [threading.Thread(target=worker) for _ in range(3)]
+            for t in others:
+                t.start()
+            for t in [first, *others]:
+                t.join()
+        assert results == [b"img"] * 4
+        assert get.call_count == 1
+
+
+class TestSourceVersion:
+
+    def test_version_from_validators(self, cache):
+        first = _response(body=b"v1", headers={"ETag": '"v1"'})
+        with patch("app.services.source_cache.http_get", side_effect=[first, _response(status=304)]):
+            assert cache.version(URL) == 'etag:"v1"'
+            assert cache.version(URL) == 'etag:"v1"'
+        assert cache.stats()["revalidated"] == 1
+
+    def test_no_version_without_validators_or_cache(self, cache):
+        with patch("app.services.source_cache.http_get", return_value=_response(body=b"x")):
+            assert cache.version(URL) is None
+        no_store = _response(body=b"x", headers={"ETag": '"v1"', "Cache-Control": "no-store"})
+        with patch("app.services.source_cache.http_get", return_value=no_store):
+            assert cache.version(URL + "?2") is None
+
+    def test_head_when_cache_disabled(self):
+        from app.services.source_cache import source_version
+        head = MagicMock(ok=True, headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        with patch("app.services.source_cache.get_source_cache", return_value=None), \
+                patch("app.services.source_cache._local_storage_path", return_value=None), \
+                patch("app.services.source_cache.http_head", return_value=head) as http_head:
+            assert source_version(URL) == "last-modified:Mon, 01 Jan 2024 00:00:00 GMT"
+        http_head.assert_called_once()
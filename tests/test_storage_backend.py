@@ -0,0 +1,119 @@
+"""可插拔存储后端与本地文件下载路由测试"""
+
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+
+PUBLIC_URL = "http://testserver/api/v1/files"
+
+
+@pytest.fixture
+def local_backend(tmp_path):
+    from app.services import storage_backend
+    from app.services.local_storage import LocalStorageService
+    backend = LocalStorageService(root=str(tmp_path / "files"), public_url=PUBLIC_URL)
+    with patch.dict(storage_backend._backends, {"local": backend}):
+        yield backend
+
+
+class TestLocalStorage:
+
+    def test_upload_and_exists(self, local_backend):
+        url = local_backend.upload_bytes(BytesIO(b"hello"), "documents/a b.docx")
+        assert url == f"{PUBLIC_URL}/documents/a%20b.docx"
+        assert local_backend.exists(url)
+        with open(local_backend.path_for_url(url), "rb") as f:
+            assert f.read() == b"hello"
+
+    def test_memoryview_upload(self, local_backend):
+        url = local_backend.upload_bytes(memoryview(b"abc"), "x/y.bin")
+        assert local_backend.download_to_bytes(url) == b"abc"
+
+    def test_rejects_path_traversal(self, local_backend):
+        with pytest.raises(ValueError):
+            local_backend.resolve_path("../../etc/passwd")
+
+
+class TestBackendSelection:
+
+    def test_default_from_settings(self):
+        from app.services.storage_backend import active_backend_name
+        assert active_backend_name() == "cos"
+
+    def test_context_overrides(self, local_backend):
+        from app.core.request_context import storage_backend_var
+        from app.services.storage_backend import get_storage_backend
+        token = storage_backend_var.set("local")
+        try:
+            assert get_storage_backend() is local_backend
+        finally:
+            storage_backend_var.reset(token)
+
+    def test_context_restored_in_worker(self):
+        from app.core.request_context import call_with_context, storage_backend_var
+        assert call_with_context({"storage_backend": "local"}, storage_backend_var.get) == "local"
+        assert storage_backend_var.get() is None
+
+    def test_invalid_header_rejected(self, client):
+        resp = client.get("/health", headers={"X-Storage-Backend": "s3"})
+        assert resp.status_code == 422
+
+    def test_request_header_routes_upload_to_local(self, client, local_backend):
+        from app.services.storage_backend import get_storage_backend
+        with patch("app.api.endpoints.excel_routes.get_cos_service", side_effect=get_storage_backend):
+            resp = client.post(
+                "/api/v1/excel/create_from_array",
+                json={"title": "本地报表", "data": [["a", "b"], [1, 2]]},
+                headers={"X-Storage-Backend": "local"},
+            )
+        assert resp.status_code == 200
+        file_url = resp.json()["data"]["file_url"]
+        assert file_url.startswith(PUBLIC_URL)
+
+        path = file_url[len("http://testserver"):]
+        download = client.get(path)
+        assert download.status_code == 200
+        assert download.content[:2] == b"PK"
+
+
+class TestFileRoute:
+
+    @pytest.fixture
+    def file_url(self, local_backend):
+        return local_backend.upload_bytes(bytes(range(100)), "pdf_documents/r.pdf")
+
+    def _path(self, url):
+        return url[len("http://testserver"):]
+
+    def test_full_download(self, client, file_url):
+        resp = client.get(self._path(file_url))
+        assert resp.status_code == 200
+        assert resp.content == bytes(range(100))
+        assert resp.headers["accept-ranges"] == "bytes"
+        assert resp.headers["content-type"] == "application/pdf"
+
+    def test_range_request(self, client, file_url):
+        resp = client.get(self._path(file_url), headers={"Range": "bytes=10-19"})
+        assert resp.status_code == 206
+        assert resp.content == bytes(range(10, 20))
+        assert resp.headers["content-range"] == "bytes 10-19/100"
+
+    def test_suffix_range(self, client, file_url):
+        resp = client.get(self._path(file_url), headers={"Range": "bytes=-5"})
+        assert resp.status_code == 206
+        assert resp.content == bytes(range(95, 100))
+
+    def test_unsatisfiable_range(self, client, file_url):
+        resp = client.get(self._path(file_url), headers={"Range": "bytes=200-"})
+        assert resp.status_code == 416
+        assert resp.headers["content-range"] == "bytes */100"
+
+    def test_etag_not_modified(self, client, file_url):
+        etag = client.head(self._path(file_url)).headers["etag"]
+        resp = client.get(self._path(file_url), headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+
+    def test_missing_file(self, client, local_backend):
+        assert client.get("/api/v1/files/nope/missing.pdf").status_code == 404
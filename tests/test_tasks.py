@@ -0,0 +1,106 @@
+"""异步任务模式（模式 B）测试"""
+
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from app.services.task_queue import (
+    TaskRecord, TaskStatus, MemoryTaskBackend, SqliteTaskBackend,
+)
+
+
+def _poll(client, status_url: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(status_url).json()["data"]
+        if data["status"] in ("succeeded", "failed"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError("任务未在超时时间内结束")
+
+
+class TestTaskRecord:
+
+    def test_valid_transitions(self):
+        record = TaskRecord(task_id="t1", kind="TEST")
+        record.transition(TaskStatus.RUNNING)
+        record.transition(TaskStatus.SUCCEEDED)
+        assert record.finished
+
+    def test_invalid_transition_rejected(self):
+        record = TaskRecord(task_id="t1", kind="TEST")
+        with pytest.raises(ValueError):
+            record.transition(TaskStatus.SUCCEEDED)
+
+
+class TestTaskBackends:
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def backend(self, request, tmp_path):
+        if request.param == "memory":
+            return MemoryTaskBackend()
+        return SqliteTaskBackend(str(tmp_path / "tasks.sqlite3"))
+
+    def test_save_and_get(self, backend):
+        record = TaskRecord(task_id="abc", kind="PDF-01")
+        record.transition(TaskStatus.RUNNING)
+        record.result = {"file_url": "https://cos.test/a.pdf"}
+        record.transition(TaskStatus.SUCCEEDED)
+        backend.save(record)
+
+        loaded = backend.get("abc")
+        assert loaded.status == TaskStatus.SUCCEEDED
+        assert loaded.result["file_url"] == "https://cos.test/a.pdf"
+        assert backend.get("missing") is None
+
+    def test_purge_only_finished(self, backend):
+        done = TaskRecord(task_id="done", kind="X", status=TaskStatus.FAILED, updated_at=0)
+        pending = TaskRecord(task_id="pending", kind="X", updated_at=0)
+        backend.save(done)
+        backend.save(pending)
+        assert backend.purge(time.time()) == 1
+        assert backend.get("done") is None
+        assert backend.get("pending") is not None
+
+
+class TestAsyncRoutes:
+
+    @patch("app.api.endpoints.pdf_routes.convert_docx_to_pdf")
+    def test_pdf01_async_mode(self, mock_conv):
+        from app.main import app
+        mock_conv.return_value = {
+            "file_url": "https://cos.test/output.pdf",
+            "filename": "converted_20250222_abc.pdf",
+        }
+        with TestClient(app) as client:
+            resp = client.post("/api/v1/pdf/convert_from_docx?async=true", json={
+                "source_docx_url": "https://cos.example.com/documents/report.docx",
+            })
+            assert resp.status_code == 202
+            body = resp.json()
+            assert body["code"] == 202
+            assert body["data"]["status_url"].endswith(body["data"]["task_id"])
+
+            result = _poll(client, body["data"]["status_url"])
+            assert result["status"] == "succeeded"
+            assert result["result_url"] == "https://cos.test/output.pdf"
+
+    @patch("app.api.endpoints.vis_routes.render_chart_from_data")
+    def test_vis02_async_failure_reported(self, mock_render):
+        from app.main import app
+        mock_render.side_effect = ValueError("不支持的图表类型")
+        with TestClient(app) as client:
+            resp = client.post("/api/v1/vis/render_chart?async=true", json={
+                "chart_type": "bar",
+                "categories": ["Q1"],
+                "series": [{"name": "R", "values": [1]}],
+            })
+            assert resp.status_code == 202
+            result = _poll(client, resp.json()["data"]["status_url"])
+            assert result["status"] == "failed"
+            assert result["error_code"] == 422
+
+    def test_unknown_task_404(self, client):
+        resp = client.get("/api/v1/tasks/not-a-real-task")
+        assert resp.status_code == 404